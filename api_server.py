@@ -0,0 +1,539 @@
+"""
+HTTP/JSON API системы бронирования для планшетов администраторов и сайта: asyncio, без внешних зависимостей.
+
+Эндпоинты (тела запросов и ответов — JSON; даты YYYY-MM-DD, время HH:MM):
+  GET    /health
+  GET    /users?after_id=&limit=               страница пользователей (keyset по id)
+  GET    /users/search?q=&limit=               по началу email, имени, фамилии или по id
+  POST   /users                                {"email", "first_name", "last_name"} -> 201 {"id"}
+  GET, PATCH, DELETE /users/{id}
+  GET    /tables?after_id=&limit=
+  POST   /tables                               {"table_number", "capacity"} -> 201 {"id"}
+  GET, PATCH, DELETE /tables/{id}
+  GET    /bookings?after_id=&limit=&detailed=1 и фильтры search_bookings: date_from, date_to,
+                                               time_from, time_to, user_id, table_id, min_guests
+  POST   /bookings                             {"user_id", "table_id", "booking_date", "booking_time",
+                                                "guests_count", "duration_minutes"?} -> 201 {"id"}
+  GET, PATCH, DELETE /bookings/{id}
+  GET    /availability?date=&time=&guests=&duration=
+  GET    /availability/grid?date=&times=18:00,19:00&guests=&duration=
+  GET    /metrics                              метрики запросов (формат Prometheus)
+
+Ошибки — {"error": "..."}: 400 — неверные параметры, 404 — нет строки, 409 — нет мест за столом
+или конфликт с данными (занятый email, несуществующий стол), 503 — БД недоступна.
+
+Обработчики вызывают backend_async: у процесса один асинхронный пул подключений, одновременно выполняется
+не больше --max-concurrency обработчиков (по умолчанию — размер пула), остальные ждут в очереди.
+Подключения HTTP/1.1 держатся открытыми (keep-alive); конвейерные запросы одного подключения
+выполняются параллельно, ответы уходят в порядке запросов.
+
+Запуск: python api_server.py [--host 127.0.0.1] [--port 8080] [--max-concurrency N] [--db booking]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import re
+import signal
+import sys
+from dataclasses import dataclass
+from datetime import date, datetime, time
+from http import HTTPStatus
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import psycopg
+from psycopg_pool import PoolTimeout
+
+import backend
+import backend_async
+import query_metrics
+from postgres_driver import close_async_pools, get_config, get_driver
+
+logger = logging.getLogger(__name__)
+
+# Предел заголовков запроса (и буфера чтения подключения) и тела запроса.
+MAX_HEADER_BYTES = 16 * 1024
+MAX_BODY_BYTES = 1024 * 1024
+# Наибольший limit страниц списков.
+MAX_PAGE_SIZE = 1000
+# Сколько запросов одного подключения может выполняться одновременно (глубина конвейера).
+PIPELINE_DEPTH = 16
+# Подключение без новых запросов закрывается через столько секунд.
+IDLE_TIMEOUT = 30.0
+
+
+class HttpError(Exception):
+    """Ответ с ошибкой: HTTP-статус и сообщение для клиента."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+@dataclass(slots=True)
+class Request:
+    """Разобранный HTTP-запрос; query — последнее значение каждого параметра строки запроса."""
+
+    method: str
+    path: str
+    query: Dict[str, str]
+    body: bytes
+    keep_alive: bool
+
+    def json(self) -> Dict[str, Any]:
+        try:
+            data = json.loads(self.body or b"{}")
+        except ValueError:
+            raise HttpError(400, "Тело запроса — не JSON.")
+        if not isinstance(data, dict):
+            raise HttpError(400, "Тело запроса — JSON-объект.")
+        return data
+
+
+Handler = Callable[..., Awaitable[Tuple[int, Any]]]
+
+
+# --- Параметры ---
+
+
+def _int(value: Any, name: str) -> int:
+    """Целое из строки запроса или JSON (числа с дробной частью и true/false — ошибка 400)."""
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if isinstance(value, str):
+        try:
+            return int(value)
+        except ValueError:
+            pass
+    raise HttpError(400, f"{name}: ожидается целое число.")
+
+
+def _query_int(request: Request, name: str, default: Optional[int] = None) -> Optional[int]:
+    value = request.query.get(name, "")
+    return _int(value, name) if value != "" else default
+
+
+def _required(request: Request, name: str) -> str:
+    value = request.query.get(name, "")
+    if value == "":
+        raise HttpError(400, f"Не задан параметр {name}.")
+    return value
+
+
+def _limit(request: Request, default: int = backend.PAGE_SIZE) -> int:
+    limit = _query_int(request, "limit", default)
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise HttpError(400, f"limit: от 1 до {MAX_PAGE_SIZE}.")
+    return limit
+
+
+def _fields(request: Request, required: Tuple[str, ...], optional: Tuple[str, ...] = (), ints: Tuple[str, ...] = ()):
+    """
+    Поля тела запроса: required обязательны, optional — если заданы; поля из ints приводятся к int.
+    Без required (PATCH) нужно хотя бы одно поле.
+    """
+    data = request.json()
+    if not required and not data:
+        raise HttpError(400, "Нет полей для изменения.")
+    unknown = set(data) - set(required) - set(optional)
+    if unknown:
+        raise HttpError(400, f"Неизвестные поля: {', '.join(sorted(unknown))}.")
+    missing = [name for name in required if data.get(name) is None]
+    if missing:
+        raise HttpError(400, f"Не заданы поля: {', '.join(missing)}.")
+    return {
+        name: _int(value, name) if name in ints and value is not None else value
+        for name, value in data.items()
+    }
+
+
+def _found(row: Any, not_found: str) -> Tuple[int, Any]:
+    if row is None:
+        raise HttpError(404, not_found)
+    return 200, row
+
+
+def _changed(done: bool, not_found: str) -> Tuple[int, Any]:
+    """Ответ на PATCH/DELETE: False от бэкенда — строки с таким id нет."""
+    if not done:
+        raise HttpError(404, not_found)
+    return 200, {"ok": True}
+
+
+# --- Обработчики ---
+
+
+async def _health(request: Request) -> Tuple[int, Any]:
+    return 200, {"status": "ok"}
+
+
+async def _metrics(request: Request) -> Tuple[int, Any]:
+    return 200, query_metrics.prometheus_text()
+
+
+_USER_FIELDS = ("email", "first_name", "last_name")
+
+
+async def _users_page(request: Request) -> Tuple[int, Any]:
+    return 200, await backend_async.get_users_page(_query_int(request, "after_id", 0), _limit(request))
+
+
+async def _users_search(request: Request) -> Tuple[int, Any]:
+    return 200, await backend_async.search_users(request.query.get("q", ""), _limit(request, 10))
+
+
+async def _user_create(request: Request) -> Tuple[int, Any]:
+    return 201, {"id": await backend_async.create_user(**_fields(request, _USER_FIELDS))}
+
+
+async def _user_get(request: Request, user_id: str) -> Tuple[int, Any]:
+    return _found(await backend_async.get_user(int(user_id)), "Пользователь не найден.")
+
+
+async def _user_update(request: Request, user_id: str) -> Tuple[int, Any]:
+    fields = _fields(request, (), _USER_FIELDS)
+    return _changed(await backend_async.update_user(int(user_id), **fields), "Пользователь не найден.")
+
+
+async def _user_delete(request: Request, user_id: str) -> Tuple[int, Any]:
+    return _changed(await backend_async.delete_user(int(user_id)), "Пользователь не найден.")
+
+
+_TABLE_FIELDS = ("table_number", "capacity")
+
+
+async def _tables_page(request: Request) -> Tuple[int, Any]:
+    return 200, await backend_async.get_tables_page(_query_int(request, "after_id", 0), _limit(request))
+
+
+async def _table_create(request: Request) -> Tuple[int, Any]:
+    fields = _fields(request, _TABLE_FIELDS, ints=_TABLE_FIELDS)
+    return 201, {"id": await backend_async.create_table(fields["table_number"], fields["capacity"])}
+
+
+async def _table_get(request: Request, table_id: str) -> Tuple[int, Any]:
+    return _found(await backend_async.get_table(int(table_id)), "Стол не найден.")
+
+
+async def _table_update(request: Request, table_id: str) -> Tuple[int, Any]:
+    fields = _fields(request, (), _TABLE_FIELDS, ints=_TABLE_FIELDS)
+    return _changed(await backend_async.update_table(int(table_id), **fields), "Стол не найден.")
+
+
+async def _table_delete(request: Request, table_id: str) -> Tuple[int, Any]:
+    return _changed(await backend_async.delete_table(int(table_id)), "Стол не найден.")
+
+
+_BOOKING_REQUIRED = ("user_id", "table_id", "booking_date", "booking_time", "guests_count")
+_BOOKING_INTS = ("user_id", "table_id", "guests_count", "duration_minutes")
+
+
+async def _bookings_list(request: Request) -> Tuple[int, Any]:
+    filters: Dict[str, Any] = {
+        name: request.query.get(name) or None for name in ("date_from", "date_to", "time_from", "time_to")
+    }
+    for name in ("user_id", "table_id", "min_guests"):
+        filters[name] = _query_int(request, name)
+    return 200, await backend_async.search_bookings(
+        **filters,
+        after_id=_query_int(request, "after_id", 0),
+        order_by="id",
+        limit=_limit(request),
+        detailed=request.query.get("detailed") in ("1", "true"),
+    )
+
+
+async def _booking_create(request: Request) -> Tuple[int, Any]:
+    fields = _fields(request, _BOOKING_REQUIRED, ("duration_minutes",), ints=_BOOKING_INTS)
+    return 201, {"id": await backend_async.create_booking(**fields)}
+
+
+async def _booking_get(request: Request, booking_id: str) -> Tuple[int, Any]:
+    return _found(await backend_async.get_booking(int(booking_id)), "Бронирование не найдено.")
+
+
+async def _booking_update(request: Request, booking_id: str) -> Tuple[int, Any]:
+    fields = _fields(request, (), _BOOKING_REQUIRED + ("duration_minutes",), ints=_BOOKING_INTS)
+    return _changed(await backend_async.update_booking(int(booking_id), **fields), "Бронирование не найдено.")
+
+
+async def _booking_delete(request: Request, booking_id: str) -> Tuple[int, Any]:
+    return _changed(await backend_async.delete_booking(int(booking_id)), "Бронирование не найдено.")
+
+
+async def _availability(request: Request) -> Tuple[int, Any]:
+    return 200, await backend_async.find_available_tables(
+        _required(request, "date"),
+        _required(request, "time"),
+        _int(_required(request, "guests"), "guests"),
+        _query_int(request, "duration"),
+    )
+
+
+async def _availability_grid(request: Request) -> Tuple[int, Any]:
+    times = [t.strip() for t in _required(request, "times").split(",") if t.strip()]
+    return 200, await backend_async.get_availability_grid(
+        _required(request, "date"), times, _query_int(request, "guests", 1), _query_int(request, "duration")
+    )
+
+
+# Маршруты: (метод, шаблон пути) -> обработчик; группы шаблона передаются обработчику аргументами.
+ROUTES: List[Tuple[str, "re.Pattern", Handler]] = [
+    (method, re.compile(pattern), handler)
+    for method, pattern, handler in (
+        ("GET", r"/health", _health),
+        ("GET", r"/metrics", _metrics),
+        ("GET", r"/users", _users_page),
+        ("GET", r"/users/search", _users_search),
+        ("POST", r"/users", _user_create),
+        ("GET", r"/users/(\d+)", _user_get),
+        ("PATCH", r"/users/(\d+)", _user_update),
+        ("DELETE", r"/users/(\d+)", _user_delete),
+        ("GET", r"/tables", _tables_page),
+        ("POST", r"/tables", _table_create),
+        ("GET", r"/tables/(\d+)", _table_get),
+        ("PATCH", r"/tables/(\d+)", _table_update),
+        ("DELETE", r"/tables/(\d+)", _table_delete),
+        ("GET", r"/bookings", _bookings_list),
+        ("POST", r"/bookings", _booking_create),
+        ("GET", r"/bookings/(\d+)", _booking_get),
+        ("PATCH", r"/bookings/(\d+)", _booking_update),
+        ("DELETE", r"/bookings/(\d+)", _booking_delete),
+        ("GET", r"/availability", _availability),
+        ("GET", r"/availability/grid", _availability_grid),
+    )
+]
+
+
+def _route(request: Request) -> Tuple[Handler, Tuple[str, ...]]:
+    path_matched = False
+    for method, pattern, handler in ROUTES:
+        match = pattern.fullmatch(request.path)
+        if match is None:
+            continue
+        if method == request.method:
+            return handler, match.groups()
+        path_matched = True
+    if path_matched:
+        raise HttpError(405, f"Метод {request.method} не поддерживается для {request.path}.")
+    raise HttpError(404, f"Нет такого адреса: {request.path}.")
+
+
+# --- HTTP ---
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (date, datetime, time)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} не сериализуется в JSON")
+
+
+def _response(status: int, payload: Any, keep_alive: bool) -> bytes:
+    """Ответ целиком: str — текст (метрики), остальное — JSON."""
+    if isinstance(payload, str):
+        body, content_type = payload.encode(), "text/plain; version=0.0.4; charset=utf-8"
+    else:
+        body = json.dumps(payload, default=_json_default, ensure_ascii=False, separators=(",", ":")).encode()
+        content_type = "application/json; charset=utf-8"
+    head = (
+        f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n"
+        f"Content-Type: {content_type}\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    return head.encode("latin-1") + body
+
+
+def _error(ex: Exception) -> Tuple[int, Any]:
+    """HTTP-статус и тело ответа для исключения обработчика."""
+    if isinstance(ex, HttpError):
+        status = ex.status
+    elif isinstance(ex, (ValueError, psycopg.DataError)):
+        status = 400
+    elif isinstance(ex, (backend.BookingCapacityError, psycopg.IntegrityError)):
+        status = 409
+    elif isinstance(ex, (psycopg.OperationalError, PoolTimeout)):
+        status = 503
+    else:
+        logger.exception("Ошибка обработчика")
+        return 500, {"error": "Внутренняя ошибка сервера."}
+    diag = getattr(ex, "diag", None)
+    message = diag.message_primary if isinstance(ex, psycopg.Error) and diag and diag.message_primary else str(ex)
+    return status, {"error": message}
+
+
+async def _read_request(reader: asyncio.StreamReader) -> Optional[Request]:
+    """Следующий запрос подключения; None — клиент закрыл подключение между запросами."""
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+    except asyncio.IncompleteReadError as ex:
+        if not ex.partial.strip():
+            return None
+        raise HttpError(400, "Неполный запрос.")
+    except asyncio.LimitOverrunError:
+        raise HttpError(431, "Слишком большие заголовки запроса.")
+    lines = head.decode("latin-1").split("\r\n")
+    parts = lines[0].split()
+    if len(parts) != 3 or not parts[2].startswith("HTTP/1."):
+        raise HttpError(400, "Неверная строка запроса.")
+    method, target, version = parts
+    headers = {}
+    for line in lines[1:]:
+        name, sep, value = line.partition(":")
+        if sep:
+            headers[name.strip().lower()] = value.strip()
+    if "transfer-encoding" in headers:
+        raise HttpError(501, "Transfer-Encoding не поддерживается, нужен Content-Length.")
+    length = _int(headers.get("content-length", "0"), "Content-Length")
+    if not 0 <= length <= MAX_BODY_BYTES:
+        raise HttpError(413, f"Тело запроса больше {MAX_BODY_BYTES} байт.")
+    body = await reader.readexactly(length) if length else b""
+    connection = headers.get("connection", "").lower()
+    keep_alive = connection == "keep-alive" if version == "HTTP/1.0" else connection != "close"
+    url = urlsplit(target)
+    query = {name: values[-1] for name, values in parse_qs(url.query, keep_blank_values=True).items()}
+    return Request(method.upper(), url.path.rstrip("/") or "/", query, body, keep_alive)
+
+
+class ApiServer:
+    """Сервер API: подключения, конвейер запросов подключения и общий предел одновременных обработчиков."""
+
+    def __init__(self, max_concurrency: int):
+        self._limit = asyncio.Semaphore(max_concurrency)
+        self._writers: Set[asyncio.StreamWriter] = set()
+
+    async def dispatch(self, request: Request) -> bytes:
+        try:
+            handler, args = _route(request)
+            async with self._limit:
+                status, payload = await handler(request, *args)
+        except Exception as ex:
+            status, payload = _error(ex)
+        return _response(status, payload, request.keep_alive)
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Читает запросы подключения и сразу запускает их обработку (не больше PIPELINE_DEPTH одновременно);
+        ответы отправляет отдельная задача в порядке запросов.
+        """
+        self._writers.add(writer)
+        responses: "asyncio.Queue[Optional[Tuple[asyncio.Future, bool]]]" = asyncio.Queue()
+        in_flight = asyncio.Semaphore(PIPELINE_DEPTH)
+        sender = asyncio.create_task(self._send(responses, in_flight, writer))
+        try:
+            while True:
+                await in_flight.acquire()
+                try:
+                    request = await asyncio.wait_for(_read_request(reader), IDLE_TIMEOUT)
+                except HttpError as ex:
+                    # После ошибки разбора граница следующего запроса неизвестна — подключение закрывается.
+                    responses.put_nowait((_completed(_response(ex.status, {"error": str(ex)}, False)), False))
+                    break
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+                    in_flight.release()
+                    break
+                if request is None:
+                    in_flight.release()
+                    break
+                responses.put_nowait((asyncio.ensure_future(self.dispatch(request)), request.keep_alive))
+                if not request.keep_alive:
+                    break
+        finally:
+            responses.put_nowait(None)
+            await sender
+            self._writers.discard(writer)
+            writer.close()
+
+    @staticmethod
+    async def _send(responses: asyncio.Queue, in_flight: asyncio.Semaphore, writer: asyncio.StreamWriter) -> None:
+        """Отправляет ответы по порядку; после закрытия подключения обработчики всё равно дожидаются."""
+        closed = False
+        while True:
+            item = await responses.get()
+            if item is None:
+                return
+            future, keep_alive = item
+            try:
+                response = await future
+            finally:
+                in_flight.release()
+            if closed:
+                continue
+            try:
+                writer.write(response)
+                # Ответы конвейера, готовые подряд, уходят одной записью.
+                if responses.empty():
+                    await writer.drain()
+            except ConnectionError:
+                closed = True
+            if not keep_alive:
+                closed = True
+
+    def close_connections(self) -> None:
+        for writer in list(self._writers):
+            writer.close()
+
+
+def _completed(value: Any) -> asyncio.Future:
+    future = asyncio.get_running_loop().create_future()
+    future.set_result(value)
+    return future
+
+
+async def serve(host: str, port: int, max_concurrency: int, ready: Optional[Callable[[], None]] = None) -> None:
+    """
+    Запускает сервер и работает до SIGINT/SIGTERM; ready() — после открытия порта.
+    Порт открывается, когда пул подключений готов: недоступная БД видна сразу при запуске.
+    """
+    pool = await get_driver(backend.DB_NAME).get_async_pool()
+    try:
+        await pool.wait()
+        api = ApiServer(max_concurrency)
+        server = await asyncio.start_server(api.handle_connection, host, port, limit=MAX_HEADER_BYTES)
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, stop.set)
+            except (NotImplementedError, RuntimeError):
+                pass
+        try:
+            if ready is not None:
+                ready()
+            await stop.wait()
+        finally:
+            server.close()
+            api.close_connections()
+            await server.wait_closed()
+    finally:
+        await close_async_pools()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1", help="адрес (по умолчанию только локальный)")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument(
+        "--max-concurrency", type=int, default=None,
+        help="обработчиков одновременно (по умолчанию — DB_POOL_MAX_SIZE)",
+    )
+    parser.add_argument("--db", default=backend.DB_NAME, help="база данных")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    backend.DB_NAME = args.db
+    max_concurrency = args.max_concurrency or get_config().pool_max_size
+
+    def ready() -> None:
+        logger.info("API: http://%s:%s (база %s, одновременно %s)", args.host, args.port, args.db, max_concurrency)
+
+    try:
+        asyncio.run(serve(args.host, args.port, max_concurrency, ready))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,40 @@
 """
 Графический интерфейс системы бронирования (tkinter).
+
+Окно появляется до импорта бэкенда (psycopg, пул подключений): модуль backend загружается
+в фоне после показа окна, вкладки строятся при первом открытии.
+Списки следят за лентой изменений БД (LISTEN/NOTIFY): правки с других рабочих мест
+появляются без «Обновить список».
 """
+import datetime
+import importlib
 import tkinter as tk
 from tkinter import ttk, messagebox
 from tkinter.scrolledtext import ScrolledText
-import backend
+from typing import Callable, Dict
+from autocomplete import AutocompleteEntry
+from paged_tree import PagedTree
+from task_runner import BusyIndicator, ChangeFeed, TaskRunner
+
+
+class _LazyModule:
+    """Модуль, импортируемый при первом обращении к атрибуту."""
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+
+    def load(self):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self.load(), attr)
+
+
+backend = _LazyModule("backend")
+changes = _LazyModule("models.changes")
 
 
 def _safe_int(value: str, default=None):
@@ -21,6 +51,10 @@ def _show_result(msg: str, is_error: bool = False):
         messagebox.showinfo("Результат", msg)
 
 
+def _show_error(ex: Exception):
+    _show_result(str(ex), is_error=True)
+
+
 def _date_ru_to_db(s: str):
     """ДД-ММ-ГГГГ -> YYYY-MM-DD для PostgreSQL. Возвращает None при ошибке."""
     s = s.strip()
@@ -38,6 +72,15 @@ def _date_ru_to_db(s: str):
     return None
 
 
+def _valid_time(s: str) -> bool:
+    """HH:MM или HH:MM:SS."""
+    try:
+        datetime.time.fromisoformat(s)
+    except ValueError:
+        return False
+    return True
+
+
 def _date_db_to_ru(val):
     """Дата из БД (str YYYY-MM-DD или date) -> ДД-ММ-ГГГГ для отображения."""
     if val is None:
@@ -54,18 +97,42 @@ def _date_db_to_ru(val):
 # --- Вкладка «Пользователи» ---
 
 
-def build_users_tab(parent):
+def _user_text(user: dict) -> str:
+    return f"{user['id']}: {user['first_name']} {user['last_name']} <{user['email']}>"
+
+
+def _user_entry(parent, runner: TaskRunner, feed: ChangeFeed, key: str, row: int) -> AutocompleteEntry:
+    """
+    Поле ID пользователя с подсказками по id, email, имени и фамилии (backend.search_users);
+    после выбора подсказки в поле — id, справа (колонка 2 строки row) — имя пользователя.
+    """
+    chosen = ttk.Label(parent, text="", foreground="gray")
+    chosen.grid(row=row, column=2, sticky="w")
+    entry = AutocompleteEntry(
+        parent, runner, lambda text: backend.search_users(text), _user_text, lambda user: str(user["id"]),
+        key=key, width=10,
+        on_select=lambda user: chosen.config(text=f"{user['first_name']} {user['last_name']}" if user else ""),
+    )
+    # Подсказки из кэша не должны пережить правку пользователей.
+    feed.subscribe("users", entry.invalidate)
+    return entry
+
+
+def build_users_tab(parent, runner: TaskRunner, feed: ChangeFeed):
     frame = ttk.Frame(parent, padding=10)
+    busy = BusyIndicator(frame)
+    busy.grid(row=6, column=0, columnspan=2, sticky="w")
 
     # Инициализация БД
     grp_init = ttk.Frame(frame)
     grp_init.grid(row=0, column=0, columnspan=2, sticky="ew", pady=(0, 10))
     def do_create_tables():
-        try:
-            backend.create_tables()
-            _show_result("Таблицы созданы или уже существуют.")
-        except Exception as ex:
-            _show_result(str(ex), is_error=True)
+        runner.submit(
+            backend.create_tables,
+            on_success=lambda _: _show_result("Таблицы созданы или уже существуют."),
+            on_error=_show_error,
+            indicator=busy,
+        )
     ttk.Button(grp_init, text="Создать таблицы в БД", command=do_create_tables).pack(side=tk.LEFT, padx=(0, 10))
 
     # Создать
@@ -86,8 +153,8 @@ def build_users_tab(parent):
         if not e or not f or not l:
             _show_result("Заполните email, имя и фамилию.", is_error=True)
             return
-        try:
-            uid = backend.create_user(e, f, l)
+
+        def done(uid):
             if uid is not None:
                 _show_result(f"Пользователь создан, id = {uid}")
                 ent_email.delete(0, tk.END)
@@ -95,8 +162,8 @@ def build_users_tab(parent):
                 ent_last.delete(0, tk.END)
             else:
                 _show_result("Не удалось создать пользователя.", is_error=True)
-        except Exception as ex:
-            _show_result(str(ex), is_error=True)
+
+        runner.submit(backend.create_user, e, f, l, on_success=done, on_error=_show_error, indicator=busy)
 
     ttk.Button(grp_create, text="Создать", command=do_create_user).grid(row=3, column=1, pady=(5, 0))
 
@@ -114,8 +181,8 @@ def build_users_tab(parent):
         if uid is None:
             _show_result("Введите числовой ID.", is_error=True)
             return
-        try:
-            u = backend.get_user(uid)
+
+        def done(u):
             txt_user.config(state="normal")
             txt_user.delete(1.0, tk.END)
             if u:
@@ -123,8 +190,8 @@ def build_users_tab(parent):
             else:
                 txt_user.insert(tk.END, "Не найдено.")
             txt_user.config(state="disabled")
-        except Exception as ex:
-            _show_result(str(ex), is_error=True)
+
+        runner.submit(backend.get_user, uid, key="users:get", on_success=done, on_error=_show_error, indicator=busy)
 
     ttk.Button(grp_get, text="Найти", command=do_get_user).grid(row=0, column=2, padx=(5, 0))
 
@@ -140,16 +207,16 @@ def build_users_tab(parent):
     tree_u.grid(row=0, column=0, sticky="nsew")
     sb_u = ttk.Scrollbar(grp_list_u, orient=tk.VERTICAL, command=tree_u.yview)
     sb_u.grid(row=0, column=1, sticky="ns")
-    tree_u.configure(yscrollcommand=sb_u.set)
+    list_u = PagedTree(
+        tree_u, sb_u, runner, lambda after_id, limit: backend.get_users_page(after_id, limit),
+        lambda row: (row["id"], row["email"], row["first_name"], row["last_name"]),
+        key="users:list", on_error=_show_error, indicator=busy,
+        fetch_rows=lambda ids: backend.get_users_by_ids(ids),
+    )
+    feed.subscribe("users", list_u.apply_changes)
 
     def do_list_users():
-        for i in tree_u.get_children():
-            tree_u.delete(i)
-        try:
-            for row in backend.get_all_users():
-                tree_u.insert("", tk.END, values=(row["id"], row["email"], row["first_name"], row["last_name"]))
-        except Exception as ex:
-            _show_result(str(ex), is_error=True)
+        list_u.refresh()
 
     ttk.Button(grp_list_u, text="Обновить список", command=do_list_users).grid(row=1, column=0, pady=(5, 0))
 
@@ -180,13 +247,14 @@ def build_users_tab(parent):
         if not any([email, first, last]):
             _show_result("Укажите хотя бы одно поле для обновления.", is_error=True)
             return
-        try:
-            ok = backend.update_user(uid, email=email, first_name=first, last_name=last)
+
+        def done(ok):
             _show_result("Обновлено." if ok else "Запись не найдена или не изменена.")
-            if ok:
-                do_list_users()
-        except Exception as ex:
-            _show_result(str(ex), is_error=True)
+
+        runner.submit(
+            backend.update_user, uid, email=email, first_name=first, last_name=last,
+            on_success=done, on_error=_show_error, indicator=busy,
+        )
 
     ttk.Button(grp_upd_u, text="Обновить", command=do_update_user).grid(row=4, column=1, pady=(5, 0))
 
@@ -204,13 +272,11 @@ def build_users_tab(parent):
             return
         if not messagebox.askyesno("Подтверждение", "Удалить пользователя?"):
             return
-        try:
-            ok = backend.delete_user(uid)
+
+        def done(ok):
             _show_result("Удалено." if ok else "Запись не найдена.")
-            if ok:
-                do_list_users()
-        except Exception as ex:
-            _show_result(str(ex), is_error=True)
+
+        runner.submit(backend.delete_user, uid, on_success=done, on_error=_show_error, indicator=busy)
 
     ttk.Button(grp_del_u, text="Удалить", command=do_delete_user).grid(row=0, column=2, padx=(5, 0))
 
@@ -222,8 +288,10 @@ def build_users_tab(parent):
 # --- Вкладка «Столы» ---
 
 
-def build_tables_tab(parent):
+def build_tables_tab(parent, runner: TaskRunner, feed: ChangeFeed):
     frame = ttk.Frame(parent, padding=10)
+    busy = BusyIndicator(frame)
+    busy.grid(row=5, column=0, columnspan=2, sticky="w")
 
     grp_create = ttk.LabelFrame(frame, text="Создать стол", padding=5)
     grp_create.grid(row=0, column=0, columnspan=2, sticky="ew", pady=(0, 10))
@@ -242,16 +310,16 @@ def build_tables_tab(parent):
         if cap < 1:
             _show_result("Вместимость должна быть > 0.", is_error=True)
             return
-        try:
-            tid = backend.create_table(num, cap)
+
+        def done(tid):
             if tid is not None:
                 _show_result(f"Стол создан, id = {tid}")
                 ent_num.delete(0, tk.END)
                 ent_cap.delete(0, tk.END)
             else:
                 _show_result("Не удалось создать стол (возможно, такой номер уже есть).", is_error=True)
-        except Exception as ex:
-            _show_result(str(ex), is_error=True)
+
+        runner.submit(backend.create_table, num, cap, on_success=done, on_error=_show_error, indicator=busy)
 
     ttk.Button(grp_create, text="Создать", command=do_create_table).grid(row=2, column=1, pady=(5, 0))
 
@@ -268,8 +336,8 @@ def build_tables_tab(parent):
         if tid is None:
             _show_result("Введите числовой ID.", is_error=True)
             return
-        try:
-            t = backend.get_table(tid)
+
+        def done(t):
             txt_t.config(state="normal")
             txt_t.delete(1.0, tk.END)
             if t:
@@ -277,8 +345,8 @@ def build_tables_tab(parent):
             else:
                 txt_t.insert(tk.END, "Не найдено.")
             txt_t.config(state="disabled")
-        except Exception as ex:
-            _show_result(str(ex), is_error=True)
+
+        runner.submit(backend.get_table, tid, key="tables:get", on_success=done, on_error=_show_error, indicator=busy)
 
     ttk.Button(grp_get, text="Найти", command=do_get_table).grid(row=0, column=2, padx=(5, 0))
 
@@ -292,16 +360,16 @@ def build_tables_tab(parent):
     tree_t.grid(row=0, column=0, sticky="nsew")
     sb_t = ttk.Scrollbar(grp_list_t, orient=tk.VERTICAL, command=tree_t.yview)
     sb_t.grid(row=0, column=1, sticky="ns")
-    tree_t.configure(yscrollcommand=sb_t.set)
+    list_t = PagedTree(
+        tree_t, sb_t, runner, lambda after_id, limit: backend.get_tables_page(after_id, limit),
+        lambda row: (row["id"], row["table_number"], row["capacity"]),
+        key="tables:list", on_error=_show_error, indicator=busy,
+        fetch_rows=lambda ids: backend.get_tables_by_ids(ids),
+    )
+    feed.subscribe("restaurant_tables", list_t.apply_changes)
 
     def do_list_tables():
-        for i in tree_t.get_children():
-            tree_t.delete(i)
-        try:
-            for row in backend.get_all_tables():
-                tree_t.insert("", tk.END, values=(row["id"], row["table_number"], row["capacity"]))
-        except Exception as ex:
-            _show_result(str(ex), is_error=True)
+        list_t.refresh()
 
     ttk.Button(grp_list_t, text="Обновить список", command=do_list_tables).grid(row=1, column=0, pady=(5, 0))
 
@@ -326,13 +394,14 @@ def build_tables_tab(parent):
         if num is None and cap is None:
             _show_result("Укажите номер и/или вместимость.", is_error=True)
             return
-        try:
-            ok = backend.update_table(tid, table_number=num, capacity=cap)
+
+        def done(ok):
             _show_result("Обновлено." if ok else "Запись не найдена или не изменена.")
-            if ok:
-                do_list_tables()
-        except Exception as ex:
-            _show_result(str(ex), is_error=True)
+
+        runner.submit(
+            backend.update_table, tid, table_number=num, capacity=cap,
+            on_success=done, on_error=_show_error, indicator=busy,
+        )
 
     ttk.Button(grp_upd_t, text="Обновить", command=do_update_table).grid(row=3, column=1, pady=(5, 0))
 
@@ -349,13 +418,11 @@ def build_tables_tab(parent):
             return
         if not messagebox.askyesno("Подтверждение", "Удалить стол?"):
             return
-        try:
-            ok = backend.delete_table(tid)
+
+        def done(ok):
             _show_result("Удалено." if ok else "Запись не найдена.")
-            if ok:
-                do_list_tables()
-        except Exception as ex:
-            _show_result(str(ex), is_error=True)
+
+        runner.submit(backend.delete_table, tid, on_success=done, on_error=_show_error, indicator=busy)
 
     ttk.Button(grp_del_t, text="Удалить", command=do_delete_table).grid(row=0, column=2, padx=(5, 0))
 
@@ -367,13 +434,15 @@ def build_tables_tab(parent):
 # --- Вкладка «Бронирования» ---
 
 
-def build_bookings_tab(parent):
+def build_bookings_tab(parent, runner: TaskRunner, feed: ChangeFeed):
     frame = ttk.Frame(parent, padding=10)
+    busy = BusyIndicator(frame)
+    busy.grid(row=5, column=0, columnspan=2, sticky="w")
 
     grp_create = ttk.LabelFrame(frame, text="Создать бронирование", padding=5)
     grp_create.grid(row=0, column=0, columnspan=2, sticky="ew", pady=(0, 10))
-    ttk.Label(grp_create, text="ID пользователя:").grid(row=0, column=0, sticky="w", padx=(0, 5))
-    ent_b_user = ttk.Entry(grp_create, width=10)
+    ttk.Label(grp_create, text="Пользователь (ID, имя, email):").grid(row=0, column=0, sticky="w", padx=(0, 5))
+    ent_b_user = _user_entry(grp_create, runner, feed, "bookings:create:user", row=0)
     ent_b_user.grid(row=0, column=1, padx=(0, 15))
     ttk.Label(grp_create, text="ID стола:").grid(row=1, column=0, sticky="w", padx=(0, 5))
     ent_b_table = ttk.Entry(grp_create, width=10)
@@ -387,6 +456,9 @@ def build_bookings_tab(parent):
     ttk.Label(grp_create, text="Кол-во гостей:").grid(row=4, column=0, sticky="w", padx=(0, 5))
     ent_b_guests = ttk.Entry(grp_create, width=10)
     ent_b_guests.grid(row=4, column=1, padx=(0, 15))
+    ttk.Label(grp_create, text="Длительность, мин (по умолч. 120):").grid(row=5, column=0, sticky="w", padx=(0, 5))
+    ent_b_duration = ttk.Entry(grp_create, width=10)
+    ent_b_duration.grid(row=5, column=1, padx=(0, 15))
 
     def do_create_booking():
         uid = _safe_int(ent_b_user.get())
@@ -394,6 +466,7 @@ def build_bookings_tab(parent):
         date_ru = ent_b_date.get().strip()
         time = ent_b_time.get().strip()
         guests = _safe_int(ent_b_guests.get())
+        duration = _safe_int(ent_b_duration.get())
         if uid is None or tid is None:
             _show_result("Введите ID пользователя и ID стола.", is_error=True)
             return
@@ -407,21 +480,28 @@ def build_bookings_tab(parent):
         if guests is None or guests < 1:
             _show_result("Количество гостей должно быть > 0.", is_error=True)
             return
-        try:
-            bid = backend.create_booking(uid, tid, date, time, guests)
+        if ent_b_duration.get().strip() and (duration is None or duration < 1):
+            _show_result("Длительность — целое число минут > 0.", is_error=True)
+            return
+
+        def done(bid):
             if bid is not None:
                 _show_result(f"Бронирование создано, id = {bid}")
-                ent_b_user.delete(0, tk.END)
+                ent_b_user.clear()
                 ent_b_table.delete(0, tk.END)
                 ent_b_date.delete(0, tk.END)
                 ent_b_time.delete(0, tk.END)
                 ent_b_guests.delete(0, tk.END)
+                ent_b_duration.delete(0, tk.END)
             else:
                 _show_result("Не удалось создать бронирование.", is_error=True)
-        except Exception as ex:
-            _show_result(str(ex), is_error=True)
 
-    ttk.Button(grp_create, text="Создать", command=do_create_booking).grid(row=5, column=1, pady=(5, 0))
+        runner.submit(
+            backend.create_booking, uid, tid, date, time, guests, duration,
+            on_success=done, on_error=_show_error, indicator=busy,
+        )
+
+    ttk.Button(grp_create, text="Создать", command=do_create_booking).grid(row=6, column=1, pady=(5, 0))
 
     grp_get = ttk.LabelFrame(frame, text="Найти по ID", padding=5)
     grp_get.grid(row=1, column=0, sticky="ew", pady=(0, 10))
@@ -436,8 +516,8 @@ def build_bookings_tab(parent):
         if bid is None:
             _show_result("Введите числовой ID.", is_error=True)
             return
-        try:
-            b = backend.get_booking(bid)
+
+        def done(b):
             txt_b.config(state="normal")
             txt_b.delete(1.0, tk.END)
             if b:
@@ -448,47 +528,139 @@ def build_bookings_tab(parent):
             else:
                 txt_b.insert(tk.END, "Не найдено.")
             txt_b.config(state="disabled")
-        except Exception as ex:
-            _show_result(str(ex), is_error=True)
+
+        runner.submit(backend.get_booking, bid, key="bookings:get", on_success=done, on_error=_show_error, indicator=busy)
 
     ttk.Button(grp_get, text="Найти", command=do_get_booking).grid(row=0, column=2, padx=(5, 0))
 
-    grp_list_b = ttk.LabelFrame(frame, text="Все бронирования", padding=5)
+    grp_list_b = ttk.LabelFrame(frame, text="Бронирования", padding=5)
     grp_list_b.grid(row=2, column=0, columnspan=2, sticky="nsew", pady=(0, 10))
-    columns_b = ("id", "user_id", "table_id", "booking_date", "booking_time", "guests_count")
-    tree_b = ttk.Treeview(grp_list_b, columns=columns_b, show="headings", height=6)
-    heads_b = {"id": "ID", "user_id": "User ID", "table_id": "Table ID", "booking_date": "Дата", "booking_time": "Время", "guests_count": "Гостей"}
-    for c in columns_b:
-        tree_b.heading(c, text=heads_b[c])
-        tree_b.column(c, width=70)
-    tree_b.grid(row=0, column=0, sticky="nsew")
+
+    # Фильтр списка: выборка на сервере (backend.search_bookings), в список попадают только подходящие строки.
+    flt_b = ttk.Frame(grp_list_b)
+    flt_b.grid(row=0, column=0, columnspan=2, sticky="w", pady=(0, 5))
+    filter_entries = {}
+    for col, (name, label, width) in enumerate((
+        ("date_from", "Дата с:", 11),
+        ("date_to", "по:", 11),
+        ("time_from", "Время с:", 6),
+        ("time_to", "по:", 6),
+        ("user_id", "Польз.:", 6),
+        ("table_id", "Стол:", 6),
+        ("min_guests", "Гостей от:", 4),
+    )):
+        ttk.Label(flt_b, text=label).grid(row=0, column=2 * col, sticky="w", padx=(0 if col == 0 else 8, 3))
+        filter_entries[name] = ttk.Entry(flt_b, width=width)
+        filter_entries[name].grid(row=0, column=2 * col + 1)
+    # Текущий фильтр; заменяется целиком, рабочие потоки читают его без блокировок.
+    filter_b = {"search": {}}
+
+    # Пользователь и стол приходят в той же строке (get_bookings_detailed), без отдельных запросов.
+    heads_b = {
+        "id": ("ID", 60),
+        "user": ("Пользователь", 140),
+        "email": ("Email", 170),
+        "table": ("Стол", 50),
+        "capacity": ("Мест", 50),
+        "booking_date": ("Дата", 85),
+        "booking_time": ("Время", 65),
+        "duration_minutes": ("Мин", 45),
+        "guests_count": ("Гостей", 55),
+    }
+    tree_b = ttk.Treeview(grp_list_b, columns=tuple(heads_b), show="headings", height=6)
+    for c, (head, width) in heads_b.items():
+        tree_b.heading(c, text=head)
+        tree_b.column(c, width=width)
+    tree_b.grid(row=1, column=0, sticky="nsew")
     sb_b = ttk.Scrollbar(grp_list_b, orient=tk.VERTICAL, command=tree_b.yview)
-    sb_b.grid(row=0, column=1, sticky="ns")
-    tree_b.configure(yscrollcommand=sb_b.set)
+    sb_b.grid(row=1, column=1, sticky="ns")
+    list_b = PagedTree(
+        tree_b, sb_b, runner,
+        lambda after_id, limit: backend.get_bookings_detailed(after_id, limit, **filter_b["search"]),
+        lambda row: (
+            row["id"],
+            f"{row['user_first_name']} {row['user_last_name']}",
+            row["user_email"],
+            row["table_number"],
+            row["table_capacity"],
+            _date_db_to_ru(row.get("booking_date")),
+            str(row["booking_time"]) if row.get("booking_time") else "",
+            row["duration_minutes"],
+            row["guests_count"],
+        ),
+        key="bookings:list", on_error=_show_error, indicator=busy,
+        fetch_rows=lambda ids: backend.get_bookings_detailed(limit=None, booking_ids=ids, **filter_b["search"]),
+    )
+    feed.subscribe("bookings", list_b.apply_changes)
+
+    def refresh_on_update(events):
+        """Переименование пользователя или смена номера стола меняют строки списка — перечитать его."""
+        if any(event.op == changes.UPDATE for event in events):
+            list_b.refresh()
+
+    feed.subscribe("users", refresh_on_update)
+    feed.subscribe("restaurant_tables", refresh_on_update)
 
     def do_list_bookings():
-        for i in tree_b.get_children():
-            tree_b.delete(i)
-        try:
-            for row in backend.get_all_bookings():
-                tree_b.insert("", tk.END, values=(
-                    row["id"], row["user_id"], row["table_id"],
-                    _date_db_to_ru(row.get("booking_date")),
-                    str(row["booking_time"]) if row.get("booking_time") else "",
-                    row["guests_count"],
-                ))
-        except Exception as ex:
-            _show_result(str(ex), is_error=True)
-
-    ttk.Button(grp_list_b, text="Обновить список", command=do_list_bookings).grid(row=1, column=0, pady=(5, 0))
+        list_b.refresh()
+
+    def read_filter():
+        """Фильтр из полей или None (с сообщением), если поле заполнено неверно."""
+        search = {}
+        for name, entry in filter_entries.items():
+            text = entry.get().strip()
+            if not text:
+                continue
+            if name.startswith("date_"):
+                value = _date_ru_to_db(text)
+                error = "Дата в формате ДД-ММ-ГГГГ."
+            elif name.startswith("time_"):
+                value = text if _valid_time(text) else None
+                error = "Время в формате HH:MM."
+            else:
+                value = _safe_int(text)
+                error = "ID и число гостей — целые числа."
+            if value is None:
+                _show_result(error, is_error=True)
+                return None
+            search[name] = value
+        return search
+
+    def do_filter_bookings():
+        search = read_filter()
+        if search is not None:
+            filter_b["search"] = search
+            list_b.reload()
+
+    def do_filter_today():
+        for name, entry in filter_entries.items():
+            entry.delete(0, tk.END)
+        today = datetime.date.today().strftime("%d-%m-%Y")
+        filter_entries["date_from"].insert(0, today)
+        filter_entries["date_to"].insert(0, today)
+        do_filter_bookings()
+
+    def do_filter_reset():
+        for entry in filter_entries.values():
+            entry.delete(0, tk.END)
+        do_filter_bookings()
+
+    btns_b = ttk.Frame(grp_list_b)
+    btns_b.grid(row=2, column=0, sticky="w", pady=(5, 0))
+    ttk.Button(btns_b, text="Обновить список", command=do_list_bookings).pack(side=tk.LEFT, padx=(0, 5))
+    ttk.Button(btns_b, text="Применить фильтр", command=do_filter_bookings).pack(side=tk.LEFT, padx=(0, 5))
+    ttk.Button(btns_b, text="Сегодня", command=do_filter_today).pack(side=tk.LEFT, padx=(0, 5))
+    ttk.Button(btns_b, text="Сбросить", command=do_filter_reset).pack(side=tk.LEFT)
+    grp_list_b.columnconfigure(0, weight=1)
+    grp_list_b.rowconfigure(1, weight=1)
 
     grp_upd_b = ttk.LabelFrame(frame, text="Обновить бронирование", padding=5)
     grp_upd_b.grid(row=3, column=0, sticky="ew", pady=(0, 10))
     ttk.Label(grp_upd_b, text="ID бронирования:").grid(row=0, column=0, sticky="w", padx=(0, 5))
     ent_upd_bid = ttk.Entry(grp_upd_b, width=10)
     ent_upd_bid.grid(row=0, column=1, padx=(0, 10))
-    ttk.Label(grp_upd_b, text="User ID:").grid(row=1, column=0, sticky="w", padx=(0, 5))
-    ent_upd_uid_b = ttk.Entry(grp_upd_b, width=10)
+    ttk.Label(grp_upd_b, text="Пользователь:").grid(row=1, column=0, sticky="w", padx=(0, 5))
+    ent_upd_uid_b = _user_entry(grp_upd_b, runner, feed, "bookings:update:user", row=1)
     ent_upd_uid_b.grid(row=1, column=1, padx=(0, 10))
     ttk.Label(grp_upd_b, text="Table ID:").grid(row=2, column=0, sticky="w", padx=(0, 5))
     ent_upd_tid_b = ttk.Entry(grp_upd_b, width=10)
@@ -502,6 +674,9 @@ def build_bookings_tab(parent):
     ttk.Label(grp_upd_b, text="Гостей:").grid(row=5, column=0, sticky="w", padx=(0, 5))
     ent_upd_guests_b = ttk.Entry(grp_upd_b, width=10)
     ent_upd_guests_b.grid(row=5, column=1, padx=(0, 10))
+    ttk.Label(grp_upd_b, text="Длительность, мин:").grid(row=6, column=0, sticky="w", padx=(0, 5))
+    ent_upd_duration_b = ttk.Entry(grp_upd_b, width=10)
+    ent_upd_duration_b.grid(row=6, column=1, padx=(0, 10))
 
     def do_update_booking():
         bid = _safe_int(ent_upd_bid.get())
@@ -517,18 +692,21 @@ def build_bookings_tab(parent):
             return
         time = ent_upd_time_b.get().strip() or None
         guests = _safe_int(ent_upd_guests_b.get())
-        if not any([uid is not None, tid is not None, date, time, guests is not None]):
+        duration = _safe_int(ent_upd_duration_b.get())
+        if not any([uid is not None, tid is not None, date, time, guests is not None, duration is not None]):
             _show_result("Укажите хотя бы одно поле для обновления.", is_error=True)
             return
-        try:
-            ok = backend.update_booking(bid, user_id=uid, table_id=tid, booking_date=date, booking_time=time, guests_count=guests)
+
+        def done(ok):
             _show_result("Обновлено." if ok else "Запись не найдена или не изменена.")
-            if ok:
-                do_list_bookings()
-        except Exception as ex:
-            _show_result(str(ex), is_error=True)
 
-    ttk.Button(grp_upd_b, text="Обновить", command=do_update_booking).grid(row=6, column=1, pady=(5, 0))
+        runner.submit(
+            backend.update_booking, bid, user_id=uid, table_id=tid, booking_date=date, booking_time=time, guests_count=guests,
+            duration_minutes=duration,
+            on_success=done, on_error=_show_error, indicator=busy,
+        )
+
+    ttk.Button(grp_upd_b, text="Обновить", command=do_update_booking).grid(row=7, column=1, pady=(5, 0))
 
     grp_del_b = ttk.LabelFrame(frame, text="Удалить бронирование", padding=5)
     grp_del_b.grid(row=4, column=0, sticky="ew", pady=(0, 10))
@@ -543,13 +721,11 @@ def build_bookings_tab(parent):
             return
         if not messagebox.askyesno("Подтверждение", "Удалить бронирование?"):
             return
-        try:
-            ok = backend.delete_booking(bid)
+
+        def done(ok):
             _show_result("Удалено." if ok else "Запись не найдена.")
-            if ok:
-                do_list_bookings()
-        except Exception as ex:
-            _show_result(str(ex), is_error=True)
+
+        runner.submit(backend.delete_booking, bid, on_success=done, on_error=_show_error, indicator=busy)
 
     ttk.Button(grp_del_b, text="Удалить", command=do_delete_booking).grid(row=0, column=2, padx=(5, 0))
 
@@ -571,11 +747,39 @@ def main():
     notebook = ttk.Notebook(root)
     notebook.grid(row=0, column=0, sticky="nsew", padx=5, pady=5)
 
-    notebook.add(build_users_tab(notebook), text="Пользователи")
-    notebook.add(build_tables_tab(notebook), text="Столы")
-    notebook.add(build_bookings_tab(notebook), text="Бронирования")
+    runner = TaskRunner(root)
+    feed = ChangeFeed(root, lambda stop: backend.listen_changes(stop=stop))
+    builders: Dict[str, Callable] = {}
+    for build, text in (
+        (build_users_tab, "Пользователи"),
+        (build_tables_tab, "Столы"),
+        (build_bookings_tab, "Бронирования"),
+    ):
+        placeholder = ttk.Frame(notebook)
+        placeholder.columnconfigure(0, weight=1)
+        placeholder.rowconfigure(0, weight=1)
+        notebook.add(placeholder, text=text)
+        builders[str(placeholder)] = build
+
+    def build_selected(_event=None):
+        """Строит содержимое открытой вкладки при первом её открытии."""
+        name = notebook.select()
+        build = builders.pop(name, None)
+        if build is not None:
+            placeholder = notebook.nametowidget(name)
+            build(placeholder, runner, feed).grid(row=0, column=0, sticky="nsew")
+
+    notebook.bind("<<NotebookTabChanged>>", build_selected)
+    root.after_idle(build_selected)
+    # Импорт бэкенда — в рабочем потоке, пока пользователь смотрит на первую вкладку.
+    root.after_idle(lambda: runner.submit(backend.load))
+    root.after_idle(feed.start)
 
-    root.mainloop()
+    try:
+        root.mainloop()
+    finally:
+        feed.stop()
+        runner.shutdown()
 
 
 if __name__ == "__main__":
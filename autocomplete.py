@@ -0,0 +1,155 @@
+"""
+Поле ввода с подсказками из бэкенда (автодополнение).
+Запрос уходит в рабочий поток TaskRunner не на каждое нажатие, а через delay_ms после последнего;
+ответы кэшируются на клиенте, повторный ввод того же текста (например, после Backspace) не идёт в БД.
+"""
+import time
+import tkinter as tk
+from collections import OrderedDict
+from tkinter import ttk
+from typing import Callable, List, Optional
+
+from task_runner import TaskRunner
+
+
+class AutocompleteEntry(ttk.Entry):
+    """
+    search(text) — подсказки для текста (вызывается в рабочем потоке), to_text(row) — строка списка,
+    to_value(row) — текст поля после выбора подсказки; on_select(row) — после выбора (None — поле изменено вручную).
+    Кэш: до cache_size последних запросов, каждый живёт ttl секунд; invalidate() очищает его
+    (например, по ленте изменений таблицы).
+    """
+
+    def __init__(
+        self,
+        parent,
+        runner: TaskRunner,
+        search: Callable[[str], List],
+        to_text: Callable[[object], str],
+        to_value: Callable[[object], str],
+        key: str,
+        on_select: Optional[Callable[[Optional[object]], None]] = None,
+        delay_ms: int = 200,
+        cache_size: int = 64,
+        ttl: float = 30.0,
+        **kwargs,
+    ):
+        super().__init__(parent, **kwargs)
+        self.runner = runner
+        self.search = search
+        self.to_text = to_text
+        self.to_value = to_value
+        self.key = key
+        self.on_select = on_select
+        self.delay_ms = delay_ms
+        self.cache_size = cache_size
+        self.ttl = ttl
+        self._cache: "OrderedDict[str, tuple]" = OrderedDict()
+        self._after_id: Optional[str] = None
+        self._rows: List = []
+        self._popup: Optional[tk.Toplevel] = None
+        self._listbox: Optional[tk.Listbox] = None
+        self.bind("<KeyRelease>", self._on_key)
+        self.bind("<Down>", self._focus_list)
+        self.bind("<Escape>", lambda _event: self._hide())
+        self.bind("<FocusOut>", lambda _event: self.after(150, self._hide_unless_focused))
+
+    def invalidate(self, _events=None) -> None:
+        """Сбрасывает кэш подсказок (подходит как подписчик ChangeFeed)."""
+        self._cache.clear()
+
+    def set_value(self, text: str) -> None:
+        """Записывает text в поле без запроса подсказок."""
+        self.delete(0, tk.END)
+        self.insert(0, text)
+        self._hide()
+
+    def clear(self) -> None:
+        """Очищает поле (и выбор — on_select(None))."""
+        self.set_value("")
+        if self.on_select is not None:
+            self.on_select(None)
+
+    def _on_key(self, event) -> None:
+        if event.keysym in ("Down", "Up", "Escape", "Return", "Tab"):
+            return
+        if self.on_select is not None:
+            self.on_select(None)
+        if self._after_id is not None:
+            self.after_cancel(self._after_id)
+        self._after_id = self.after(self.delay_ms, self._lookup)
+
+    def _lookup(self) -> None:
+        self._after_id = None
+        text = " ".join(self.get().lower().split())
+        if not text:
+            self._hide()
+            return
+        cached = self._cache.get(text)
+        if cached is not None and time.monotonic() - cached[0] < self.ttl:
+            self._cache.move_to_end(text)
+            self._show(cached[1])
+            return
+        self.runner.submit(
+            self.search, text, key=self.key,
+            on_success=lambda rows: self._loaded(text, rows), on_error=lambda _ex: self._hide(),
+        )
+
+    def _loaded(self, text: str, rows: List) -> None:
+        self._cache[text] = (time.monotonic(), rows)
+        self._cache.move_to_end(text)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        # Ответ на уже изменённый текст не показывается, но остаётся в кэше.
+        if " ".join(self.get().lower().split()) == text:
+            self._show(rows)
+
+    def _show(self, rows: List) -> None:
+        self._rows = rows
+        if not rows:
+            self._hide()
+            return
+        if self._popup is None:
+            self._popup = tk.Toplevel(self)
+            self._popup.overrideredirect(True)
+            self._listbox = tk.Listbox(self._popup, activestyle="dotbox", exportselection=False)
+            self._listbox.pack(fill=tk.BOTH, expand=True)
+            self._listbox.bind("<ButtonRelease-1>", self._choose)
+            self._listbox.bind("<Return>", self._choose)
+            self._listbox.bind("<Escape>", lambda _event: (self._hide(), self.focus_set()))
+            self._listbox.bind("<FocusOut>", lambda _event: self.after(150, self._hide_unless_focused))
+        self._listbox.delete(0, tk.END)
+        for row in rows:
+            self._listbox.insert(tk.END, self.to_text(row))
+        self._listbox.configure(height=min(len(rows), 10), width=max(len(self.to_text(row)) for row in rows))
+        self._popup.geometry(f"+{self.winfo_rootx()}+{self.winfo_rooty() + self.winfo_height()}")
+        self._popup.deiconify()
+        self._popup.lift()
+
+    def _focus_list(self, _event=None):
+        if self._popup is not None and self._popup.winfo_viewable():
+            self._listbox.focus_set()
+            self._listbox.selection_clear(0, tk.END)
+            self._listbox.selection_set(0)
+            self._listbox.activate(0)
+        return "break"
+
+    def _choose(self, _event=None) -> None:
+        selection = self._listbox.curselection()
+        if not selection:
+            return
+        row = self._rows[selection[0]]
+        self.set_value(self.to_value(row))
+        self.focus_set()
+        self.icursor(tk.END)
+        if self.on_select is not None:
+            self.on_select(row)
+
+    def _hide_unless_focused(self) -> None:
+        focused = self.focus_get()
+        if focused is not self and focused is not self._listbox:
+            self._hide()
+
+    def _hide(self) -> None:
+        if self._popup is not None:
+            self._popup.withdraw()
@@ -1,11 +1,47 @@
 """
 Бэкенд мини-системы бронирования.
 """
-from typing import Optional, List
-from postgres_driver import PostgresSQLDriver
-from models import User, RestaurantTable, Booking
+import dataclasses
+import threading
+from datetime import date, time, timedelta
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, Mapping, Optional, List, Sequence, Tuple
+import psycopg
+from psycopg.rows import dict_row, no_result, tuple_row
+from postgres_driver import get_driver
+from models import User, RestaurantTable, Booking, OccupancyReport, CHANGES_CHANNEL, ChangeEvent
+from models.changes import RESET
+from models.booking import DEFAULT_DURATION_MINUTES
+import queries
+from occupancy_cache import OccupancyCache, SlotTables, slot_key
 
 DB_NAME = "booking"
+# Форматы строк листингов (row_format): словари, экземпляры моделей (dataclass со __slots__), кортежи.
+ROW_FORMATS = ("dict", "model", "tuple")
+# Размер страницы по умолчанию и размер пачки серверного курсора при потоковом чтении.
+PAGE_SIZE = 100
+ITER_BATCH_SIZE = 1000
+
+# Кэш занятости слотов (configure_occupancy_cache); по умолчанию выключен.
+_occupancy_cache: Optional[OccupancyCache] = None
+# Подготовленные операторы для queries.PREPARED_QUERIES; False — все запросы без подготовки
+# (для сравнения задержек в benchmarks.bench_prepared).
+PREPARED_STATEMENTS = True
+
+
+def _prepare(sql: str) -> Optional[bool]:
+    """
+    Значение prepare для cursor.execute: True — запрос из реестра queries.PREPARED_QUERIES,
+    готовится на подключении при первом выполнении и дальше переиспользуется;
+    None — по умолчанию psycopg (подготовка после нескольких выполнений); False — без подготовки.
+    """
+    if not PREPARED_STATEMENTS:
+        return False
+    return True if sql in queries.PREPARED_QUERIES else None
+
+
+def execute(cur, sql: str, params=None):
+    """cur.execute с подготовкой оператора по реестру (_prepare); общий и для модулей поверх бэкенда (reports.py)."""
+    return cur.execute(sql, params, prepare=_prepare(sql))
 
 
 def _row_to_dict(cursor) -> List[dict]:
@@ -23,15 +59,85 @@ def _one_row_to_dict(cursor) -> Optional[dict]:
     return dict(zip(columns, row))
 
 
+def _model_row(model: type) -> Callable:
+    """
+    Фабрика строк psycopg для экземпляров модели. Имена колонок сопоставляются с полями
+    один раз на запрос; если колонки идут в порядке полей, экземпляр создаётся позиционно,
+    без промежуточного словаря.
+    """
+    fields = [f.name for f in dataclasses.fields(model)]
+
+    def factory(cursor):
+        if cursor.description is None:
+            return no_result
+        names = [d.name for d in cursor.description]
+        if names == fields[:len(names)]:
+            return lambda values: model(*values)
+        return lambda values: model(**dict(zip(names, values)))
+
+    return factory
+
+
+def _row_factory(row_format: str, model: type) -> Callable:
+    """Фабрика строк для row_format: "dict" — словари, "model" — экземпляры model, "tuple" — кортежи."""
+    if row_format == "dict":
+        return dict_row
+    if row_format == "model":
+        return _model_row(model)
+    if row_format == "tuple":
+        return tuple_row
+    raise ValueError(f"row_format: ожидается одно из {', '.join(ROW_FORMATS)}, получено {row_format!r}.")
+
+
+def _fetch_all(sql: str, label: str, row_factory: Callable = dict_row, params=None, primary: bool = False) -> list:
+    """Все строки запроса (с параметрами params) в формате row_factory; primary=True — не с реплики."""
+    with get_driver(DB_NAME) as db:
+        connect = db.get_connection if primary else db.get_read_connection
+        with connect(label=label) as conn:
+            with conn.cursor(row_factory=row_factory) as cur:
+                execute(cur, sql, params)
+                return cur.fetchall()
+
+
+def _fetch_page(sql: str, after_id: int, limit: int, label: str, row_factory: Callable = dict_row) -> list:
+    """Keyset-пагинация: строки с id > after_id, не более limit штук, по возрастанию id."""
+    with get_driver(DB_NAME) as db:
+        with db.get_read_connection(label=label) as conn:
+            with conn.cursor(row_factory=row_factory) as cur:
+                execute(cur, sql, (after_id, limit))
+                return cur.fetchall()
+
+
+def _iter_rows(sql: str, cursor_name: str, batch_size: int, row_factory: Callable = dict_row) -> Iterator:
+    """
+    Потоково читает результат запроса через именованный (серверный) курсор
+    пачками по batch_size строк — память не растёт с размером таблицы.
+    Подключение занято, пока генератор не исчерпан или не закрыт.
+    """
+    with get_driver(DB_NAME) as db:
+        with db.get_read_connection(label=cursor_name) as conn:
+            with conn.cursor(name=cursor_name, row_factory=row_factory) as cur:
+                cur.itersize = batch_size
+                cur.execute(sql)
+                yield from cur
+
+
 # --- create_tables ---
 
 
-def create_tables() -> None:
-    """Создаёт все таблицы по моделям (User, RestaurantTable, Booking)."""
-    with PostgresSQLDriver(db_name=DB_NAME) as db:
-        db.create_table_from_model(User)
-        db.create_table_from_model(RestaurantTable)
-        db.create_table_from_model(Booking)
+def create_tables(concurrently: bool = False) -> None:
+    """Создаёт все таблицы по моделям (User, RestaurantTable, Booking, OccupancyReport), доводит схему
+    существующих таблиц до текущей версии и создаёт вторичные индексы.
+    concurrently=True — индексы строятся без блокировки записи (для рабочей базы).
+    """
+    with get_driver(DB_NAME) as db:
+        for model in (User, RestaurantTable, Booking, OccupancyReport):
+            db.create_table_from_model(model)
+            db.migrate_from_model(model)
+        for model in (User, RestaurantTable, Booking, OccupancyReport):
+            db.create_functions_from_model(model)
+        for model in (User, RestaurantTable, Booking, OccupancyReport):
+            db.create_indexes_from_model(model, concurrently=concurrently)
 
 
 # --- Users CRUD ---
@@ -39,33 +145,63 @@ def create_tables() -> None:
 
 def create_user(email: str, first_name: str, last_name: str) -> Optional[int]:
     """Создаёт пользователя. Возвращает id или None."""
-    with PostgresSQLDriver(db_name=DB_NAME) as db:
+    with get_driver(DB_NAME) as db:
         with db.get_connection() as conn:
             with conn.cursor() as cur:
-                cur.execute(
-                    "INSERT INTO users (email, first_name, last_name) VALUES (%s, %s, %s) RETURNING id",
-                    (email, first_name, last_name),
-                )
+                execute(cur, queries.INSERT_USER, queries.user_values(email, first_name, last_name))
                 row = cur.fetchone()
                 return row[0] if row else None
 
 
 def get_user(user_id: int) -> Optional[dict]:
     """Возвращает пользователя по id или None."""
-    with PostgresSQLDriver(db_name=DB_NAME) as db:
-        with db.get_connection() as conn:
+    with get_driver(DB_NAME) as db:
+        with db.get_read_connection() as conn:
             with conn.cursor() as cur:
-                cur.execute("SELECT id, email, first_name, last_name FROM users WHERE id = %s", (user_id,))
+                execute(cur, queries.SELECT_USER, (user_id,))
                 return _one_row_to_dict(cur)
 
 
-def get_all_users() -> List[dict]:
-    """Возвращает всех пользователей."""
-    with PostgresSQLDriver(db_name=DB_NAME) as db:
-        with db.get_connection() as conn:
-            with conn.cursor() as cur:
-                cur.execute("SELECT id, email, first_name, last_name FROM users ORDER BY id")
-                return _row_to_dict(cur)
+def get_all_users(row_format: str = "dict") -> list:
+    """Возвращает всех пользователей (row_format — см. ROW_FORMATS: словари, User или кортежи)."""
+    return _fetch_all(queries.SELECT_ALL_USERS, "get_all_users", _row_factory(row_format, User))
+
+
+def get_users_page(after_id: int = 0, limit: int = PAGE_SIZE, row_format: str = "dict") -> list:
+    """Возвращает страницу пользователей с id > after_id (не более limit) в формате row_format."""
+    return _fetch_page(
+        queries.SELECT_USERS_PAGE, after_id, limit, "get_users_page", _row_factory(row_format, User)
+    )
+
+
+def iter_users(batch_size: int = ITER_BATCH_SIZE, row_format: str = "dict") -> Iterator:
+    """Потоково перебирает всех пользователей (серверный курсор) в формате row_format."""
+    return _iter_rows(queries.SELECT_ALL_USERS, "iter_users", batch_size, _row_factory(row_format, User))
+
+
+def get_users_by_ids(user_ids: Iterable[int], row_format: str = "dict") -> list:
+    """Возвращает пользователей с id из user_ids по возрастанию id (несуществующих id в результате нет).
+    Читает с основного сервера: вызывается по уведомлениям об изменениях (listen_changes),
+    которые реплика могла ещё не воспроизвести.
+    """
+    return _fetch_all(
+        queries.SELECT_USERS_BY_IDS, "get_users_by_ids", _row_factory(row_format, User), (list(user_ids),),
+        primary=True,
+    )
+
+
+def search_users(text: str, limit: int = 10, row_format: str = "dict") -> list:
+    """
+    Поиск пользователей для автодополнения: каждое слово text (без учёта регистра, в любом порядке) —
+    начало email, имени или фамилии; одно число — ещё и id пользователя. Сначала совпадение по id
+    и точное совпадение email, затем по фамилии и имени; не больше limit строк. Пустой text — пустой список.
+    """
+    if limit <= 0:
+        raise ValueError("limit должен быть > 0.")
+    params = queries.build_search_users(text, limit)
+    if params is None:
+        return []
+    return _fetch_all(queries.SEARCH_USERS, "search_users", _row_factory(row_format, User), params)
 
 
 def update_user(
@@ -75,37 +211,43 @@ def update_user(
     last_name: Optional[str] = None,
 ) -> bool:
     """Обновляет пользователя. Возвращает True, если обновлена хотя бы одна строка."""
-    updates = []
-    args = []
-    if email is not None:
-        updates.append("email = %s")
-        args.append(email)
-    if first_name is not None:
-        updates.append("first_name = %s")
-        args.append(first_name)
-    if last_name is not None:
-        updates.append("last_name = %s")
-        args.append(last_name)
-    if not updates:
+    update = queries.build_update("users", user_id, queries.user_values(email, first_name, last_name))
+    if update is None:
         return False
-    args.append(user_id)
-    with PostgresSQLDriver(db_name=DB_NAME) as db:
+    sql, args = update
+    with get_driver(DB_NAME) as db:
         with db.get_connection() as conn:
             with conn.cursor() as cur:
-                cur.execute(
-                    f"UPDATE users SET {', '.join(updates)} WHERE id = %s",
-                    tuple(args),
-                )
+                execute(cur, sql, tuple(args))
                 return cur.rowcount > 0
 
 
 def delete_user(user_id: int) -> bool:
     """Удаляет пользователя. Возвращает True, если строка удалена."""
-    with PostgresSQLDriver(db_name=DB_NAME) as db:
+    with get_driver(DB_NAME) as db:
         with db.get_connection() as conn:
             with conn.cursor() as cur:
-                cur.execute("DELETE FROM users WHERE id = %s", (user_id,))
-                return cur.rowcount > 0
+                execute(cur, queries.DELETE_USER, (user_id,))
+                deleted = cur.rowcount > 0
+    if deleted:
+        # Бронирования пользователя удалены каскадом.
+        _cache_clear()
+    return deleted
+
+
+def delete_users(user_ids: Iterable[int]) -> int:
+    """Удаляет пользователей одним запросом. Возвращает число удалённых."""
+    ids = list(user_ids)
+    if not ids:
+        return 0
+    with get_driver(DB_NAME) as db:
+        with db.get_connection() as conn:
+            with conn.cursor() as cur:
+                execute(cur, queries.DELETE_USERS, (ids,))
+                deleted = cur.rowcount
+    if deleted:
+        _cache_clear()
+    return deleted
 
 
 # --- Tables (restaurant_tables) CRUD ---
@@ -113,36 +255,49 @@ def delete_user(user_id: int) -> bool:
 
 def create_table(table_number: int, capacity: int) -> Optional[int]:
     """Создаёт стол в ресторане. Возвращает id или None."""
-    with PostgresSQLDriver(db_name=DB_NAME) as db:
+    with get_driver(DB_NAME) as db:
         with db.get_connection() as conn:
             with conn.cursor() as cur:
-                cur.execute(
-                    "INSERT INTO restaurant_tables (table_number, capacity) VALUES (%s, %s) RETURNING id",
-                    (table_number, capacity),
-                )
+                execute(cur, queries.INSERT_TABLE, (table_number, capacity))
                 row = cur.fetchone()
-                return row[0] if row else None
+    _cache_clear()
+    return row[0] if row else None
 
 
 def get_table(table_id: int) -> Optional[dict]:
     """Возвращает стол по id или None."""
-    with PostgresSQLDriver(db_name=DB_NAME) as db:
-        with db.get_connection() as conn:
+    with get_driver(DB_NAME) as db:
+        with db.get_read_connection() as conn:
             with conn.cursor() as cur:
-                cur.execute(
-                    "SELECT id, table_number, capacity FROM restaurant_tables WHERE id = %s",
-                    (table_id,),
-                )
+                execute(cur, queries.SELECT_TABLE, (table_id,))
                 return _one_row_to_dict(cur)
 
 
-def get_all_tables() -> List[dict]:
-    """Возвращает все столы."""
-    with PostgresSQLDriver(db_name=DB_NAME) as db:
-        with db.get_connection() as conn:
-            with conn.cursor() as cur:
-                cur.execute("SELECT id, table_number, capacity FROM restaurant_tables ORDER BY id")
-                return _row_to_dict(cur)
+def get_all_tables(row_format: str = "dict") -> list:
+    """Возвращает все столы (row_format — см. ROW_FORMATS: словари, RestaurantTable или кортежи)."""
+    return _fetch_all(queries.SELECT_ALL_TABLES, "get_all_tables", _row_factory(row_format, RestaurantTable))
+
+
+def get_tables_page(after_id: int = 0, limit: int = PAGE_SIZE, row_format: str = "dict") -> list:
+    """Возвращает страницу столов с id > after_id (не более limit) в формате row_format."""
+    return _fetch_page(
+        queries.SELECT_TABLES_PAGE, after_id, limit, "get_tables_page", _row_factory(row_format, RestaurantTable)
+    )
+
+
+def iter_tables(batch_size: int = ITER_BATCH_SIZE, row_format: str = "dict") -> Iterator:
+    """Потоково перебирает все столы (серверный курсор) в формате row_format."""
+    return _iter_rows(queries.SELECT_ALL_TABLES, "iter_tables", batch_size, _row_factory(row_format, RestaurantTable))
+
+
+def get_tables_by_ids(table_ids: Iterable[int], row_format: str = "dict") -> list:
+    """Возвращает столы с id из table_ids по возрастанию id (несуществующих id в результате нет).
+    Читает с основного сервера (см. get_users_by_ids).
+    """
+    return _fetch_all(
+        queries.SELECT_TABLES_BY_IDS, "get_tables_by_ids", _row_factory(row_format, RestaurantTable), (list(table_ids),),
+        primary=True,
+    )
 
 
 def update_table(
@@ -151,34 +306,48 @@ def update_table(
     capacity: Optional[int] = None,
 ) -> bool:
     """Обновляет стол. Возвращает True, если обновлена хотя бы одна строка."""
-    updates = []
-    args = []
-    if table_number is not None:
-        updates.append("table_number = %s")
-        args.append(table_number)
-    if capacity is not None:
-        updates.append("capacity = %s")
-        args.append(capacity)
-    if not updates:
+    update = queries.build_update(
+        "restaurant_tables", table_id, {"table_number": table_number, "capacity": capacity}
+    )
+    if update is None:
         return False
-    args.append(table_id)
-    with PostgresSQLDriver(db_name=DB_NAME) as db:
+    sql, args = update
+    with get_driver(DB_NAME) as db:
         with db.get_connection() as conn:
             with conn.cursor() as cur:
-                cur.execute(
-                    f"UPDATE restaurant_tables SET {', '.join(updates)} WHERE id = %s",
-                    tuple(args),
-                )
-                return cur.rowcount > 0
+                execute(cur, sql, tuple(args))
+                updated = cur.rowcount > 0
+    if updated:
+        _cache_clear()
+    return updated
 
 
 def delete_table(table_id: int) -> bool:
     """Удаляет стол. Возвращает True, если строка удалена."""
-    with PostgresSQLDriver(db_name=DB_NAME) as db:
+    with get_driver(DB_NAME) as db:
         with db.get_connection() as conn:
             with conn.cursor() as cur:
-                cur.execute("DELETE FROM restaurant_tables WHERE id = %s", (table_id,))
-                return cur.rowcount > 0
+                execute(cur, queries.DELETE_TABLE, (table_id,))
+                deleted = cur.rowcount > 0
+    if deleted and _occupancy_cache is not None:
+        _occupancy_cache.drop_table(table_id)
+    return deleted
+
+
+def delete_tables(table_ids: Iterable[int]) -> int:
+    """Удаляет столы одним запросом (бронирования — каскадом). Возвращает число удалённых."""
+    ids = list(table_ids)
+    if not ids:
+        return 0
+    with get_driver(DB_NAME) as db:
+        with db.get_connection() as conn:
+            with conn.cursor() as cur:
+                execute(cur, queries.DELETE_TABLES, (ids,))
+                deleted = [row[0] for row in cur.fetchall()]
+    if _occupancy_cache is not None:
+        for table_id in deleted:
+            _occupancy_cache.drop_table(table_id)
+    return len(deleted)
 
 
 # --- Bookings CRUD ---
@@ -188,39 +357,47 @@ class BookingCapacityError(Exception):
     """Исключение: превышена вместимость стола на выбранные дату/время."""
 
 
-def _check_table_capacity(cur, table_id: int, booking_date: str, booking_time: str, guests_count: int, exclude_booking_id: Optional[int] = None) -> None:
+def _capacity_message(capacity: int, total: int, guests_count: int) -> str:
+    """Текст ошибки о нехватке мест за столом."""
+    return (
+        f"На это время стол уже забронирован: занято мест {total} из {capacity}. "
+        f"Нельзя добавить ещё {guests_count} гостей."
+    )
+
+
+def _booking_error(ex: psycopg.Error) -> Optional[BookingCapacityError]:
+    """Преобразует ошибку серверных функций бронирования (SQLSTATE BK001/BK002) в BookingCapacityError."""
+    if ex.sqlstate == "BK001":
+        return BookingCapacityError("Стол с таким ID не найден.")
+    if ex.sqlstate == "BK002":
+        capacity, total, guests_count = (int(v) for v in ex.diag.message_detail.split())
+        return BookingCapacityError(_capacity_message(capacity, total, guests_count))
+    return None
+
+
+def _check_table_capacity(
+    cur,
+    table_id: int,
+    booking_date: str,
+    booking_time: str,
+    guests_count: int,
+    exclude_booking_id: Optional[int] = None,
+    duration_minutes: Optional[int] = None,
+) -> None:
     """
-    Проверяет, что добавление guests_count гостей на стол table_id в дату/время
-    не превысит вместимость стола. Иначе выбрасывает BookingCapacityError.
-    exclude_booking_id — при обновлении бронирования не учитывать это бронирование в сумме.
+    Проверяет, что добавление guests_count гостей на стол table_id на период с даты/времени
+    длительностью duration_minutes (None — по умолчанию) не превысит вместимость стола
+    ни в один момент периода. Иначе выбрасывает BookingCapacityError.
+    exclude_booking_id — при обновлении бронирования не учитывать это бронирование.
+    Стол на даты периода блокируется до конца транзакции cur, так что последующая запись безопасна.
     """
-    cur.execute(
-        "SELECT capacity FROM restaurant_tables WHERE id = %s",
-        (table_id,),
-    )
-    row = cur.fetchone()
-    if not row:
-        raise BookingCapacityError("Стол с таким ID не найден.")
-    capacity = row[0]
-
-    if exclude_booking_id is not None:
-        cur.execute(
-            """SELECT COALESCE(SUM(guests_count), 0) FROM bookings
-               WHERE table_id = %s AND booking_date = %s AND booking_time = %s AND id != %s""",
-            (table_id, booking_date, booking_time, exclude_booking_id),
-        )
-    else:
-        cur.execute(
-            """SELECT COALESCE(SUM(guests_count), 0) FROM bookings
-               WHERE table_id = %s AND booking_date = %s AND booking_time = %s""",
-            (table_id, booking_date, booking_time),
-        )
-    total = cur.fetchone()[0]
-    if total + guests_count > capacity:
-        raise BookingCapacityError(
-            f"На это время стол уже забронирован: занято мест {total} из {capacity}. "
-            f"Нельзя добавить ещё {guests_count} гостей."
+    try:
+        execute(
+            cur, queries.CHECK_TABLE_CAPACITY,
+            (table_id, booking_date, booking_time, guests_count, exclude_booking_id, duration_minutes),
         )
+    except psycopg.Error as ex:
+        raise _booking_error(ex) or ex
 
 
 def create_booking(
@@ -229,44 +406,126 @@ def create_booking(
     booking_date: str,
     booking_time: str,
     guests_count: int,
+    duration_minutes: Optional[int] = None,
 ) -> Optional[int]:
-    """Создаёт бронирование. Возвращает id или None. При превышении вместимости стола — BookingCapacityError."""
-    with PostgresSQLDriver(db_name=DB_NAME) as db:
+    """Создаёт бронирование. Возвращает id или None. При превышении вместимости стола — BookingCapacityError.
+    duration_minutes — длительность (None — DEFAULT_DURATION_MINUTES); вместимость проверяется
+    по всем бронированиям стола, пересекающимся по времени.
+    Проверка и вставка — один запрос (booking_create), запись сериализуется на сервере.
+    """
+    with get_driver(DB_NAME) as db:
         with db.get_connection() as conn:
             with conn.cursor() as cur:
-                _check_table_capacity(cur, table_id, booking_date, booking_time, guests_count)
-                cur.execute(
-                    """INSERT INTO bookings (user_id, table_id, booking_date, booking_time, guests_count)
-                       VALUES (%s, %s, %s, %s, %s) RETURNING id""",
-                    (user_id, table_id, booking_date, booking_time, guests_count),
-                )
+                try:
+                    execute(
+                        cur, queries.CREATE_BOOKING,
+                        (user_id, table_id, booking_date, booking_time, guests_count, duration_minutes),
+                    )
+                except psycopg.Error as ex:
+                    raise _booking_error(ex) or ex
                 row = cur.fetchone()
-                return row[0] if row else None
+    _cache_invalidate_dates(booking_date)
+    return row[0] if row else None
 
 
 def get_booking(booking_id: int) -> Optional[dict]:
     """Возвращает бронирование по id или None."""
-    with PostgresSQLDriver(db_name=DB_NAME) as db:
-        with db.get_connection() as conn:
+    with get_driver(DB_NAME) as db:
+        with db.get_read_connection() as conn:
             with conn.cursor() as cur:
-                cur.execute(
-                    """SELECT id, user_id, table_id, booking_date, booking_time, guests_count, created_at
-                       FROM bookings WHERE id = %s""",
-                    (booking_id,),
-                )
+                execute(cur, queries.SELECT_BOOKING, (booking_id,))
                 return _one_row_to_dict(cur)
 
 
-def get_all_bookings() -> List[dict]:
-    """Возвращает все бронирования."""
-    with PostgresSQLDriver(db_name=DB_NAME) as db:
-        with db.get_connection() as conn:
-            with conn.cursor() as cur:
-                cur.execute(
-                    """SELECT id, user_id, table_id, booking_date, booking_time, guests_count, created_at
-                       FROM bookings ORDER BY id"""
-                )
-                return _row_to_dict(cur)
+def get_all_bookings(row_format: str = "dict") -> list:
+    """Возвращает все бронирования (row_format — см. ROW_FORMATS: словари, Booking или кортежи)."""
+    return _fetch_all(queries.SELECT_ALL_BOOKINGS, "get_all_bookings", _row_factory(row_format, Booking))
+
+
+def get_bookings_page(after_id: int = 0, limit: int = PAGE_SIZE, row_format: str = "dict") -> list:
+    """Возвращает страницу бронирований с id > after_id (не более limit) в формате row_format."""
+    return _fetch_page(
+        queries.SELECT_BOOKINGS_PAGE, after_id, limit, "get_bookings_page", _row_factory(row_format, Booking)
+    )
+
+
+def iter_bookings(batch_size: int = ITER_BATCH_SIZE, row_format: str = "dict") -> Iterator:
+    """Потоково перебирает все бронирования (серверный курсор) в формате row_format."""
+    return _iter_rows(queries.SELECT_ALL_BOOKINGS, "iter_bookings", batch_size, _row_factory(row_format, Booking))
+
+
+def get_bookings_by_ids(booking_ids: Iterable[int], row_format: str = "dict") -> list:
+    """Возвращает бронирования с id из booking_ids по возрастанию id (несуществующих id в результате нет).
+    Читает с основного сервера (см. get_users_by_ids).
+    """
+    return _fetch_all(
+        queries.SELECT_BOOKINGS_BY_IDS, "get_bookings_by_ids", _row_factory(row_format, Booking), (list(booking_ids),),
+        primary=True,
+    )
+
+
+def search_bookings(
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    time_from: Optional[str] = None,
+    time_to: Optional[str] = None,
+    user_id: Optional[int] = None,
+    table_id: Optional[int] = None,
+    min_guests: Optional[int] = None,
+    booking_ids: Optional[Iterable[int]] = None,
+    after_id: Optional[int] = None,
+    order_by: str = "date",
+    limit: Optional[int] = PAGE_SIZE,
+    row_format: str = "dict",
+    detailed: bool = False,
+) -> list:
+    """
+    Поиск бронирований с фильтрацией на сервере; None — фильтр не задан.
+    date_from..date_to — даты (YYYY-MM-DD), time_from..time_to — время начала (HH:MM), обе границы включительно;
+    user_id, table_id — пользователь и стол; min_guests — не меньше гостей; booking_ids — только эти id
+    (так GUI перечитывает строки из ленты изменений — такой запрос идёт на основной сервер);
+    after_id — id больше него (keyset-страницы при order_by="id").
+    order_by: "date" / "-date" — по дате и времени (по возрастанию / убыванию), "id" / "-id".
+    limit — не больше строк (None — без ограничения). row_format — см. ROW_FORMATS.
+    detailed=True — с пользователем (user_email, user_first_name, user_last_name) и столом
+    (table_number, table_capacity) в том же запросе; row_format тогда "dict" или "tuple".
+    """
+    if order_by not in queries.SEARCH_BOOKINGS_ORDER:
+        raise ValueError(f"order_by: ожидается одно из {', '.join(queries.SEARCH_BOOKINGS_ORDER)}, получено {order_by!r}.")
+    if limit is not None and limit <= 0:
+        raise ValueError("limit должен быть > 0.")
+    if detailed and row_format == "model":
+        raise ValueError("row_format=\"model\" недоступен для detailed=True: в строках есть поля пользователя и стола.")
+    sql, args = queries.build_search_bookings(
+        {
+            "date_from": date_from,
+            "date_to": date_to,
+            "time_from": time_from,
+            "time_to": time_to,
+            "user_id": user_id,
+            "table_id": table_id,
+            "min_guests": min_guests,
+            "booking_ids": list(booking_ids) if booking_ids is not None else None,
+            "after_id": after_id,
+        },
+        order_by,
+        limit,
+        detailed,
+    )
+    return _fetch_all(
+        sql, "search_bookings", _row_factory(row_format, Booking), args, primary=booking_ids is not None
+    )
+
+
+def get_bookings_detailed(after_id: int = 0, limit: Optional[int] = PAGE_SIZE, row_format: str = "dict", **filters) -> list:
+    """
+    Страница бронирований с id > after_id (не более limit, по возрастанию id) вместе с email и именем
+    пользователя, номером и вместимостью стола — одним запросом, без get_user / get_table на строку.
+    filters — фильтры search_bookings (date_from, user_id, booking_ids, ...).
+    """
+    return search_bookings(
+        **filters, after_id=after_id, order_by="id", limit=limit, row_format=row_format, detailed=True
+    )
 
 
 def update_booking(
@@ -276,57 +535,404 @@ def update_booking(
     booking_date: Optional[str] = None,
     booking_time: Optional[str] = None,
     guests_count: Optional[int] = None,
+    duration_minutes: Optional[int] = None,
 ) -> bool:
-    """Обновляет бронирование. Возвращает True, если обновлена хотя бы одна строка. При превышении вместимости — BookingCapacityError."""
-    updates = []
-    args = []
-    if user_id is not None:
-        updates.append("user_id = %s")
-        args.append(user_id)
-    if table_id is not None:
-        updates.append("table_id = %s")
-        args.append(table_id)
-    if booking_date is not None:
-        updates.append("booking_date = %s")
-        args.append(booking_date)
-    if booking_time is not None:
-        updates.append("booking_time = %s")
-        args.append(booking_time)
-    if guests_count is not None:
-        updates.append("guests_count = %s")
-        args.append(guests_count)
-    if not updates:
+    """Обновляет бронирование. Возвращает True, если обновлена хотя бы одна строка. При превышении вместимости — BookingCapacityError.
+    Чтение, проверка и обновление — один запрос (booking_update) с блокировкой строки, стола и дат периода.
+    """
+    if all(v is None for v in (user_id, table_id, booking_date, booking_time, guests_count, duration_minutes)):
         return False
-    args.append(booking_id)
-    with PostgresSQLDriver(db_name=DB_NAME) as db:
+    with get_driver(DB_NAME) as db:
         with db.get_connection() as conn:
             with conn.cursor() as cur:
-                cur.execute(
-                    "SELECT table_id, booking_date, booking_time, guests_count FROM bookings WHERE id = %s",
-                    (booking_id,),
-                )
-                row = cur.fetchone()
-                if not row:
-                    return False
-                eff_table = table_id if table_id is not None else row[0]
-                eff_date = booking_date if booking_date is not None else str(row[1])
-                eff_time = booking_time if booking_time is not None else str(row[2])
-                eff_guests = guests_count if guests_count is not None else row[3]
-                _check_table_capacity(cur, eff_table, eff_date, eff_time, eff_guests, exclude_booking_id=booking_id)
-                cur.execute(
-                    f"UPDATE bookings SET {', '.join(updates)} WHERE id = %s",
-                    tuple(args),
-                )
-                return cur.rowcount > 0
+                try:
+                    execute(
+                        cur, queries.UPDATE_BOOKING,
+                        {
+                            "id": booking_id,
+                            "user_id": user_id,
+                            "table_id": table_id,
+                            "date": booking_date,
+                            "time": booking_time,
+                            "guests": guests_count,
+                            "duration": duration_minutes,
+                        },
+                    )
+                except psycopg.Error as ex:
+                    raise _booking_error(ex) or ex
+                updated, old_date = cur.fetchone()
+    if updated:
+        _cache_invalidate_dates(old_date, booking_date)
+    return bool(updated)
 
 
 def delete_booking(booking_id: int) -> bool:
     """Удаляет бронирование. Возвращает True, если строка удалена."""
-    with PostgresSQLDriver(db_name=DB_NAME) as db:
+    with get_driver(DB_NAME) as db:
         with db.get_connection() as conn:
             with conn.cursor() as cur:
-                cur.execute("DELETE FROM bookings WHERE id = %s", (booking_id,))
-                return cur.rowcount > 0
+                execute(cur, queries.DELETE_BOOKING, (booking_id,))
+                row = cur.fetchone()
+    if row:
+        _cache_invalidate_dates(row[0])
+    return row is not None
+
+
+def delete_bookings(booking_ids: Iterable[int]) -> int:
+    """Удаляет бронирования одним запросом (например, отмена всей компании). Возвращает число удалённых."""
+    ids = list(booking_ids)
+    if not ids:
+        return 0
+    with get_driver(DB_NAME) as db:
+        with db.get_connection() as conn:
+            with conn.cursor() as cur:
+                execute(cur, queries.DELETE_BOOKINGS, (ids,))
+                rows = cur.fetchall()
+    _cache_invalidate_dates(*{row[0] for row in rows})
+    return len(rows)
+
+
+BOOKING_UPDATE_FIELDS = ("user_id", "table_id", "booking_date", "booking_time", "guests_count", "duration_minutes")
+
+
+def _update_bookings_args(changes: Sequence[Mapping[str, Any]]) -> Tuple[list, ...]:
+    """Раскладывает изменения [{"id", поля...}] по массивам параметров booking_update_batch."""
+    ids = [change["id"] for change in changes]
+    if len(set(ids)) != len(ids):
+        raise ValueError("Одно бронирование указано в пакете несколько раз.")
+    unknown = {key for change in changes for key in change} - {"id", *BOOKING_UPDATE_FIELDS}
+    if unknown:
+        raise ValueError(f"Неизвестные поля: {', '.join(sorted(unknown))}.")
+    return (ids, *([change.get(field) for change in changes] for field in BOOKING_UPDATE_FIELDS))
+
+
+def update_bookings(changes: Sequence[Mapping[str, Any]]) -> int:
+    """
+    Изменяет несколько бронирований одним запросом в одной транзакции.
+    changes — [{"id": ..., и поля как у update_booking}], отсутствующие или None поля не меняются.
+    Вместимость проверяется по итоговому состоянию всех затронутых слотов, поэтому,
+    например, обмен столами между двумя бронированиями проходит. Возвращает число изменённых;
+    при нехватке мест — BookingCapacityError, и не меняется ничего.
+    """
+    if not changes:
+        return 0
+    args = _update_bookings_args(changes)
+    with get_driver(DB_NAME) as db:
+        with db.get_connection() as conn:
+            with conn.cursor() as cur:
+                try:
+                    execute(cur, queries.UPDATE_BOOKINGS, args)
+                except psycopg.Error as ex:
+                    raise _booking_error(ex) or ex
+                updated = cur.fetchone()[0]
+    if updated:
+        _cache_clear()
+    return updated
+
+
+# --- Availability ---
+
+
+def find_available_tables(
+    booking_date: str, booking_time: str, guests_count: int, duration_minutes: Optional[int] = None
+) -> List[dict]:
+    """
+    Возвращает столы, где на период с даты/времени длительностью duration_minutes (None — по умолчанию)
+    хватает мест для guests_count гостей: [{"id", "table_number", "capacity", "occupied", "free"}],
+    occupied — наибольшая занятость за период; сначала столы с наименьшим достаточным запасом мест.
+    При включённом кэше занятости и длительности по умолчанию отвечает из кэша.
+    """
+    if _use_occupancy_cache(duration_minutes):
+        tables = _cached_slots(booking_date, [booking_time])[booking_time]
+        return _available_from_slot(tables, guests_count)
+    with get_driver(DB_NAME) as db:
+        with db.get_read_connection() as conn:
+            with conn.cursor() as cur:
+                execute(
+                    cur, queries.FIND_AVAILABLE_TABLES,
+                    {
+                        "date": booking_date,
+                        "time": booking_time,
+                        "guests": guests_count,
+                        "duration": duration_minutes or DEFAULT_DURATION_MINUTES,
+                    },
+                )
+                return _row_to_dict(cur)
+
+
+def get_availability_grid(
+    booking_date: str,
+    booking_times: Sequence[str],
+    guests_count: int = 1,
+    duration_minutes: Optional[int] = None,
+) -> Dict[str, List[dict]]:
+    """
+    Сетка доступности на вечер одним запросом: {время из booking_times: [столы как в find_available_tables]}.
+    Для слотов без подходящих столов — пустой список. При включённом кэше занятости
+    из БД читаются только слоты, которых нет в кэше.
+    """
+    grid: Dict[str, List[dict]] = {t: [] for t in booking_times}
+    if not booking_times:
+        return grid
+    if _use_occupancy_cache(duration_minutes):
+        for booking_time, tables in _cached_slots(booking_date, booking_times).items():
+            grid[booking_time] = _available_from_slot(tables, guests_count)
+        return grid
+    with get_driver(DB_NAME) as db:
+        with db.get_read_connection() as conn:
+            with conn.cursor() as cur:
+                execute(
+                    cur, queries.AVAILABILITY_GRID,
+                    {
+                        "date": booking_date,
+                        "times": list(booking_times),
+                        "guests": guests_count,
+                        "duration": duration_minutes or DEFAULT_DURATION_MINUTES,
+                    },
+                )
+                for row in _row_to_dict(cur):
+                    slot_no = row.pop("slot_no")
+                    grid[booking_times[slot_no - 1]].append(row)
+    return grid
+
+
+def get_slot_occupancy(
+    table_id: int, booking_date: str, booking_time: str, duration_minutes: Optional[int] = None
+) -> int:
+    """
+    Наибольшее число занятых мест за столом за период с даты/времени длительностью
+    duration_minutes (None — по умолчанию; при включённом кэше — из кэша).
+    """
+    if _use_occupancy_cache(duration_minutes):
+        tables = _cached_slots(booking_date, [booking_time])[booking_time]
+        return tables[table_id][2] if table_id in tables else 0
+    with get_driver(DB_NAME) as db:
+        with db.get_read_connection() as conn:
+            with conn.cursor() as cur:
+                execute(
+                    cur, queries.SLOT_OCCUPANCY,
+                    (table_id, booking_date, booking_time, duration_minutes or DEFAULT_DURATION_MINUTES),
+                )
+                return cur.fetchone()[0]
+
+
+# --- Occupancy cache ---
+
+
+def configure_occupancy_cache(max_slots: Optional[int] = 1024, ttl: float = 30.0) -> None:
+    """
+    Включает кэш занятости слотов в памяти процесса: LRU на max_slots слотов, TTL в секундах
+    (ограничивает устаревание из-за записей других процессов). max_slots=None — выключить.
+    """
+    global _occupancy_cache
+    _occupancy_cache = OccupancyCache(max_slots, ttl) if max_slots else None
+
+
+def get_occupancy_cache_stats() -> Optional[dict]:
+    """Счётчики кэша занятости (hits, misses, size, ...) или None, если кэш выключен."""
+    return _occupancy_cache.stats() if _occupancy_cache is not None else None
+
+
+def _slots_from_rows(rows, booking_times: Sequence[str]) -> Dict[str, SlotTables]:
+    """Раскладывает строки SLOTS_OCCUPANCY по временам booking_times."""
+    slots: Dict[str, SlotTables] = {t: {} for t in booking_times}
+    for slot_no, table_id, table_number, capacity, occupied in rows:
+        slots[booking_times[slot_no - 1]][table_id] = (table_number, capacity, occupied)
+    return slots
+
+
+def _cached_slots(booking_date: str, booking_times: Sequence[str]) -> Dict[str, SlotTables]:
+    """Занятость слотов из кэша; отсутствующие слоты читаются из БД одним запросом и кладутся в кэш."""
+    cache = _occupancy_cache
+    result: Dict[str, SlotTables] = {}
+    missing = []
+    for booking_time in booking_times:
+        tables = cache.get(slot_key(booking_date, booking_time))
+        if tables is None:
+            missing.append(booking_time)
+        else:
+            result[booking_time] = tables
+    if missing:
+        generation = cache.generation
+        with get_driver(DB_NAME) as db:
+            with db.get_read_connection() as conn:
+                with conn.cursor() as cur:
+                    execute(
+                        cur, queries.SLOTS_OCCUPANCY,
+                        {"date": booking_date, "times": missing, "duration": DEFAULT_DURATION_MINUTES},
+                    )
+                    loaded = _slots_from_rows(cur.fetchall(), missing)
+        for booking_time, tables in loaded.items():
+            cache.put(slot_key(booking_date, booking_time), tables, generation)
+        result.update(loaded)
+    return result
+
+
+def _available_from_slot(tables: SlotTables, guests_count: int) -> List[dict]:
+    """Столы слота с запасом мест не меньше guests_count — в порядке FIND_AVAILABLE_TABLES."""
+    rows = [
+        {"id": table_id, "table_number": number, "capacity": capacity, "occupied": occupied, "free": capacity - occupied}
+        for table_id, (number, capacity, occupied) in tables.items()
+        if capacity - occupied >= guests_count
+    ]
+    rows.sort(key=lambda r: (r["free"], r["capacity"], r["table_number"]))
+    return rows
+
+
+def _use_occupancy_cache(duration_minutes: Optional[int]) -> bool:
+    """Кэш хранит занятость только для длительности по умолчанию."""
+    return _occupancy_cache is not None and duration_minutes in (None, DEFAULT_DURATION_MINUTES)
+
+
+def _cache_invalidate_dates(*booking_dates) -> None:
+    """
+    Сбрасывает слоты дат изменённых бронирований и соседних дат: период бронирования
+    может переходить через полночь, а слот предыдущего вечера — пересекать его.
+    """
+    if _occupancy_cache is None:
+        return
+    days = set()
+    for booking_date in booking_dates:
+        if booking_date is not None:
+            day = date.fromisoformat(str(booking_date).strip())
+            days.update((day - timedelta(days=1), day, day + timedelta(days=1)))
+    for day in days:
+        _occupancy_cache.invalidate_date(day)
+
+
+def _cache_clear() -> None:
+    """Сбрасывает кэш занятости после изменений столов или массовых операций."""
+    if _occupancy_cache is not None:
+        _occupancy_cache.clear()
+
+
+# --- Bulk import bookings ---
+
+
+BOOKING_IMPORT_FIELDS = ("user_id", "table_id", "booking_date", "booking_time", "guests_count")
+
+_IMPORT_REJECT_MESSAGES = {
+    "no_table": "Стол с таким ID не найден.",
+    "no_user": "Пользователь с таким ID не найден.",
+    "bad_guests": "Количество гостей должно быть > 0.",
+    "bad_duration": "Недопустимая длительность бронирования.",
+}
+
+
+def _parse_import_row(row: Mapping[str, Any]) -> Tuple[int, int, date, time, int, int]:
+    """Приводит строку импорта к типам колонок bookings. При ошибке — ValueError.
+    duration_minutes необязательна (по умолчанию DEFAULT_DURATION_MINUTES).
+    """
+    missing = [f for f in BOOKING_IMPORT_FIELDS if row.get(f) in (None, "")]
+    if missing:
+        raise ValueError(f"Не заполнены поля: {', '.join(missing)}.")
+    booking_date = row["booking_date"]
+    booking_time = row["booking_time"]
+    return (
+        int(row["user_id"]),
+        int(row["table_id"]),
+        booking_date if isinstance(booking_date, date) else date.fromisoformat(str(booking_date).strip()),
+        booking_time if isinstance(booking_time, time) else time.fromisoformat(str(booking_time).strip()),
+        int(row["guests_count"]),
+        int(row["duration_minutes"]) if row.get("duration_minutes") not in (None, "") else DEFAULT_DURATION_MINUTES,
+    )
+
+
+def create_bookings_bulk(rows: Iterable[Mapping[str, Any]]) -> List[dict]:
+    """
+    Массово создаёт бронирования (миграция из внешних систем).
+    rows — словари с ключами user_id, table_id, booking_date (YYYY-MM-DD), booking_time, guests_count
+    и необязательным duration_minutes.
+    Строки потоком загружаются через COPY во временную таблицу, вместимость проверяется
+    одним запросом на всю пачку, вставляются только поместившиеся строки
+    (в порядке следования, пока за столом есть места на весь период).
+    Возвращает по записи на строку: {"row": номер с 1, "id": id или None, "error": причина или None}.
+    """
+    results = []
+    with get_driver(DB_NAME) as db:
+        with db.get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(queries.CREATE_BOOKINGS_IMPORT)
+                with cur.copy(queries.COPY_BOOKINGS_IMPORT) as copy:
+                    for row_no, row in enumerate(rows, start=1):
+                        try:
+                            copy.write_row((row_no,) + _parse_import_row(row))
+                        except (ValueError, TypeError) as ex:
+                            results.append({"row": row_no, "id": None, "error": f"Некорректная строка: {ex}"})
+                cur.execute(queries.LOCK_BOOKINGS_FOR_IMPORT)
+                cur.execute(queries.VALIDATE_AND_INSERT_IMPORT)
+                for row_no, new_id, reason, capacity, taken, guests_count in cur:
+                    if reason == "capacity":
+                        error = _capacity_message(capacity, taken, guests_count)
+                    else:
+                        error = _IMPORT_REJECT_MESSAGES.get(reason)
+                    results.append({"row": row_no, "id": new_id, "error": error})
+    _cache_clear()
+    results.sort(key=lambda r: r["row"])
+    return results
+
+
+# --- Export bookings ---
+
+
+EXPORT_FORMATS = ("csv", "jsonl")
+
+
+def export_bookings(
+    out: BinaryIO,
+    fmt: str = "csv",
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+) -> int:
+    """
+    Потоково выгружает бронирования с email пользователя и номером стола в двоичный файл out
+    через COPY ... TO STDOUT: fmt "csv" (с заголовком) или "jsonl" (JSON-объект на строку).
+    Фильтр — даты бронирования date_from..date_to (включительно, YYYY-MM-DD; None — без границы).
+    Данные пишутся по мере получения, память не зависит от числа строк.
+    Возвращает число выгруженных бронирований.
+    """
+    sql = {"csv": queries.EXPORT_BOOKINGS_CSV, "jsonl": queries.EXPORT_BOOKINGS_JSONL}.get(fmt)
+    if sql is None:
+        raise ValueError(f"fmt: ожидается одно из {', '.join(EXPORT_FORMATS)}, получено {fmt!r}.")
+    with get_driver(DB_NAME) as db:
+        with db.get_read_connection() as conn:
+            with conn.cursor() as cur:
+                with cur.copy(sql, {"date_from": date_from, "date_to": date_to}) as copy:
+                    for data in copy:
+                        out.write(data)
+                return cur.rowcount
+
+
+# --- Change feed ---
+
+
+def listen_changes(
+    stop: Optional[threading.Event] = None,
+    poll_seconds: float = 1.0,
+    retry_seconds: float = 5.0,
+) -> Iterator[ChangeEvent]:
+    """
+    Лента изменений строк users, restaurant_tables и bookings (LISTEN models.CHANGES_CHANNEL):
+    по событию ChangeEvent(table, op, row_id) на строку, op — INSERT, UPDATE, DELETE или TRUNCATE.
+    Слушает отдельное подключение к основному серверу вне пула (на реплики уведомления не приходят).
+    Работает, пока генератор не закрыт или не установлен stop (проверяется раз в poll_seconds).
+    После потери подключения переподключается через retry_seconds и выдаёт ChangeEvent("*", RESET, None):
+    изменения за время разрыва могли потеряться, данные нужно перечитать.
+    """
+    db = get_driver(DB_NAME)
+    connected = False
+    while stop is None or not stop.is_set():
+        try:
+            with psycopg.connect(db.connection_string, autocommit=True, connect_timeout=10) as conn:
+                conn.execute(f"LISTEN {CHANGES_CHANNEL}")
+                if connected:
+                    yield ChangeEvent("*", RESET, None)
+                connected = True
+                while stop is None or not stop.is_set():
+                    for notify in conn.notifies(timeout=poll_seconds):
+                        yield from ChangeEvent.from_payload(notify.payload)
+        except psycopg.OperationalError:
+            (stop or threading.Event()).wait(retry_seconds)
 
 
 if __name__ == "__main__":
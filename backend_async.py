@@ -0,0 +1,656 @@
+"""
+Асинхронный (asyncio) бэкенд мини-системы бронирования.
+Повторяет API backend.py на асинхронных подключениях psycopg и общем AsyncConnectionPool.
+Тексты запросов общие с синхронной версией (queries.py).
+"""
+import asyncio
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Mapping, Optional, List, Sequence
+import psycopg
+from psycopg.rows import dict_row
+from postgres_driver import create_index_sql, get_driver
+from models import User, RestaurantTable, Booking, OccupancyReport, CHANGES_CHANNEL, ChangeEvent
+from models.changes import RESET
+from models.booking import DEFAULT_DURATION_MINUTES
+import backend
+from backend import (
+    ITER_BATCH_SIZE,
+    PAGE_SIZE,
+    _available_from_slot,
+    _booking_error,
+    _cache_clear,
+    _cache_invalidate_dates,
+    _prepare,
+    _row_factory,
+    _slots_from_rows,
+    _update_bookings_args,
+    _use_occupancy_cache,
+)
+from occupancy_cache import SlotTables, slot_key
+import queries
+
+
+async def _execute(cur, sql: str, params=None):
+    """await cur.execute с подготовкой оператора по реестру (backend._prepare)."""
+    return await cur.execute(sql, params, prepare=_prepare(sql))
+
+
+async def _row_to_dict(cursor) -> List[dict]:
+    """Преобразует результат курсора в список словарей."""
+    columns = [d[0] for d in cursor.description] if cursor.description else []
+    return [dict(zip(columns, row)) for row in await cursor.fetchall()]
+
+
+async def _one_row_to_dict(cursor) -> Optional[dict]:
+    """Преобразует одну строку результата в словарь или None."""
+    row = await cursor.fetchone()
+    if row is None:
+        return None
+    columns = [d[0] for d in cursor.description] if cursor.description else []
+    return dict(zip(columns, row))
+
+
+async def _fetch_all(sql: str, label: str, row_factory: Callable = dict_row, params=None) -> list:
+    """Все строки запроса (с параметрами params) в формате row_factory."""
+    with get_driver(backend.DB_NAME) as db:
+        async with db.get_async_connection(label=label) as conn:
+            async with conn.cursor(row_factory=row_factory) as cur:
+                await _execute(cur, sql, params)
+                return await cur.fetchall()
+
+
+async def _fetch_page(sql: str, after_id: int, limit: int, label: str, row_factory: Callable = dict_row) -> list:
+    """Keyset-пагинация: строки с id > after_id, не более limit штук, по возрастанию id."""
+    with get_driver(backend.DB_NAME) as db:
+        async with db.get_async_connection(label=label) as conn:
+            async with conn.cursor(row_factory=row_factory) as cur:
+                await _execute(cur, sql, (after_id, limit))
+                return await cur.fetchall()
+
+
+async def _iter_rows(sql: str, cursor_name: str, batch_size: int, row_factory: Callable = dict_row) -> AsyncIterator:
+    """Потоково читает результат запроса через серверный курсор пачками по batch_size строк."""
+    with get_driver(backend.DB_NAME) as db:
+        async with db.get_async_connection(label=cursor_name) as conn:
+            async with conn.cursor(name=cursor_name, row_factory=row_factory) as cur:
+                cur.itersize = batch_size
+                await cur.execute(sql)
+                async for row in cur:
+                    yield row
+
+
+# --- create_tables ---
+
+
+async def create_tables() -> None:
+    """Создаёт все таблицы по моделям (User, RestaurantTable, Booking, OccupancyReport), доводит схему
+    существующих таблиц до текущей версии и создаёт вторичные индексы.
+    """
+    with get_driver(backend.DB_NAME) as db:
+        async with db.get_async_connection() as conn:
+            async with conn.cursor() as cur:
+                for model in (User, RestaurantTable, Booking, OccupancyReport):
+                    await cur.execute(model.create_table_sql())
+                    for sql in model.migrations_sql():
+                        await cur.execute(sql)
+                for model in (User, RestaurantTable, Booking, OccupancyReport):
+                    for sql in model.functions_sql():
+                        await cur.execute(sql)
+                for model in (User, RestaurantTable, Booking, OccupancyReport):
+                    for name, definition in model.indexes().items():
+                        await cur.execute(create_index_sql(name, definition))
+
+
+# --- Users CRUD ---
+
+
+async def create_user(email: str, first_name: str, last_name: str) -> Optional[int]:
+    """Создаёт пользователя. Возвращает id или None."""
+    with get_driver(backend.DB_NAME) as db:
+        async with db.get_async_connection() as conn:
+            async with conn.cursor() as cur:
+                await _execute(cur, queries.INSERT_USER, queries.user_values(email, first_name, last_name))
+                row = await cur.fetchone()
+                return row[0] if row else None
+
+
+async def get_user(user_id: int) -> Optional[dict]:
+    """Возвращает пользователя по id или None."""
+    with get_driver(backend.DB_NAME) as db:
+        async with db.get_async_connection() as conn:
+            async with conn.cursor() as cur:
+                await _execute(cur, queries.SELECT_USER, (user_id,))
+                return await _one_row_to_dict(cur)
+
+
+async def get_all_users(row_format: str = "dict") -> list:
+    """Возвращает всех пользователей (row_format — см. backend.ROW_FORMATS: словари, User или кортежи)."""
+    return await _fetch_all(queries.SELECT_ALL_USERS, "get_all_users", _row_factory(row_format, User))
+
+
+async def get_users_page(after_id: int = 0, limit: int = PAGE_SIZE, row_format: str = "dict") -> list:
+    """Возвращает страницу пользователей с id > after_id (не более limit) в формате row_format."""
+    return await _fetch_page(
+        queries.SELECT_USERS_PAGE, after_id, limit, "get_users_page", _row_factory(row_format, User)
+    )
+
+
+def iter_users(batch_size: int = ITER_BATCH_SIZE, row_format: str = "dict") -> AsyncIterator:
+    """Потоково перебирает всех пользователей (серверный курсор) в формате row_format."""
+    return _iter_rows(queries.SELECT_ALL_USERS, "iter_users", batch_size, _row_factory(row_format, User))
+
+
+async def get_users_by_ids(user_ids: Iterable[int], row_format: str = "dict") -> list:
+    """Возвращает пользователей с id из user_ids по возрастанию id (несуществующих id в результате нет)."""
+    return await _fetch_all(
+        queries.SELECT_USERS_BY_IDS, "get_users_by_ids", _row_factory(row_format, User), (list(user_ids),)
+    )
+
+
+async def search_users(text: str, limit: int = 10, row_format: str = "dict") -> list:
+    """Поиск пользователей по началу email, имени, фамилии или по id (как backend.search_users)."""
+    if limit <= 0:
+        raise ValueError("limit должен быть > 0.")
+    params = queries.build_search_users(text, limit)
+    if params is None:
+        return []
+    return await _fetch_all(queries.SEARCH_USERS, "search_users", _row_factory(row_format, User), params)
+
+
+async def update_user(
+    user_id: int,
+    email: Optional[str] = None,
+    first_name: Optional[str] = None,
+    last_name: Optional[str] = None,
+) -> bool:
+    """Обновляет пользователя. Возвращает True, если обновлена хотя бы одна строка."""
+    update = queries.build_update("users", user_id, queries.user_values(email, first_name, last_name))
+    if update is None:
+        return False
+    sql, args = update
+    with get_driver(backend.DB_NAME) as db:
+        async with db.get_async_connection() as conn:
+            async with conn.cursor() as cur:
+                await _execute(cur, sql, tuple(args))
+                return cur.rowcount > 0
+
+
+async def delete_user(user_id: int) -> bool:
+    """Удаляет пользователя. Возвращает True, если строка удалена."""
+    with get_driver(backend.DB_NAME) as db:
+        async with db.get_async_connection() as conn:
+            async with conn.cursor() as cur:
+                await _execute(cur, queries.DELETE_USER, (user_id,))
+                deleted = cur.rowcount > 0
+    if deleted:
+        _cache_clear()
+    return deleted
+
+
+async def delete_users(user_ids: Iterable[int]) -> int:
+    """Удаляет пользователей одним запросом. Возвращает число удалённых."""
+    ids = list(user_ids)
+    if not ids:
+        return 0
+    with get_driver(backend.DB_NAME) as db:
+        async with db.get_async_connection() as conn:
+            async with conn.cursor() as cur:
+                await _execute(cur, queries.DELETE_USERS, (ids,))
+                deleted = cur.rowcount
+    if deleted:
+        _cache_clear()
+    return deleted
+
+
+# --- Tables (restaurant_tables) CRUD ---
+
+
+async def create_table(table_number: int, capacity: int) -> Optional[int]:
+    """Создаёт стол в ресторане. Возвращает id или None."""
+    with get_driver(backend.DB_NAME) as db:
+        async with db.get_async_connection() as conn:
+            async with conn.cursor() as cur:
+                await _execute(cur, queries.INSERT_TABLE, (table_number, capacity))
+                row = await cur.fetchone()
+    _cache_clear()
+    return row[0] if row else None
+
+
+async def get_table(table_id: int) -> Optional[dict]:
+    """Возвращает стол по id или None."""
+    with get_driver(backend.DB_NAME) as db:
+        async with db.get_async_connection() as conn:
+            async with conn.cursor() as cur:
+                await _execute(cur, queries.SELECT_TABLE, (table_id,))
+                return await _one_row_to_dict(cur)
+
+
+async def get_all_tables(row_format: str = "dict") -> list:
+    """Возвращает все столы (row_format — см. backend.ROW_FORMATS: словари, RestaurantTable или кортежи)."""
+    return await _fetch_all(queries.SELECT_ALL_TABLES, "get_all_tables", _row_factory(row_format, RestaurantTable))
+
+
+async def get_tables_page(after_id: int = 0, limit: int = PAGE_SIZE, row_format: str = "dict") -> list:
+    """Возвращает страницу столов с id > after_id (не более limit) в формате row_format."""
+    return await _fetch_page(
+        queries.SELECT_TABLES_PAGE, after_id, limit, "get_tables_page", _row_factory(row_format, RestaurantTable)
+    )
+
+
+def iter_tables(batch_size: int = ITER_BATCH_SIZE, row_format: str = "dict") -> AsyncIterator:
+    """Потоково перебирает все столы (серверный курсор) в формате row_format."""
+    return _iter_rows(queries.SELECT_ALL_TABLES, "iter_tables", batch_size, _row_factory(row_format, RestaurantTable))
+
+
+async def get_tables_by_ids(table_ids: Iterable[int], row_format: str = "dict") -> list:
+    """Возвращает столы с id из table_ids по возрастанию id (несуществующих id в результате нет)."""
+    return await _fetch_all(
+        queries.SELECT_TABLES_BY_IDS, "get_tables_by_ids", _row_factory(row_format, RestaurantTable), (list(table_ids),)
+    )
+
+
+async def update_table(
+    table_id: int,
+    table_number: Optional[int] = None,
+    capacity: Optional[int] = None,
+) -> bool:
+    """Обновляет стол. Возвращает True, если обновлена хотя бы одна строка."""
+    update = queries.build_update(
+        "restaurant_tables", table_id, {"table_number": table_number, "capacity": capacity}
+    )
+    if update is None:
+        return False
+    sql, args = update
+    with get_driver(backend.DB_NAME) as db:
+        async with db.get_async_connection() as conn:
+            async with conn.cursor() as cur:
+                await _execute(cur, sql, tuple(args))
+                updated = cur.rowcount > 0
+    if updated:
+        _cache_clear()
+    return updated
+
+
+async def delete_table(table_id: int) -> bool:
+    """Удаляет стол. Возвращает True, если строка удалена."""
+    with get_driver(backend.DB_NAME) as db:
+        async with db.get_async_connection() as conn:
+            async with conn.cursor() as cur:
+                await _execute(cur, queries.DELETE_TABLE, (table_id,))
+                deleted = cur.rowcount > 0
+    if deleted and backend._occupancy_cache is not None:
+        backend._occupancy_cache.drop_table(table_id)
+    return deleted
+
+
+async def delete_tables(table_ids: Iterable[int]) -> int:
+    """Удаляет столы одним запросом (бронирования — каскадом). Возвращает число удалённых."""
+    ids = list(table_ids)
+    if not ids:
+        return 0
+    with get_driver(backend.DB_NAME) as db:
+        async with db.get_async_connection() as conn:
+            async with conn.cursor() as cur:
+                await _execute(cur, queries.DELETE_TABLES, (ids,))
+                deleted = [row[0] for row in await cur.fetchall()]
+    if backend._occupancy_cache is not None:
+        for table_id in deleted:
+            backend._occupancy_cache.drop_table(table_id)
+    return len(deleted)
+
+
+# --- Bookings CRUD ---
+
+
+async def _check_table_capacity(
+    cur,
+    table_id: int,
+    booking_date: str,
+    booking_time: str,
+    guests_count: int,
+    exclude_booking_id: Optional[int] = None,
+    duration_minutes: Optional[int] = None,
+) -> None:
+    """
+    Проверяет, что добавление guests_count гостей на стол table_id на период с даты/времени
+    длительностью duration_minutes (None — по умолчанию) не превысит вместимость стола
+    ни в один момент периода. Иначе выбрасывает backend.BookingCapacityError.
+    exclude_booking_id — при обновлении бронирования не учитывать это бронирование.
+    Стол на даты периода блокируется до конца транзакции cur, так что последующая запись безопасна.
+    """
+    try:
+        await _execute(
+            cur, queries.CHECK_TABLE_CAPACITY,
+            (table_id, booking_date, booking_time, guests_count, exclude_booking_id, duration_minutes),
+        )
+    except psycopg.Error as ex:
+        raise _booking_error(ex) or ex
+
+
+async def create_booking(
+    user_id: int,
+    table_id: int,
+    booking_date: str,
+    booking_time: str,
+    guests_count: int,
+    duration_minutes: Optional[int] = None,
+) -> Optional[int]:
+    """Создаёт бронирование. Возвращает id или None. При превышении вместимости стола — backend.BookingCapacityError.
+    duration_minutes — длительность (None — DEFAULT_DURATION_MINUTES).
+    Проверка и вставка — один запрос (booking_create), запись сериализуется на сервере.
+    """
+    with get_driver(backend.DB_NAME) as db:
+        async with db.get_async_connection() as conn:
+            async with conn.cursor() as cur:
+                try:
+                    await _execute(
+                        cur, queries.CREATE_BOOKING,
+                        (user_id, table_id, booking_date, booking_time, guests_count, duration_minutes),
+                    )
+                except psycopg.Error as ex:
+                    raise _booking_error(ex) or ex
+                row = await cur.fetchone()
+    _cache_invalidate_dates(booking_date)
+    return row[0] if row else None
+
+
+async def get_booking(booking_id: int) -> Optional[dict]:
+    """Возвращает бронирование по id или None."""
+    with get_driver(backend.DB_NAME) as db:
+        async with db.get_async_connection() as conn:
+            async with conn.cursor() as cur:
+                await _execute(cur, queries.SELECT_BOOKING, (booking_id,))
+                return await _one_row_to_dict(cur)
+
+
+async def get_all_bookings(row_format: str = "dict") -> list:
+    """Возвращает все бронирования (row_format — см. backend.ROW_FORMATS: словари, Booking или кортежи)."""
+    return await _fetch_all(queries.SELECT_ALL_BOOKINGS, "get_all_bookings", _row_factory(row_format, Booking))
+
+
+async def get_bookings_page(after_id: int = 0, limit: int = PAGE_SIZE, row_format: str = "dict") -> list:
+    """Возвращает страницу бронирований с id > after_id (не более limit) в формате row_format."""
+    return await _fetch_page(
+        queries.SELECT_BOOKINGS_PAGE, after_id, limit, "get_bookings_page", _row_factory(row_format, Booking)
+    )
+
+
+def iter_bookings(batch_size: int = ITER_BATCH_SIZE, row_format: str = "dict") -> AsyncIterator:
+    """Потоково перебирает все бронирования (серверный курсор) в формате row_format."""
+    return _iter_rows(queries.SELECT_ALL_BOOKINGS, "iter_bookings", batch_size, _row_factory(row_format, Booking))
+
+
+async def get_bookings_by_ids(booking_ids: Iterable[int], row_format: str = "dict") -> list:
+    """Возвращает бронирования с id из booking_ids по возрастанию id (несуществующих id в результате нет)."""
+    return await _fetch_all(
+        queries.SELECT_BOOKINGS_BY_IDS, "get_bookings_by_ids", _row_factory(row_format, Booking), (list(booking_ids),)
+    )
+
+
+async def search_bookings(
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    time_from: Optional[str] = None,
+    time_to: Optional[str] = None,
+    user_id: Optional[int] = None,
+    table_id: Optional[int] = None,
+    min_guests: Optional[int] = None,
+    booking_ids: Optional[Iterable[int]] = None,
+    after_id: Optional[int] = None,
+    order_by: str = "date",
+    limit: Optional[int] = PAGE_SIZE,
+    row_format: str = "dict",
+    detailed: bool = False,
+) -> list:
+    """Поиск бронирований с фильтрацией на сервере (параметры — как у backend.search_bookings)."""
+    if order_by not in queries.SEARCH_BOOKINGS_ORDER:
+        raise ValueError(f"order_by: ожидается одно из {', '.join(queries.SEARCH_BOOKINGS_ORDER)}, получено {order_by!r}.")
+    if limit is not None and limit <= 0:
+        raise ValueError("limit должен быть > 0.")
+    if detailed and row_format == "model":
+        raise ValueError("row_format=\"model\" недоступен для detailed=True: в строках есть поля пользователя и стола.")
+    sql, args = queries.build_search_bookings(
+        {
+            "date_from": date_from,
+            "date_to": date_to,
+            "time_from": time_from,
+            "time_to": time_to,
+            "user_id": user_id,
+            "table_id": table_id,
+            "min_guests": min_guests,
+            "booking_ids": list(booking_ids) if booking_ids is not None else None,
+            "after_id": after_id,
+        },
+        order_by,
+        limit,
+        detailed,
+    )
+    return await _fetch_all(sql, "search_bookings", _row_factory(row_format, Booking), args)
+
+
+async def get_bookings_detailed(after_id: int = 0, limit: Optional[int] = PAGE_SIZE, row_format: str = "dict", **filters) -> list:
+    """Страница бронирований с пользователем и столом одним запросом (как backend.get_bookings_detailed)."""
+    return await search_bookings(
+        **filters, after_id=after_id, order_by="id", limit=limit, row_format=row_format, detailed=True
+    )
+
+
+async def update_booking(
+    booking_id: int,
+    user_id: Optional[int] = None,
+    table_id: Optional[int] = None,
+    booking_date: Optional[str] = None,
+    booking_time: Optional[str] = None,
+    guests_count: Optional[int] = None,
+    duration_minutes: Optional[int] = None,
+) -> bool:
+    """Обновляет бронирование. Возвращает True, если обновлена хотя бы одна строка. При превышении вместимости — backend.BookingCapacityError.
+    Чтение, проверка и обновление — один запрос (booking_update) с блокировкой строки, стола и дат периода.
+    """
+    if all(v is None for v in (user_id, table_id, booking_date, booking_time, guests_count, duration_minutes)):
+        return False
+    with get_driver(backend.DB_NAME) as db:
+        async with db.get_async_connection() as conn:
+            async with conn.cursor() as cur:
+                try:
+                    await _execute(
+                        cur, queries.UPDATE_BOOKING,
+                        {
+                            "id": booking_id,
+                            "user_id": user_id,
+                            "table_id": table_id,
+                            "date": booking_date,
+                            "time": booking_time,
+                            "guests": guests_count,
+                            "duration": duration_minutes,
+                        },
+                    )
+                except psycopg.Error as ex:
+                    raise _booking_error(ex) or ex
+                updated, old_date = await cur.fetchone()
+    if updated:
+        _cache_invalidate_dates(old_date, booking_date)
+    return bool(updated)
+
+
+async def delete_booking(booking_id: int) -> bool:
+    """Удаляет бронирование. Возвращает True, если строка удалена."""
+    with get_driver(backend.DB_NAME) as db:
+        async with db.get_async_connection() as conn:
+            async with conn.cursor() as cur:
+                await _execute(cur, queries.DELETE_BOOKING, (booking_id,))
+                row = await cur.fetchone()
+    if row:
+        _cache_invalidate_dates(row[0])
+    return row is not None
+
+
+async def delete_bookings(booking_ids: Iterable[int]) -> int:
+    """Удаляет бронирования одним запросом. Возвращает число удалённых."""
+    ids = list(booking_ids)
+    if not ids:
+        return 0
+    with get_driver(backend.DB_NAME) as db:
+        async with db.get_async_connection() as conn:
+            async with conn.cursor() as cur:
+                await _execute(cur, queries.DELETE_BOOKINGS, (ids,))
+                rows = await cur.fetchall()
+    _cache_invalidate_dates(*{row[0] for row in rows})
+    return len(rows)
+
+
+async def update_bookings(changes: Sequence[Mapping[str, Any]]) -> int:
+    """Изменяет несколько бронирований одним запросом (см. backend.update_bookings)."""
+    if not changes:
+        return 0
+    args = _update_bookings_args(changes)
+    with get_driver(backend.DB_NAME) as db:
+        async with db.get_async_connection() as conn:
+            async with conn.cursor() as cur:
+                try:
+                    await _execute(cur, queries.UPDATE_BOOKINGS, args)
+                except psycopg.Error as ex:
+                    raise _booking_error(ex) or ex
+                updated = (await cur.fetchone())[0]
+    if updated:
+        _cache_clear()
+    return updated
+
+
+# --- Availability ---
+
+
+async def find_available_tables(
+    booking_date: str, booking_time: str, guests_count: int, duration_minutes: Optional[int] = None
+) -> List[dict]:
+    """
+    Возвращает столы, где на период с даты/времени длительностью duration_minutes (None — по умолчанию)
+    хватает мест для guests_count гостей: [{"id", "table_number", "capacity", "occupied", "free"}],
+    occupied — наибольшая занятость за период; сначала столы с наименьшим достаточным запасом мест.
+    При включённом кэше занятости и длительности по умолчанию отвечает из кэша.
+    """
+    if _use_occupancy_cache(duration_minutes):
+        tables = (await _cached_slots(booking_date, [booking_time]))[booking_time]
+        return _available_from_slot(tables, guests_count)
+    with get_driver(backend.DB_NAME) as db:
+        async with db.get_async_connection() as conn:
+            async with conn.cursor() as cur:
+                await _execute(
+                    cur, queries.FIND_AVAILABLE_TABLES,
+                    {
+                        "date": booking_date,
+                        "time": booking_time,
+                        "guests": guests_count,
+                        "duration": duration_minutes or DEFAULT_DURATION_MINUTES,
+                    },
+                )
+                return await _row_to_dict(cur)
+
+
+async def get_availability_grid(
+    booking_date: str,
+    booking_times: Sequence[str],
+    guests_count: int = 1,
+    duration_minutes: Optional[int] = None,
+) -> Dict[str, List[dict]]:
+    """
+    Сетка доступности на вечер одним запросом: {время из booking_times: [столы как в find_available_tables]}.
+    Для слотов без подходящих столов — пустой список. При включённом кэше занятости
+    из БД читаются только слоты, которых нет в кэше.
+    """
+    grid: Dict[str, List[dict]] = {t: [] for t in booking_times}
+    if not booking_times:
+        return grid
+    if _use_occupancy_cache(duration_minutes):
+        for booking_time, tables in (await _cached_slots(booking_date, booking_times)).items():
+            grid[booking_time] = _available_from_slot(tables, guests_count)
+        return grid
+    with get_driver(backend.DB_NAME) as db:
+        async with db.get_async_connection() as conn:
+            async with conn.cursor() as cur:
+                await _execute(
+                    cur, queries.AVAILABILITY_GRID,
+                    {
+                        "date": booking_date,
+                        "times": list(booking_times),
+                        "guests": guests_count,
+                        "duration": duration_minutes or DEFAULT_DURATION_MINUTES,
+                    },
+                )
+                for row in await _row_to_dict(cur):
+                    slot_no = row.pop("slot_no")
+                    grid[booking_times[slot_no - 1]].append(row)
+    return grid
+
+
+async def get_slot_occupancy(
+    table_id: int, booking_date: str, booking_time: str, duration_minutes: Optional[int] = None
+) -> int:
+    """
+    Наибольшее число занятых мест за столом за период с даты/времени длительностью
+    duration_minutes (None — по умолчанию; при включённом кэше — из кэша).
+    """
+    if _use_occupancy_cache(duration_minutes):
+        tables = (await _cached_slots(booking_date, [booking_time]))[booking_time]
+        return tables[table_id][2] if table_id in tables else 0
+    with get_driver(backend.DB_NAME) as db:
+        async with db.get_async_connection() as conn:
+            async with conn.cursor() as cur:
+                await _execute(
+                    cur, queries.SLOT_OCCUPANCY,
+                    (table_id, booking_date, booking_time, duration_minutes or DEFAULT_DURATION_MINUTES),
+                )
+                return (await cur.fetchone())[0]
+
+
+async def _cached_slots(booking_date: str, booking_times: Sequence[str]) -> Dict[str, SlotTables]:
+    """Занятость слотов из общего с backend кэша; отсутствующие слоты читаются из БД одним запросом."""
+    cache = backend._occupancy_cache
+    result: Dict[str, SlotTables] = {}
+    missing = []
+    for booking_time in booking_times:
+        tables = cache.get(slot_key(booking_date, booking_time))
+        if tables is None:
+            missing.append(booking_time)
+        else:
+            result[booking_time] = tables
+    if missing:
+        generation = cache.generation
+        with get_driver(backend.DB_NAME) as db:
+            async with db.get_async_connection() as conn:
+                async with conn.cursor() as cur:
+                    await _execute(
+                        cur, queries.SLOTS_OCCUPANCY,
+                        {"date": booking_date, "times": missing, "duration": DEFAULT_DURATION_MINUTES},
+                    )
+                    loaded = _slots_from_rows(await cur.fetchall(), missing)
+        for booking_time, tables in loaded.items():
+            cache.put(slot_key(booking_date, booking_time), tables, generation)
+        result.update(loaded)
+    return result
+
+
+# --- Change feed ---
+
+
+async def listen_changes(retry_seconds: float = 5.0) -> AsyncIterator[ChangeEvent]:
+    """
+    Асинхронный аналог backend.listen_changes: события изменений строк по LISTEN на отдельном
+    подключении к основному серверу. Останавливается закрытием генератора или отменой задачи;
+    после переподключения выдаёт ChangeEvent("*", RESET, None).
+    """
+    db = get_driver(backend.DB_NAME)
+    connected = False
+    while True:
+        try:
+            async with await psycopg.AsyncConnection.connect(
+                db.connection_string, autocommit=True, connect_timeout=10
+            ) as conn:
+                await conn.execute(f"LISTEN {CHANGES_CHANNEL}")
+                if connected:
+                    yield ChangeEvent("*", RESET, None)
+                connected = True
+                async for notify in conn.notifies():
+                    for event in ChangeEvent.from_payload(notify.payload):
+                        yield event
+        except psycopg.OperationalError:
+            await asyncio.sleep(retry_seconds)
@@ -0,0 +1,3 @@
+"""
+Бенчмарки бэкенда. Запуск из корня репозитория: python -m benchmarks.<имя_модуля>.
+"""
@@ -0,0 +1,39 @@
+"""
+Общие помощники бенчмарков.
+"""
+import statistics
+from typing import Dict, List
+
+import psycopg
+
+import backend
+from postgres_driver import PostgresSQLDriver
+
+BENCH_DB_NAME = "booking_bench"
+
+
+def use_bench_database(db_name: str = BENCH_DB_NAME) -> None:
+    """Переключает backend на отдельную базу для бенчмарков (создаёт её при необходимости) и создаёт таблицы."""
+    admin = PostgresSQLDriver(db_name="postgres")
+    with psycopg.connect(admin.connection_string, autocommit=True) as conn:
+        exists = conn.execute("SELECT 1 FROM pg_database WHERE datname = %s", (db_name,)).fetchone()
+        if not exists:
+            conn.execute(f'CREATE DATABASE "{db_name}"')
+    backend.DB_NAME = db_name
+    backend.create_tables()
+
+
+def latency_stats(samples: List[float]) -> Dict[str, float]:
+    """Сводка по задержкам (секунды -> миллисекунды): p50, p95, p99, среднее."""
+    ordered = sorted(samples)
+
+    def pct(p: float) -> float:
+        return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))] * 1000
+
+    return {
+        "count": len(ordered),
+        "mean_ms": statistics.fmean(ordered) * 1000,
+        "p50_ms": pct(50),
+        "p95_ms": pct(95),
+        "p99_ms": pct(99),
+    }
@@ -0,0 +1,149 @@
+"""
+Пропускная способность и задержки HTTP API (api_server.py) на чтениях, которые делают планшеты
+администраторов: бронирование по id, свободные столы на слот, поиск пользователя.
+
+Сервер запускается отдельным процессом на базе booking_bench; клиенты — корутины с сырыми сокетами.
+Режимы: новое подключение на запрос (Connection: close), keep-alive и keep-alive с конвейером
+(--depth запросов отправляются сразу, ответы читаются по порядку).
+
+Запуск: python -m benchmarks.bench_api [--requests 5000] [--clients 1 16 64] [--depth 8] [--port 8099]
+Бронирований в booking_bench должно быть достаточно (её заполняют другие бенчмарки, например bench_capacity_index).
+"""
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from typing import List, Optional
+
+import backend
+from benchmarks._common import BENCH_DB_NAME, latency_stats, use_bench_database
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HOST = "127.0.0.1"
+
+
+def _paths(count: int) -> List[str]:
+    """Смесь запросов: бронирования по id, свободные столы на слоты засеянных дат, поиск пользователей."""
+    bookings = backend.search_bookings(order_by="-id", limit=1)
+    if not bookings:
+        sys.exit("В booking_bench нет бронирований: сначала запустите python -m benchmarks.bench_capacity_index")
+    max_id = bookings[0]["id"]
+    first = backend.search_bookings(order_by="date", limit=1)[0]["booking_date"]
+    paths = []
+    for n in range(count):
+        kind = n % 4
+        if kind < 2:
+            paths.append(f"/bookings/{random.randint(1, max_id)}")
+        elif kind == 2:
+            day = first.toordinal() + random.randrange(30)
+            paths.append(
+                f"/availability?date={type(first).fromordinal(day).isoformat()}"
+                f"&time={random.randint(10, 22):02d}:00&guests={random.randint(1, 4)}"
+            )
+        else:
+            paths.append(f"/users/search?q={random.choice('abcdefghijklmnopqrstuvwxyz')}&limit=10")
+    return paths
+
+
+def _request(path: str, keep_alive: bool) -> bytes:
+    connection = "keep-alive" if keep_alive else "close"
+    return f"GET {path} HTTP/1.1\r\nHost: {HOST}\r\nConnection: {connection}\r\n\r\n".encode()
+
+
+async def _read_response(reader: asyncio.StreamReader) -> int:
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    length = 0
+    for line in lines[1:]:
+        name, _, value = line.partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value)
+    await reader.readexactly(length)
+    return int(lines[0].split()[1])
+
+
+async def _client(port: int, paths: List[str], keep_alive: bool, depth: int, latencies: List[float], errors: List[int]):
+    reader: Optional[asyncio.StreamReader] = None
+    writer: Optional[asyncio.StreamWriter] = None
+    for start in range(0, len(paths), depth):
+        batch = paths[start:start + depth]
+        if reader is None:
+            reader, writer = await asyncio.open_connection(HOST, port)
+        started = time.perf_counter()
+        writer.write(b"".join(_request(path, keep_alive) for path in batch))
+        for _ in batch:
+            status = await _read_response(reader)
+            latencies.append(time.perf_counter() - started)
+            if status != 200:
+                errors.append(status)
+        if not keep_alive:
+            writer.close()
+            await writer.wait_closed()
+            reader = writer = None
+    if writer is not None:
+        writer.close()
+        await writer.wait_closed()
+
+
+async def _run(port: int, paths: List[str], clients: int, keep_alive: bool, depth: int):
+    latencies: List[float] = []
+    errors: List[int] = []
+    share = [paths[i::clients] for i in range(clients)]
+    started = time.perf_counter()
+    await asyncio.gather(*(_client(port, part, keep_alive, depth, latencies, errors) for part in share))
+    elapsed = time.perf_counter() - started
+    return len(paths) / elapsed, latency_stats(latencies), len(errors)
+
+
+def _start_server(port: int, max_concurrency: Optional[int]) -> subprocess.Popen:
+    cmd = [sys.executable, os.path.join(ROOT, "api_server.py"), "--port", str(port), "--db", BENCH_DB_NAME]
+    if max_concurrency:
+        cmd += ["--max-concurrency", str(max_concurrency)]
+    server = subprocess.Popen(cmd, cwd=ROOT)
+    # Сервер открывает порт, когда пул подключений готов.
+    deadline = time.monotonic() + 30
+    while True:
+        try:
+            socket.create_connection((HOST, port), timeout=1).close()
+            return server
+        except OSError:
+            if server.poll() is not None or time.monotonic() > deadline:
+                server.kill()
+                sys.exit("api_server.py не запустился")
+            time.sleep(0.1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000, help="запросов на каждый прогон")
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 16, 64], help="одновременных клиентов")
+    parser.add_argument("--depth", type=int, default=8, help="глубина конвейера в режиме pipelined")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--max-concurrency", type=int, default=None, help="передаётся api_server.py")
+    args = parser.parse_args()
+
+    use_bench_database()
+    paths = _paths(args.requests)
+    server = _start_server(args.port, args.max_concurrency)
+    try:
+        # Прогрев: подключения пула и подготовленные операторы сервера.
+        asyncio.run(_run(args.port, paths[:500], 8, True, 1))
+        print(f"{'mode':<12} {'clients':>7} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+        for clients in args.clients:
+            for mode, keep_alive, depth in (("close", False, 1), ("keep-alive", True, 1), ("pipelined", True, args.depth)):
+                rate, stats, errors = asyncio.run(_run(args.port, paths, clients, keep_alive, depth))
+                print(
+                    f"{mode:<12} {clients:>7} {rate:>9.0f} {stats['p50_ms']:>8.2f} {stats['p95_ms']:>8.2f} "
+                    f"{stats['p99_ms']:>8.2f} {errors:>7}"
+                )
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Сравнение пропускной способности синхронного (backend.py, поток на клиента)
+и асинхронного (backend_async.py, одна корутина на клиента) API
+при 1, 10 и 100 одновременных клиентах.
+
+Запуск: python -m benchmarks.bench_async [--ops 50] [--clients 1 10 100]
+Нужен доступный сервер из .env; данные пишутся в отдельную базу booking_bench.
+"""
+import argparse
+import asyncio
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import backend
+import backend_async
+from postgres_driver import close_async_pools
+from benchmarks._common import use_bench_database
+
+BOOKING_DATE = "2030-01-01"
+
+
+def _seed():
+    """Создаёт пользователя и вместительный стол для бенчмарка. Возвращает (user_id, table_id)."""
+    use_bench_database()
+    suffix = random.randint(1, 10**9)
+    user_id = backend.create_user(f"bench-{suffix}@example.com", "Bench", "User")
+    table_id = backend.create_table(10**6 + suffix % 10**6, 10**6)
+    return user_id, table_id
+
+
+def _sync_client(user_id: int, table_id: int, ops: int) -> None:
+    for i in range(ops):
+        booking_id = backend.create_booking(user_id, table_id, BOOKING_DATE, f"{i % 24:02d}:00", 1)
+        backend.get_booking(booking_id)
+
+
+async def _async_client(user_id: int, table_id: int, ops: int) -> None:
+    for i in range(ops):
+        booking_id = await backend_async.create_booking(user_id, table_id, BOOKING_DATE, f"{i % 24:02d}:00", 1)
+        await backend_async.get_booking(booking_id)
+
+
+def run_sync(clients: int, ops: int, user_id: int, table_id: int) -> float:
+    """Возвращает операций в секунду (операция = create_booking + get_booking)."""
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        futures = [pool.submit(_sync_client, user_id, table_id, ops) for _ in range(clients)]
+        for f in futures:
+            f.result()
+    return clients * ops / (time.perf_counter() - started)
+
+
+def run_async(clients: int, ops: int, user_id: int, table_id: int) -> float:
+    """Возвращает операций в секунду (операция = create_booking + get_booking)."""
+    async def main():
+        # Прогрев пула до замера, как и у синхронной версии.
+        await backend_async.get_booking(0)
+        started = time.perf_counter()
+        await asyncio.gather(*(_async_client(user_id, table_id, ops) for _ in range(clients)))
+        elapsed = time.perf_counter() - started
+        await close_async_pools()
+        return clients * ops / elapsed
+
+    return asyncio.run(main())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ops", type=int, default=50, help="операций на клиента")
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 10, 100])
+    args = parser.parse_args()
+
+    user_id, table_id = _seed()
+    backend.get_booking(0)
+    print(f"{'clients':>8} {'sync ops/s':>12} {'async ops/s':>12}")
+    for clients in args.clients:
+        sync_rate = run_sync(clients, args.ops, user_id, table_id)
+        async_rate = run_async(clients, args.ops, user_id, table_id)
+        print(f"{clients:>8} {sync_rate:>12.1f} {async_rate:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Задержка проверки вместимости (_check_table_capacity) по мере роста таблицы bookings.
+История растёт по дням (постоянное число бронирований на слот), поэтому при GiST-индексе
+bookings_period_idx (период, стол) поиск пересечений должен оставаться постоянным по времени,
+а без него — расти линейно.
+
+Запуск: python -m benchmarks.bench_capacity_index [--sizes 10000 100000 1000000] [--no-index]
+"""
+import argparse
+import random
+import time
+from datetime import date, timedelta
+
+import backend
+from models import Booking
+from postgres_driver import get_driver
+from benchmarks._common import latency_stats, use_bench_database
+
+TABLES = 50
+HOURS = range(10, 23)
+PER_SLOT = 2
+ROWS_PER_DAY = TABLES * len(HOURS) * PER_SLOT
+
+
+def _reset(with_index: bool):
+    """Очищает бронирования, создаёт столы и пользователя. Возвращает (user_id, table_ids)."""
+    with get_driver(backend.DB_NAME) as db:
+        with db.get_connection() as conn:
+            conn.execute("TRUNCATE bookings, restaurant_tables, users RESTART IDENTITY CASCADE")
+            for name in Booking.indexes():
+                conn.execute(f"DROP INDEX IF EXISTS {name}")
+    if with_index:
+        backend.create_tables()
+    user_id = backend.create_user("capacity-bench@example.com", "Bench", "User")
+    table_ids = [backend.create_table(n, 1000) for n in range(1, TABLES + 1)]
+    return user_id, table_ids
+
+
+def _grow_to(rows: int, current: int, user_id: int, first_table_id: int) -> None:
+    """Добавляет бронирования серверным INSERT ... SELECT до rows строк (новые дни в конце истории)."""
+    if rows <= current:
+        return
+    with get_driver(backend.DB_NAME) as db:
+        with db.get_connection() as conn:
+            conn.execute(
+                """INSERT INTO bookings (user_id, table_id, booking_date, booking_time, guests_count)
+                   SELECT %(user_id)s,
+                          %(first_table)s + (n / %(per_slot)s) %% %(tables)s,
+                          DATE '2000-01-01' + (n / %(per_day)s)::int,
+                          make_time(%(first_hour)s + (n / (%(per_slot)s * %(tables)s)) %% %(hours)s, 0, 0),
+                          1
+                   FROM generate_series(%(start)s::int, %(stop)s::int) AS n""",
+                {
+                    "user_id": user_id,
+                    "first_table": first_table_id,
+                    "per_slot": PER_SLOT,
+                    "tables": TABLES,
+                    "per_day": ROWS_PER_DAY,
+                    "first_hour": HOURS[0],
+                    "hours": len(HOURS),
+                    "start": current,
+                    "stop": rows - 1,
+                },
+            )
+            conn.execute("ANALYZE bookings")
+
+
+def _probe(rows: int, table_ids, probes: int):
+    """Замеряет _check_table_capacity на случайных существующих слотах."""
+    days = max(1, rows // ROWS_PER_DAY)
+    samples = []
+    with get_driver(backend.DB_NAME) as db:
+        with db.get_connection() as conn:
+            with conn.cursor() as cur:
+                for _ in range(probes):
+                    booking_date = (date(2000, 1, 1) + timedelta(days=random.randrange(days))).isoformat()
+                    booking_time = f"{random.choice(HOURS):02d}:00"
+                    started = time.perf_counter()
+                    backend._check_table_capacity(cur, random.choice(table_ids), booking_date, booking_time, 1)
+                    samples.append(time.perf_counter() - started)
+    return latency_stats(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--probes", type=int, default=200)
+    parser.add_argument("--no-index", action="store_true", help="замер без bookings_period_idx (для сравнения)")
+    args = parser.parse_args()
+
+    use_bench_database()
+    user_id, table_ids = _reset(with_index=not args.no_index)
+    print(f"{'rows':>10} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    current = 0
+    for rows in sorted(args.sizes):
+        _grow_to(rows, current, user_id, table_ids[0])
+        current = max(current, rows)
+        stats = _probe(rows, table_ids, args.probes)
+        print(f"{rows:>10} {stats['p50_ms']:>8.3f} {stats['p95_ms']:>8.3f} {stats['p99_ms']:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
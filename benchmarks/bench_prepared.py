@@ -0,0 +1,79 @@
+"""
+Задержка горячих запросов бэкенда с подготовленными операторами (backend.PREPARED_STATEMENTS = True)
+и без них (False): get_booking, проверка вместимости, create_booking, find_available_tables.
+
+Запуск: python -m benchmarks.bench_prepared [--ops 2000]
+"""
+import argparse
+import random
+import time
+
+import backend
+from postgres_driver import get_driver
+from benchmarks._common import latency_stats, use_bench_database
+
+BOOKING_DATE = "2031-01-01"
+HOURS = range(10, 23)
+
+
+def _seed():
+    """Пользователь, 20 столов и по бронированию на стол и час. Возвращает (user_id, table_ids, booking_ids)."""
+    suffix = random.randint(1, 10**9)
+    user_id = backend.create_user(f"prepared-{suffix}@example.com", "Bench", "User")
+    table_ids = [backend.create_table(2 * 10**6 + suffix % 10**6 * 20 + n, 10**6) for n in range(20)]
+    booking_ids = [
+        backend.create_booking(user_id, table_id, BOOKING_DATE, f"{hour:02d}:00", 1)
+        for table_id in table_ids
+        for hour in HOURS
+    ]
+    return user_id, table_ids, booking_ids
+
+
+def _check_capacity(table_id: int) -> None:
+    with get_driver(backend.DB_NAME) as db:
+        with db.get_connection() as conn:
+            with conn.cursor() as cur:
+                backend._check_table_capacity(cur, table_id, BOOKING_DATE, f"{random.choice(HOURS):02d}:00", 1)
+
+
+def _measure(fn, ops: int):
+    samples = []
+    for _ in range(ops):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return latency_stats(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ops", type=int, default=2000, help="выполнений каждого запроса в каждом режиме")
+    args = parser.parse_args()
+
+    use_bench_database()
+    user_id, table_ids, booking_ids = _seed()
+    cases = {
+        "get_booking": lambda: backend.get_booking(random.choice(booking_ids)),
+        "check_capacity": lambda: _check_capacity(random.choice(table_ids)),
+        "create_booking": lambda: backend.create_booking(
+            user_id, random.choice(table_ids), BOOKING_DATE, f"{random.choice(HOURS):02d}:00", 1
+        ),
+        "find_available_tables": lambda: backend.find_available_tables(
+            BOOKING_DATE, f"{random.choice(HOURS):02d}:00", 2
+        ),
+    }
+    print(f"{'query':<22} {'mode':<10} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    try:
+        for name, fn in cases.items():
+            for prepared in (False, True):
+                backend.PREPARED_STATEMENTS = prepared
+                _measure(fn, min(args.ops, 100))
+                stats = _measure(fn, args.ops)
+                mode = "prepared" if prepared else "plain"
+                print(f"{name:<22} {mode:<10} {stats['p50_ms']:>8.3f} {stats['p95_ms']:>8.3f} {stats['p99_ms']:>8.3f}")
+    finally:
+        backend.PREPARED_STATEMENTS = True
+
+
+if __name__ == "__main__":
+    main()
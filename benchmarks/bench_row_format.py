@@ -0,0 +1,63 @@
+"""
+Память и время больших листингов бронирований в разных форматах строк (backend.ROW_FORMATS):
+словари, экземпляры Booking (dataclass со __slots__) и кортежи.
+
+Для каждого формата: медиана времени get_bookings_page(0, rows) и память, которую
+занимает результат (tracemalloc, отдельным прогоном — трассировка замедляет выполнение).
+
+Запуск: python -m benchmarks.bench_row_format [--rows 200000] [--runs 5]
+Берётся база booking_bench (её заполняют другие бенчмарки); бронирований должно быть не меньше --rows.
+"""
+import argparse
+import gc
+import statistics
+import time
+import tracemalloc
+
+import backend
+from benchmarks._common import use_bench_database
+
+
+def _load(rows: int, row_format: str) -> list:
+    return backend.get_bookings_page(0, rows, row_format=row_format)
+
+
+def _retained_bytes(rows: int, row_format: str) -> int:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = _load(rows, row_format)
+        retained, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return retained
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200000, help="строк в листинге")
+    parser.add_argument("--runs", type=int, default=5, help="замеров времени на формат")
+    args = parser.parse_args()
+
+    use_bench_database()
+    loaded = len(_load(args.rows, "tuple"))
+    print(f"rows: {loaded}")
+    print(f"{'format':<8} {'median ms':>10} {'min ms':>8} {'memory MiB':>11} {'bytes/row':>10}")
+    for row_format in backend.ROW_FORMATS:
+        samples = []
+        for _ in range(args.runs):
+            gc.collect()
+            started = time.perf_counter()
+            result = _load(args.rows, row_format)
+            samples.append(time.perf_counter() - started)
+            del result
+        retained = _retained_bytes(args.rows, row_format)
+        print(
+            f"{row_format:<8} {statistics.median(samples) * 1000:>10.1f} {min(samples) * 1000:>8.1f} "
+            f"{retained / 2**20:>11.1f} {retained / max(loaded, 1):>10.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
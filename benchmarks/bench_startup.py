@@ -0,0 +1,78 @@
+"""
+Время запуска и накладные расходы на вызов бэкенда, без обращений к БД:
+- импорт модулей в новом процессе: интерпретатор без модулей, app (окно без бэкенда),
+  backend (psycopg, пул, модели — раньше app импортировал его до показа окна);
+- получение драйвера на вызов функции бэкенда: чтение .env и окружения с созданием драйвера
+  (как было в каждом вызове), драйвер с закэшированной конфигурацией, get_driver().
+
+Запуск: python -m benchmarks.bench_startup [--runs 15] [--ops 20000]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from postgres_driver import PostgresDriver, get_config, get_driver, reload_config
+from benchmarks._common import latency_stats
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_IMPORT_SNIPPET = (
+    "import time; started = time.perf_counter(); {statement}; "
+    "print(time.perf_counter() - started)"
+)
+
+
+def _import_seconds(statement: str) -> float:
+    """Время выполнения statement (импорта) в новом процессе интерпретатора."""
+    out = subprocess.run(
+        [sys.executable, "-c", _IMPORT_SNIPPET.format(statement=statement)],
+        cwd=ROOT, check=True, capture_output=True, text=True,
+    ).stdout
+    return float(out.strip().splitlines()[-1])
+
+
+def _measure(fn, ops: int):
+    samples = []
+    for _ in range(ops):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return latency_stats(samples)
+
+
+def _driver_reading_env():
+    reload_config()
+    return PostgresDriver(db_name="booking")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=15, help="запусков интерпретатора на каждый импорт")
+    parser.add_argument("--ops", type=int, default=20000, help="вызовов на каждый способ получения драйвера")
+    args = parser.parse_args()
+
+    print(f"{'import':<28} {'median ms':>10} {'min ms':>8}")
+    for name, statement in (("interpreter", "pass"), ("app", "import app"), ("backend", "import backend")):
+        samples = [_import_seconds(statement) for _ in range(args.runs)]
+        print(f"{name:<28} {statistics.median(samples) * 1000:>10.1f} {min(samples) * 1000:>8.1f}")
+
+    print()
+    print(f"{'driver per call':<28} {'p50 us':>10} {'p95 us':>8} {'mean us':>8}")
+    get_config()
+    cases = {
+        "read .env + PostgresDriver": _driver_reading_env,
+        "PostgresDriver (cached cfg)": lambda: PostgresDriver(db_name="booking"),
+        "get_driver": lambda: get_driver("booking"),
+    }
+    for name, fn in cases.items():
+        ops = args.ops // 10 if fn is _driver_reading_env else args.ops
+        stats = _measure(fn, ops)
+        print(f"{name:<28} {stats['p50_ms'] * 1000:>10.1f} {stats['p95_ms'] * 1000:>8.1f} {stats['mean_ms'] * 1000:>8.1f}")
+    reload_config()
+
+
+if __name__ == "__main__":
+    main()
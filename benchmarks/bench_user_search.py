@@ -0,0 +1,92 @@
+"""
+Задержка поиска пользователей для автодополнения (backend.search_users) на большой таблице users.
+Запросы — как при наборе в поле: первые буквы имени, начало email, имя и фамилия, id, промах.
+С индексами users_*_key_idx (text_pattern_ops) время не должно зависеть от размера таблицы;
+--no-index удаляет их (последовательное чтение таблицы на каждый запрос).
+
+Запуск: python -m benchmarks.bench_user_search [--users 1000000] [--probes 200] [--no-index]
+Пользователи создаются в отдельной базе booking_users_bench (повторный запуск их не пересоздаёт).
+"""
+import argparse
+import random
+import time
+
+import backend
+from models import User
+from postgres_driver import get_driver
+from benchmarks._common import latency_stats, use_bench_database
+
+USERS_DB_NAME = "booking_users_bench"
+FIRST_NAMES = ("Ivan", "Petr", "Anna", "Maria", "Olga", "Sergey", "Alexey", "Elena", "Dmitry", "Natalia")
+
+
+def _seed(users: int) -> int:
+    """Добавляет пользователей до users штук (серверный INSERT ... SELECT). Возвращает их число."""
+    with get_driver(backend.DB_NAME) as db:
+        with db.get_connection() as conn:
+            current = conn.execute("SELECT count(*) FROM users").fetchone()[0]
+            if current < users:
+                conn.execute(
+                    # Ключи поиска — lower(): данные только ASCII.
+                    """INSERT INTO users (email, first_name, last_name, email_key, first_name_key, last_name_key)
+                       SELECT email, first_name, last_name, lower(email), lower(first_name), lower(last_name)
+                       FROM (
+                           SELECT 'user' || n || '.' || substr(md5(n::text), 1, 6) || '@example.com' AS email,
+                                  (%(names)s::text[])[1 + n %% cardinality(%(names)s::text[])] AS first_name,
+                                  initcap(substr(md5((n * 31)::text), 1, 8)) AS last_name
+                           FROM generate_series(%(start)s::int, %(stop)s::int) AS n
+                       ) AS u""",
+                    {"names": list(FIRST_NAMES), "start": current + 1, "stop": users},
+                )
+                conn.execute("ANALYZE users")
+            return max(current, users)
+
+
+def _queries(users: int):
+    """Наборы запросов: название -> функция, возвращающая очередной текст поиска."""
+    return {
+        "first letter": lambda: random.choice(FIRST_NAMES)[0],
+        "name prefix": lambda: random.choice(FIRST_NAMES)[:3],
+        "email prefix": lambda: f"user{random.randint(1, users)}"[:7],
+        "name + last name": lambda: f"{random.choice(FIRST_NAMES)} {random.choice('0123456789abcdef')}",
+        "id": lambda: str(random.randint(1, users)),
+        "miss": lambda: "zzz" + str(random.randint(1, 999)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1000000, help="пользователей в таблице")
+    parser.add_argument("--probes", type=int, default=200, help="запросов на каждый набор")
+    parser.add_argument("--no-index", action="store_true", help="без индексов users_*_key_idx")
+    args = parser.parse_args()
+
+    use_bench_database(USERS_DB_NAME)
+    users = _seed(args.users)
+    if args.no_index:
+        with get_driver(backend.DB_NAME) as db:
+            with db.get_connection() as conn:
+                for name in User.indexes():
+                    conn.execute(f"DROP INDEX IF EXISTS {name}")
+    print(f"users: {users}, indexes: {'no' if args.no_index else 'yes'}")
+    print(f"{'query':<18} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'rows':>6}")
+    try:
+        for name, make_text in _queries(users).items():
+            samples, found = [], 0
+            for _ in range(args.probes):
+                text = make_text()
+                started = time.perf_counter()
+                found += len(backend.search_users(text))
+                samples.append(time.perf_counter() - started)
+            stats = latency_stats(samples)
+            print(
+                f"{name:<18} {stats['p50_ms']:>8.2f} {stats['p95_ms']:>8.2f} {stats['p99_ms']:>8.2f} "
+                f"{found / args.probes:>6.1f}"
+            )
+    finally:
+        if args.no_index:
+            backend.create_tables()
+
+
+if __name__ == "__main__":
+    main()
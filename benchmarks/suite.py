@@ -0,0 +1,311 @@
+"""
+Набор бенчмарков функций backend.py и reports.py: пропускная способность и задержки p50/p95/p99
+на заполненной базе (объёмы задаются параметрами). Результат — JSON для сравнения прогонов;
+с --baseline прогон завершается с кодом 1, если задержка выросла больше порога.
+
+Каждый прогон идёт в одноразовой базе booking_suite (пересоздаётся) на сервере из .env,
+а с --initdb — в одноразовом кластере PostgreSQL во временном каталоге (нужны initdb и pg_ctl в PATH).
+
+Запуск:
+    python -m benchmarks.suite --output before.json
+    python -m benchmarks.suite --baseline before.json --threshold 0.2 --output after.json
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone
+from typing import Callable, Dict, List
+
+import psycopg
+
+import backend
+import reports
+from postgres_driver import PostgresSQLDriver, close_pools, get_driver
+from benchmarks._common import latency_stats, use_bench_database
+
+SUITE_DB_NAME = "booking_suite"
+HOURS = list(range(10, 23))
+SEED_START = date(2020, 1, 1)
+# Новые бронирования бенчмарка пишутся в слоты после засеянной истории.
+WRITE_START = date(2100, 1, 1)
+
+
+@contextmanager
+def _temporary_cluster():
+    """Одноразовый кластер PostgreSQL (trust, свободный порт); окружение DB_* указывает на него."""
+    if not shutil.which("initdb") or not shutil.which("pg_ctl"):
+        sys.exit("--initdb: initdb и pg_ctl не найдены в PATH")
+    data_dir = tempfile.mkdtemp(prefix="booking-bench-")
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    saved = {k: os.environ.get(k) for k in ("DB_HOST", "DB_PORT", "DB_USER", "DB_PASSWORD")}
+    try:
+        subprocess.run(
+            ["initdb", "-D", data_dir, "-U", "postgres", "--auth=trust", "-E", "UTF8"],
+            check=True, stdout=subprocess.DEVNULL,
+        )
+        subprocess.run(
+            ["pg_ctl", "-D", data_dir, "-w", "-l", os.path.join(data_dir, "server.log"),
+             "-o", f"-p {port} -k {data_dir} -c listen_addresses=127.0.0.1", "start"],
+            check=True, stdout=subprocess.DEVNULL,
+        )
+        os.environ.update(DB_HOST="127.0.0.1", DB_PORT=str(port), DB_USER="postgres", DB_PASSWORD="")
+        yield
+    finally:
+        close_pools()
+        subprocess.run(["pg_ctl", "-D", data_dir, "-m", "fast", "stop"], stdout=subprocess.DEVNULL)
+        shutil.rmtree(data_dir, ignore_errors=True)
+        for key, value in saved.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+def _recreate_database(db_name: str) -> None:
+    """Удаляет и заново создаёт базу бенчмарка, затем создаёт в ней таблицы."""
+    admin = PostgresSQLDriver(db_name="postgres")
+    with psycopg.connect(admin.connection_string, autocommit=True) as conn:
+        conn.execute(f'DROP DATABASE IF EXISTS "{db_name}" WITH (FORCE)')
+    use_bench_database(db_name)
+
+
+def _seed(users: int, tables: int, bookings: int) -> None:
+    """
+    Заполняет базу серверными INSERT ... SELECT: бронирования по одному гостю,
+    не больше одного на стол и слот, слоты идут подряд по дням начиная с SEED_START.
+    """
+    with get_driver(backend.DB_NAME) as db:
+        with db.get_connection() as conn:
+            conn.execute(
+                """INSERT INTO users (email, first_name, last_name, email_key, first_name_key, last_name_key)
+                   SELECT 'seed-' || n || '@example.com', 'User', 'N' || n, 'seed-' || n || '@example.com', 'user', 'n' || n
+                   FROM generate_series(1, %s::int) AS n""",
+                (users,),
+            )
+            conn.execute(
+                """INSERT INTO restaurant_tables (table_number, capacity)
+                   SELECT n, 4 + n %% 9 FROM generate_series(1, %s::int) AS n""",
+                (tables,),
+            )
+            conn.execute(
+                """INSERT INTO bookings (user_id, table_id, booking_date, booking_time, guests_count)
+                   SELECT 1 + n %% %(users)s,
+                          1 + n %% %(tables)s,
+                          %(start)s::date + (n / (%(tables)s * %(hours)s))::int,
+                          make_time(%(first_hour)s + (n / %(tables)s) %% %(hours)s, 0, 0),
+                          1
+                   FROM generate_series(0, %(count)s::int - 1) AS n""",
+                {
+                    "users": users,
+                    "tables": tables,
+                    "hours": len(HOURS),
+                    "first_hour": HOURS[0],
+                    "start": SEED_START,
+                    "count": bookings,
+                },
+            )
+            conn.execute("ANALYZE")
+
+
+class _Context:
+    """Засеянные объёмы и объекты, созданные бенчмарками (для последующих update/delete)."""
+
+    def __init__(self, users: int, tables: int, bookings: int):
+        self.users = users
+        self.tables = tables
+        self.bookings = bookings
+        self.seed_days = max(1, bookings // (tables * len(HOURS)))
+        self.write_no = 0
+        self.new_users: List[int] = []
+        self.new_bookings: List[int] = []
+
+    def seeded_slot(self):
+        day = SEED_START + timedelta(days=random.randrange(self.seed_days))
+        return day.isoformat(), f"{random.choice(HOURS):02d}:00"
+
+    def next_write_slot(self):
+        """Стол и свободный слот для новой брони (каждый вызов — новый слот)."""
+        n = self.write_no
+        self.write_no += 1
+        day = WRITE_START + timedelta(days=n // (self.tables * len(HOURS)))
+        return 1 + n % self.tables, day.isoformat(), f"{HOURS[(n // self.tables) % len(HOURS)]:02d}:00"
+
+
+def _check_capacity(ctx: _Context) -> None:
+    booking_date, booking_time = ctx.seeded_slot()
+    with get_driver(backend.DB_NAME) as db:
+        with db.get_connection() as conn:
+            with conn.cursor() as cur:
+                backend._check_table_capacity(cur, random.randint(1, ctx.tables), booking_date, booking_time, 1)
+
+
+def _create_user(ctx: _Context) -> None:
+    ctx.new_users.append(backend.create_user(f"suite-{len(ctx.new_users)}-{random.random()}@example.com", "Bench", "User"))
+
+
+def _create_booking(ctx: _Context) -> None:
+    table_id, booking_date, booking_time = ctx.next_write_slot()
+    ctx.new_bookings.append(backend.create_booking(random.randint(1, ctx.users), table_id, booking_date, booking_time, 1))
+
+
+def _occupancy_report(ctx: _Context) -> None:
+    """Отчёт о загрузке по столам и дням за неделю засеянной истории."""
+    day = date.fromisoformat(ctx.seeded_slot()[0])
+    reports.get_occupancy_report(day.isoformat(), (day + timedelta(days=6)).isoformat(), "day")
+
+
+def _cases(ctx: _Context) -> Dict[str, Callable[[], object]]:
+    """Бенчмарки в порядке выполнения: create_* раньше update/delete, которые используют созданное."""
+    rnd_user = lambda: random.randint(1, ctx.users)
+    rnd_table = lambda: random.randint(1, ctx.tables)
+    rnd_booking = lambda: random.randint(1, ctx.bookings)
+    return {
+        "create_user": lambda: _create_user(ctx),
+        "get_user": lambda: backend.get_user(rnd_user()),
+        "get_users_page": lambda: backend.get_users_page(random.randint(0, ctx.users)),
+        "search_users": lambda: backend.search_users(f"n{rnd_user()}"[:4]),
+        "update_user": lambda: backend.update_user(random.choice(ctx.new_users), first_name=f"B{random.random()}"),
+        "get_table": lambda: backend.get_table(rnd_table()),
+        "get_tables_page": lambda: backend.get_tables_page(random.randint(0, ctx.tables)),
+        "create_booking": lambda: _create_booking(ctx),
+        "get_booking": lambda: backend.get_booking(rnd_booking()),
+        "get_bookings_page": lambda: backend.get_bookings_page(random.randint(0, ctx.bookings)),
+        "get_bookings_detailed": lambda: backend.get_bookings_detailed(random.randint(0, ctx.bookings)),
+        "update_booking": lambda: backend.update_booking(random.choice(ctx.new_bookings), guests_count=random.randint(1, 2)),
+        "_check_table_capacity": lambda: _check_capacity(ctx),
+        "get_slot_occupancy": lambda: backend.get_slot_occupancy(rnd_table(), *ctx.seeded_slot()),
+        "find_available_tables": lambda: backend.find_available_tables(*ctx.seeded_slot(), 2),
+        "get_availability_grid": lambda: backend.get_availability_grid(
+            ctx.seeded_slot()[0], [f"{h:02d}:00" for h in HOURS], 2
+        ),
+        "get_occupancy_report": lambda: _occupancy_report(ctx),
+        "delete_booking": lambda: backend.delete_booking(ctx.new_bookings.pop()),
+        "delete_user": lambda: backend.delete_user(ctx.new_users.pop()),
+    }
+
+
+# Полные выборки таблиц — отдельно и с меньшим числом повторов.
+SCAN_CASES = {
+    "get_all_users": backend.get_all_users,
+    "get_all_tables": backend.get_all_tables,
+    "get_all_bookings": backend.get_all_bookings,
+}
+
+
+def _run_case(fn: Callable[[], object], ops: int) -> Dict[str, float]:
+    samples = []
+    started = time.perf_counter()
+    for _ in range(ops):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    stats = latency_stats(samples)
+    stats["ops_per_s"] = ops / (time.perf_counter() - started)
+    return stats
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def _regressions(results: Dict[str, dict], baseline: Dict[str, dict], metric: str, threshold: float) -> List[str]:
+    """Бенчмарки, у которых metric выросла больше чем в (1 + threshold) раз относительно baseline."""
+    found = []
+    for name, stats in results.items():
+        old = baseline.get(name, {}).get(metric)
+        if old and stats[metric] > old * (1 + threshold):
+            found.append(f"{name}: {metric} {old:.3f} -> {stats[metric]:.3f} (+{(stats[metric] / old - 1) * 100:.0f}%)")
+    return found
+
+
+def run(args) -> dict:
+    random.seed(args.seed)
+    _recreate_database(args.db_name)
+    t0 = time.perf_counter()
+    _seed(args.users, args.tables, args.bookings)
+    seed_seconds = time.perf_counter() - t0
+
+    ctx = _Context(args.users, args.tables, args.bookings)
+    results: Dict[str, dict] = {}
+    for name, fn in _cases(ctx).items():
+        results[name] = _run_case(fn, args.ops)
+    for name, fn in SCAN_CASES.items():
+        results[name] = _run_case(fn, args.scan_ops)
+
+    with get_driver(backend.DB_NAME) as db:
+        with db.get_connection() as conn:
+            server_version = conn.execute("SHOW server_version").fetchone()[0]
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "server_version": server_version,
+            "users": args.users,
+            "tables": args.tables,
+            "bookings": args.bookings,
+            "ops": args.ops,
+            "scan_ops": args.scan_ops,
+            "seed": args.seed,
+            "seed_seconds": round(seed_seconds, 3),
+        },
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--tables", type=int, default=50)
+    parser.add_argument("--bookings", type=int, default=100_000)
+    parser.add_argument("--ops", type=int, default=500, help="повторов каждого бенчмарка")
+    parser.add_argument("--scan-ops", type=int, default=5, help="повторов get_all_* (полные выборки)")
+    parser.add_argument("--seed", type=int, default=1, help="seed генератора случайных чисел")
+    parser.add_argument("--db-name", default=SUITE_DB_NAME)
+    parser.add_argument("--initdb", action="store_true", help="одноразовый кластер PostgreSQL во временном каталоге")
+    parser.add_argument("--output", help="файл для результата в JSON")
+    parser.add_argument("--baseline", help="JSON прошлого прогона для проверки регрессий")
+    parser.add_argument("--metric", default="p95_ms", choices=["p50_ms", "p95_ms", "p99_ms", "mean_ms"])
+    parser.add_argument("--threshold", type=float, default=0.2, help="допустимый рост метрики (0.2 = +20%%)")
+    args = parser.parse_args()
+
+    if args.initdb:
+        with _temporary_cluster():
+            report = run(args)
+    else:
+        report = run(args)
+
+    print(f"{'benchmark':<24} {'ops/s':>10} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for name, stats in report["results"].items():
+        print(f"{name:<24} {stats['ops_per_s']:>10.1f} {stats['p50_ms']:>8.3f} {stats['p95_ms']:>8.3f} {stats['p99_ms']:>8.3f}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = _regressions(report["results"], baseline, args.metric, args.threshold)
+        if regressions:
+            print(f"Регрессии (порог +{args.threshold * 100:.0f}%):", file=sys.stderr)
+            for line in regressions:
+                print(f"  {line}", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
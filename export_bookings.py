@@ -0,0 +1,61 @@
+"""
+Выгрузка бронирований для бухгалтерии в CSV или JSONL (при необходимости сжатых gzip).
+
+Строка — бронирование с email пользователя и номером стола:
+id, booking_date, booking_time, duration_minutes, guests_count, user_id, email, table_id, table_number, created_at.
+Данные идут потоком из COPY ... TO STDOUT прямо в файл, память не зависит от размера таблицы.
+Файл пишется под временным именем и переименовывается по окончании — неполной выгрузки под
+итоговым именем не бывает.
+
+Пример: python export_bookings.py bookings-2030-01.csv.gz --from 2030-01-01 --to 2030-01-31
+"""
+import argparse
+import gzip
+import os
+import sys
+
+import backend
+
+
+def _format_from_path(path: str) -> str:
+    name = path.lower()
+    if name.endswith(".gz"):
+        name = name[:-3]
+    return "jsonl" if name.endswith((".jsonl", ".ndjson")) else "csv"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="итоговый файл (.csv, .jsonl; с .gz — сжатый)")
+    parser.add_argument("--format", choices=backend.EXPORT_FORMATS, help="формат (по умолчанию — по расширению)")
+    parser.add_argument("--gzip", action="store_true", help="сжать gzip (по умолчанию — если имя оканчивается на .gz)")
+    parser.add_argument("--from", dest="date_from", help="первая дата бронирований, YYYY-MM-DD")
+    parser.add_argument("--to", dest="date_to", help="последняя дата бронирований, YYYY-MM-DD")
+    args = parser.parse_args()
+
+    fmt = args.format or _format_from_path(args.path)
+    compress = args.gzip or args.path.lower().endswith(".gz")
+    tmp_path = f"{args.path}.tmp"
+    try:
+        with open(tmp_path, "wb") as raw:
+            # mtime=0 — одинаковые данные дают одинаковый файл.
+            out = (
+                gzip.GzipFile(os.path.basename(args.path), "wb", compresslevel=6, fileobj=raw, mtime=0)
+                if compress else raw
+            )
+            try:
+                count = backend.export_bookings(out, fmt, date_from=args.date_from, date_to=args.date_to)
+            finally:
+                if compress:
+                    out.close()
+        os.replace(tmp_path, args.path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    print(f"Выгружено бронирований: {count} -> {args.path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,56 @@
+"""
+Массовый импорт бронирований из CSV или JSONL (миграция из внешней системы).
+
+CSV — с заголовком user_id,table_id,booking_date,booking_time,guests_count[,duration_minutes];
+JSONL — по одному JSON-объекту с теми же ключами на строку.
+Без duration_minutes бронирование длится DEFAULT_DURATION_MINUTES (120 минут).
+
+Пример: python import_bookings.py legacy.csv --rejects rejected.csv
+"""
+import argparse
+import csv
+import json
+import sys
+from typing import Iterator
+
+import backend
+
+
+def read_rows(path: str, fmt: str) -> Iterator[dict]:
+    """Потоково читает строки файла как словари."""
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        if fmt == "csv":
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="файл CSV или JSONL")
+    parser.add_argument("--format", choices=("csv", "jsonl"), help="формат файла (по умолчанию — по расширению)")
+    parser.add_argument("--rejects", help="CSV-файл для отклонённых строк (row, error)")
+    args = parser.parse_args()
+
+    fmt = args.format or ("jsonl" if args.path.lower().endswith((".jsonl", ".ndjson")) else "csv")
+    results = backend.create_bookings_bulk(read_rows(args.path, fmt))
+    rejected = [r for r in results if r["error"]]
+    print(f"Принято: {len(results) - len(rejected)}, отклонено: {len(rejected)}")
+
+    if args.rejects:
+        with open(args.rejects, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(("row", "error"))
+            writer.writerows((r["row"], r["error"]) for r in rejected)
+    else:
+        for r in rejected[:20]:
+            print(f"  строка {r['row']}: {r['error']}")
+        if len(rejected) > 20:
+            print(f"  ... и ещё {len(rejected) - 20}")
+    return 1 if rejected else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
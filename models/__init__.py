@@ -4,5 +4,7 @@
 from .user import User
 from .tables import RestaurantTable
 from .booking import Booking
+from .occupancy_report import OccupancyReport
+from .changes import CHANGES_CHANNEL, ChangeEvent
 
-__all__ = ["User", "RestaurantTable", "Booking"]
+__all__ = ["User", "RestaurantTable", "Booking", "OccupancyReport", "CHANGES_CHANNEL", "ChangeEvent"]
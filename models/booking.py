@@ -4,10 +4,19 @@
 """
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Optional
+from typing import Dict, List, Optional
 
+from .changes import change_notify_sql
 
-@dataclass
+# Длительность бронирования по умолчанию и максимальная, минуты.
+DEFAULT_DURATION_MINUTES = 120
+MAX_DURATION_MINUTES = 1440
+
+# Период бронирования [начало, конец) — в колонке bookings.period и в функции booking_period().
+_PERIOD_SQL = "tsrange(booking_date + booking_time, booking_date + booking_time + duration_minutes * INTERVAL '1 minute')"
+
+
+@dataclass(slots=True)
 class Booking:
     """Бронирование стола в ресторане."""
 
@@ -17,19 +26,272 @@ class Booking:
     booking_date: str     # дата бронирования (DATE или ISO строка)
     booking_time: str     # время (TIME или строка)
     guests_count: int     # количество гостей
+    duration_minutes: int = DEFAULT_DURATION_MINUTES  # длительность, минуты
     created_at: Optional[datetime] = None
 
     @staticmethod
     def create_table_sql() -> str:
         """SQL для создания таблицы бронирований."""
-        return """
+        return f"""
             CREATE TABLE IF NOT EXISTS bookings (
-                id            SERIAL PRIMARY KEY,
-                user_id       INT NOT NULL REFERENCES users(id) ON DELETE CASCADE,
-                table_id      INT NOT NULL REFERENCES restaurant_tables(id) ON DELETE CASCADE,
-                booking_date  DATE NOT NULL,
-                booking_time  TIME NOT NULL,
-                guests_count  INT NOT NULL CHECK (guests_count > 0),
-                created_at    TIMESTAMP DEFAULT NOW()
+                id               SERIAL PRIMARY KEY,
+                user_id          INT NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+                table_id         INT NOT NULL REFERENCES restaurant_tables(id) ON DELETE CASCADE,
+                booking_date     DATE NOT NULL,
+                booking_time     TIME NOT NULL,
+                guests_count     INT NOT NULL CHECK (guests_count > 0),
+                duration_minutes INT NOT NULL DEFAULT {DEFAULT_DURATION_MINUTES}
+                                 CHECK (duration_minutes BETWEEN 1 AND {MAX_DURATION_MINUTES}),
+                period           TSRANGE GENERATED ALWAYS AS ({_PERIOD_SQL}) STORED,
+                created_at       TIMESTAMP DEFAULT NOW()
             )
         """
+
+    @staticmethod
+    def migrations_sql() -> List[str]:
+        """
+        Доводит таблицу из прежних версий до текущей схемы (идемпотентно).
+        Старые бронирования получают длительность по умолчанию. Добавление period
+        переписывает таблицу под эксклюзивной блокировкой — на большой базе выполнять в окно обслуживания.
+        """
+        return [
+            f"""ALTER TABLE bookings ADD COLUMN IF NOT EXISTS duration_minutes INT NOT NULL
+                DEFAULT {DEFAULT_DURATION_MINUTES} CHECK (duration_minutes BETWEEN 1 AND {MAX_DURATION_MINUTES})""",
+            f"ALTER TABLE bookings ADD COLUMN IF NOT EXISTS period TSRANGE GENERATED ALWAYS AS ({_PERIOD_SQL}) STORED",
+            # Точные слоты больше не ищутся: пересечения идут по bookings_period_idx.
+            "DROP INDEX IF EXISTS bookings_slot_idx",
+            # Заменён на bookings_user_date_idx (user_id первым столбцом).
+            "DROP INDEX IF EXISTS bookings_user_id_idx",
+        ]
+
+    @staticmethod
+    def indexes() -> Dict[str, str]:
+        """Вторичные индексы таблицы бронирований: имя -> определение (часть после ON)."""
+        return {
+            # Пересечение периодов (период первым — по нему же ищет сетка доступности по всем столам).
+            # Номер стола — вырожденный диапазон int4range: у диапазонов есть встроенный
+            # класс операторов GiST, расширение btree_gist не нужно.
+            "bookings_period_idx": "bookings USING gist (period, int4range(table_id, table_id, '[]'))",
+            # Поиск (search_bookings) и выгрузка (export_bookings) за диапазон дат в порядке даты и времени;
+            # по пользователю и по столу — с датой вторым столбцом. Индекс по user_id нужен и каскадному удалению.
+            "bookings_booking_date_idx": "bookings (booking_date, booking_time)",
+            "bookings_user_date_idx": "bookings (user_id, booking_date, booking_time)",
+            "bookings_table_date_idx": "bookings (table_id, booking_date, booking_time)",
+        }
+
+    @staticmethod
+    def functions_sql() -> List[str]:
+        """
+        SQL серверных функций бронирования. Бронирование занимает стол на период
+        [дата + время, + duration_minutes); вместимость проверяется по наибольшему числу гостей,
+        одновременно сидящих за столом в течение периода. Проверка и запись выполняются
+        одним запросом под транзакционными advisory-блокировками (стол, дата) всех дат периода,
+        поэтому конкурентные клиенты не могут переполнить стол.
+        Ошибки: SQLSTATE BK001 — стол не найден, BK002 — не хватает мест
+        (DETAIL: "вместимость занято гостей"). В конце — триггеры ленты изменений (models.changes).
+        """
+        return [
+            # Прежние версии функций (слот без длительности).
+            "DROP FUNCTION IF EXISTS booking_lock_slot(INT, DATE, TIME)",
+            "DROP FUNCTION IF EXISTS booking_check_capacity(INT, DATE, TIME, INT, INT)",
+            "DROP FUNCTION IF EXISTS booking_create(INT, INT, DATE, TIME, INT)",
+            "DROP FUNCTION IF EXISTS booking_update(INT, INT, INT, DATE, TIME, INT)",
+            "DROP FUNCTION IF EXISTS booking_update_batch(INT[], INT[], INT[], DATE[], TIME[], INT[])",
+            # Построчный импорт заменён одним запросом (queries.VALIDATE_AND_INSERT_IMPORT).
+            "DROP FUNCTION IF EXISTS booking_import()",
+            f"""
+            CREATE OR REPLACE FUNCTION booking_period(booking_date DATE, booking_time TIME, duration_minutes INT)
+            RETURNS TSRANGE LANGUAGE sql IMMUTABLE AS $$
+                SELECT {_PERIOD_SQL}
+            $$
+            """,
+            """
+            CREATE OR REPLACE FUNCTION booking_lock_period(p_table_id INT, p_period TSRANGE)
+            RETURNS VOID LANGUAGE plpgsql AS $$
+            DECLARE
+                d DATE;
+            BEGIN
+                -- Пересекающиеся периоды всегда имеют общую дату, поэтому блокировки по (стол, дата)
+                -- сериализуют все конфликтующие записи. Даты берутся по возрастанию.
+                FOR d IN
+                    SELECT generate_series(lower(p_period)::date, (upper(p_period) - INTERVAL '1 microsecond')::date,
+                                           INTERVAL '1 day')::date
+                LOOP
+                    PERFORM pg_advisory_xact_lock(p_table_id, hashtext(d::text));
+                END LOOP;
+            END
+            $$
+            """,
+            """
+            CREATE OR REPLACE FUNCTION booking_peak_load(p_table_id INT, p_period TSRANGE, p_exclude_id INT DEFAULT NULL)
+            RETURNS INT LANGUAGE sql STABLE AS $$
+                -- Наибольшая загрузка стола за период: нарастающая сумма гостей по событиям
+                -- «начало» (+) и «конец» (-) пересекающихся бронирований; при равном времени
+                -- концы идут раньше начал, так как периоды полуоткрытые.
+                WITH o AS (
+                    SELECT period, guests_count FROM bookings
+                    WHERE period && p_period AND int4range(table_id, table_id, '[]') @> p_table_id
+                      AND id IS DISTINCT FROM p_exclude_id
+                ),
+                e AS (
+                    SELECT GREATEST(lower(period), lower(p_period)) AS t, guests_count AS d FROM o
+                    UNION ALL
+                    SELECT upper(period), -guests_count FROM o WHERE upper(period) < upper(p_period)
+                )
+                SELECT COALESCE(MAX(load), 0)::int
+                FROM (SELECT SUM(d) OVER (ORDER BY t, d ROWS UNBOUNDED PRECEDING) AS load FROM e) AS s
+            $$
+            """,
+            """
+            CREATE OR REPLACE FUNCTION booking_table_loads(p_period TSRANGE)
+            RETURNS TABLE (table_id INT, occupied INT) LANGUAGE sql STABLE AS $$
+                -- booking_peak_load для всех столов с бронированиями, пересекающими период.
+                WITH o AS (
+                    SELECT b.table_id, b.period, b.guests_count FROM bookings b WHERE b.period && p_period
+                ),
+                e AS (
+                    SELECT o.table_id, GREATEST(lower(o.period), lower(p_period)) AS t, o.guests_count AS d FROM o
+                    UNION ALL
+                    SELECT o.table_id, upper(o.period), -o.guests_count FROM o WHERE upper(o.period) < upper(p_period)
+                )
+                SELECT s.table_id, MAX(s.load)::int
+                FROM (
+                    SELECT e.table_id, SUM(e.d) OVER (PARTITION BY e.table_id ORDER BY e.t, e.d ROWS UNBOUNDED PRECEDING) AS load
+                    FROM e
+                ) AS s
+                GROUP BY s.table_id
+            $$
+            """,
+            f"""
+            CREATE OR REPLACE FUNCTION booking_check_capacity(
+                p_table_id INT, p_date DATE, p_time TIME, p_guests INT,
+                p_exclude_id INT DEFAULT NULL, p_duration INT DEFAULT NULL
+            ) RETURNS VOID LANGUAGE plpgsql AS $$
+            DECLARE
+                v_period   TSRANGE := booking_period(p_date, p_time, COALESCE(p_duration, {DEFAULT_DURATION_MINUTES}));
+                v_capacity INT;
+                v_taken    INT;
+            BEGIN
+                PERFORM booking_lock_period(p_table_id, v_period);
+                SELECT capacity INTO v_capacity FROM restaurant_tables WHERE id = p_table_id;
+                IF NOT FOUND THEN
+                    RAISE EXCEPTION USING ERRCODE = 'BK001', MESSAGE = 'Стол с таким ID не найден.';
+                END IF;
+                v_taken := booking_peak_load(p_table_id, v_period, p_exclude_id);
+                IF v_taken + p_guests > v_capacity THEN
+                    RAISE EXCEPTION USING ERRCODE = 'BK002',
+                        MESSAGE = 'Недостаточно мест за столом.',
+                        DETAIL = format('%s %s %s', v_capacity, v_taken, p_guests);
+                END IF;
+            END
+            $$
+            """,
+            f"""
+            CREATE OR REPLACE FUNCTION booking_create(
+                p_user_id INT, p_table_id INT, p_date DATE, p_time TIME, p_guests INT, p_duration INT DEFAULT NULL
+            ) RETURNS INT LANGUAGE plpgsql AS $$
+            DECLARE
+                v_id INT;
+            BEGIN
+                PERFORM booking_check_capacity(p_table_id, p_date, p_time, p_guests, NULL, p_duration);
+                INSERT INTO bookings (user_id, table_id, booking_date, booking_time, guests_count, duration_minutes)
+                VALUES (p_user_id, p_table_id, p_date, p_time, p_guests, COALESCE(p_duration, {DEFAULT_DURATION_MINUTES}))
+                RETURNING id INTO v_id;
+                RETURN v_id;
+            END
+            $$
+            """,
+            """
+            CREATE OR REPLACE FUNCTION booking_update(
+                p_id INT, p_user_id INT, p_table_id INT, p_date DATE, p_time TIME, p_guests INT, p_duration INT
+            ) RETURNS BOOLEAN LANGUAGE plpgsql AS $$
+            DECLARE
+                b bookings%ROWTYPE;
+            BEGIN
+                SELECT * INTO b FROM bookings WHERE id = p_id FOR UPDATE;
+                IF NOT FOUND THEN
+                    RETURN FALSE;
+                END IF;
+                PERFORM booking_check_capacity(
+                    COALESCE(p_table_id, b.table_id), COALESCE(p_date, b.booking_date),
+                    COALESCE(p_time, b.booking_time), COALESCE(p_guests, b.guests_count), p_id,
+                    COALESCE(p_duration, b.duration_minutes)
+                );
+                UPDATE bookings SET
+                    user_id          = COALESCE(p_user_id, user_id),
+                    table_id         = COALESCE(p_table_id, table_id),
+                    booking_date     = COALESCE(p_date, booking_date),
+                    booking_time     = COALESCE(p_time, booking_time),
+                    guests_count     = COALESCE(p_guests, guests_count),
+                    duration_minutes = COALESCE(p_duration, duration_minutes)
+                WHERE id = p_id;
+                RETURN FOUND;
+            END
+            $$
+            """,
+            """
+            CREATE OR REPLACE FUNCTION booking_update_batch(
+                p_ids INT[], p_user_ids INT[], p_table_ids INT[], p_dates DATE[], p_times TIME[], p_guests INT[],
+                p_durations INT[]
+            ) RETURNS INT LANGUAGE plpgsql AS $$
+            DECLARE
+                s       RECORD;
+                v_count INT;
+            BEGIN
+                -- Строки, а затем все затронутые (стол, дата) прежних и новых периодов блокируются
+                -- в одном порядке, чтобы встречные пакеты не взаимоблокировались.
+                PERFORM 1 FROM bookings WHERE id = ANY(p_ids) ORDER BY id FOR UPDATE;
+                IF EXISTS (
+                    SELECT 1 FROM unnest(p_table_ids) AS u(table_id)
+                    WHERE u.table_id IS NOT NULL
+                      AND NOT EXISTS (SELECT 1 FROM restaurant_tables t WHERE t.id = u.table_id)
+                ) THEN
+                    RAISE EXCEPTION USING ERRCODE = 'BK001', MESSAGE = 'Стол с таким ID не найден.';
+                END IF;
+                FOR s IN
+                    SELECT DISTINCT p.table_id, d::date AS lock_date FROM (
+                        SELECT b.table_id, b.period FROM bookings b WHERE b.id = ANY(p_ids)
+                        UNION ALL
+                        SELECT COALESCE(u.table_id, b.table_id),
+                               booking_period(COALESCE(u.d, b.booking_date), COALESCE(u.t, b.booking_time),
+                                              COALESCE(u.duration, b.duration_minutes))
+                        FROM unnest(p_ids, p_table_ids, p_dates, p_times, p_durations) AS u(id, table_id, d, t, duration)
+                        JOIN bookings b ON b.id = u.id
+                    ) AS p
+                    CROSS JOIN generate_series(lower(p.period)::date, (upper(p.period) - INTERVAL '1 microsecond')::date,
+                                               INTERVAL '1 day') AS d
+                    ORDER BY 1, 2
+                LOOP
+                    PERFORM pg_advisory_xact_lock(s.table_id, hashtext(s.lock_date::text));
+                END LOOP;
+
+                UPDATE bookings b SET
+                    user_id          = COALESCE(u.user_id, b.user_id),
+                    table_id         = COALESCE(u.table_id, b.table_id),
+                    booking_date     = COALESCE(u.d, b.booking_date),
+                    booking_time     = COALESCE(u.t, b.booking_time),
+                    guests_count     = COALESCE(u.guests, b.guests_count),
+                    duration_minutes = COALESCE(u.duration, b.duration_minutes)
+                FROM unnest(p_ids, p_user_ids, p_table_ids, p_dates, p_times, p_guests, p_durations)
+                     AS u(id, user_id, table_id, d, t, guests, duration)
+                WHERE b.id = u.id;
+                GET DIAGNOSTICS v_count = ROW_COUNT;
+
+                -- Вместимость — по итоговому состоянию: загрузка за период каждого изменённого бронирования.
+                SELECT t.capacity, l.load - b.guests_count AS taken, b.guests_count AS guests
+                INTO s
+                FROM bookings b
+                JOIN restaurant_tables t ON t.id = b.table_id
+                CROSS JOIN LATERAL (SELECT booking_peak_load(b.table_id, b.period) AS load) AS l
+                WHERE b.id = ANY(p_ids) AND l.load > t.capacity
+                LIMIT 1;
+                IF FOUND THEN
+                    RAISE EXCEPTION USING ERRCODE = 'BK002',
+                        MESSAGE = 'Недостаточно мест за столом.',
+                        DETAIL = format('%s %s %s', s.capacity, s.taken, s.guests);
+                END IF;
+                RETURN v_count;
+            END
+            $$
+            """,
+        ] + change_notify_sql("bookings")
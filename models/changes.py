@@ -0,0 +1,90 @@
+"""
+Лента изменений строк users, restaurant_tables и bookings через LISTEN/NOTIFY.
+Триггеры уровня оператора отправляют в канал CHANGES_CHANNEL компактные уведомления
+"таблица:операция:id,id,..." (id изменённых строк пачками, чтобы уложиться в предел
+размера уведомления); у TRUNCATE список id пуст.
+"""
+from dataclasses import dataclass
+from typing import Iterator, List, Optional
+
+CHANGES_CHANNEL = "booking_changes"
+# Не больше стольких id в одном уведомлении (предел полезной нагрузки NOTIFY — 8000 байт).
+_IDS_PER_NOTIFY = 500
+
+INSERT = "INSERT"
+UPDATE = "UPDATE"
+DELETE = "DELETE"
+TRUNCATE = "TRUNCATE"
+# Не от сервера: слушатель переподключился, изменения за время разрыва могли потеряться.
+RESET = "RESET"
+
+
+@dataclass(frozen=True, slots=True)
+class ChangeEvent:
+    """Изменение одной строки (для TRUNCATE и RESET row_id — None, для RESET table — "*")."""
+
+    table: str
+    op: str
+    row_id: Optional[int]
+
+    @staticmethod
+    def from_payload(payload: str) -> Iterator["ChangeEvent"]:
+        """События строк из полезной нагрузки уведомления (нераспознанная — пусто)."""
+        parts = payload.split(":")
+        if len(parts) != 3:
+            return
+        table, op, ids = parts
+        if op == TRUNCATE:
+            yield ChangeEvent(table, op, None)
+            return
+        for row_id in ids.split(","):
+            if row_id.isdigit():
+                yield ChangeEvent(table, op, int(row_id))
+
+
+def change_notify_sql(table: str) -> List[str]:
+    """SQL функции уведомлений (общей для всех таблиц) и триггеров таблицы table (с колонкой id)."""
+    statements = [
+        f"""
+        CREATE OR REPLACE FUNCTION notify_row_changes()
+        RETURNS TRIGGER LANGUAGE plpgsql AS $$
+        DECLARE
+            v_prefix TEXT := TG_TABLE_NAME || ':' || TG_OP || ':';
+            v_ids    TEXT;
+        BEGIN
+            IF TG_OP = 'TRUNCATE' THEN
+                PERFORM pg_notify('{CHANGES_CHANNEL}', v_prefix);
+                RETURN NULL;
+            END IF;
+            -- changed — таблица переходов триггера: новые строки для INSERT/UPDATE, старые для DELETE.
+            FOR v_ids IN
+                SELECT string_agg(id::text, ',' ORDER BY id)
+                FROM (SELECT id, (row_number() OVER (ORDER BY id) - 1) / {_IDS_PER_NOTIFY} AS chunk FROM changed) AS c
+                GROUP BY chunk
+                ORDER BY chunk
+            LOOP
+                PERFORM pg_notify('{CHANGES_CHANNEL}', v_prefix || v_ids);
+            END LOOP;
+            RETURN NULL;
+        END
+        $$
+        """,
+    ]
+    for op, transition in (("INSERT", "NEW"), ("UPDATE", "NEW"), ("DELETE", "OLD")):
+        trigger = f"{table}_notify_{op.lower()}"
+        statements += [
+            f"DROP TRIGGER IF EXISTS {trigger} ON {table}",
+            f"""
+            CREATE TRIGGER {trigger} AFTER {op} ON {table}
+            REFERENCING {transition} TABLE AS changed
+            FOR EACH STATEMENT EXECUTE FUNCTION notify_row_changes()
+            """,
+        ]
+    statements += [
+        f"DROP TRIGGER IF EXISTS {table}_notify_truncate ON {table}",
+        f"""
+        CREATE TRIGGER {table}_notify_truncate AFTER TRUNCATE ON {table}
+        FOR EACH STATEMENT EXECUTE FUNCTION notify_row_changes()
+        """,
+    ]
+    return statements
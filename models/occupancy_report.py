@@ -0,0 +1,162 @@
+"""
+Модель отчёта о загрузке столов.
+Материализованный агрегат: сколько гостей сидело за столом в каждый час дня (гость-минуты).
+"""
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, List
+
+
+@dataclass(slots=True)
+class OccupancyReport:
+    """Загрузка стола за один час одной даты."""
+
+    table_id: int         # внешняя связь с таблицей столов
+    report_date: date     # дата
+    hour: int             # час суток, 0..23
+    guest_minutes: int    # сумма по бронированиям: гостей × минут внутри часа
+    bookings_count: int   # бронирований, пересекающих час
+
+    @staticmethod
+    def create_table_sql() -> str:
+        """
+        SQL для создания таблицы отчёта (часы без бронирований не хранятся) и журнала
+        occupancy_report_dirty — дат, которые нужно пересчитать (без ключа: пишущие транзакции не ждут друг друга).
+        """
+        return """
+            CREATE TABLE IF NOT EXISTS occupancy_report (
+                report_date    DATE NOT NULL,
+                table_id       INT NOT NULL REFERENCES restaurant_tables(id) ON DELETE CASCADE,
+                hour           SMALLINT NOT NULL CHECK (hour BETWEEN 0 AND 23),
+                guest_minutes  INT NOT NULL,
+                bookings_count INT NOT NULL,
+                PRIMARY KEY (report_date, table_id, hour)
+            );
+            CREATE TABLE IF NOT EXISTS occupancy_report_dirty (
+                report_date DATE NOT NULL
+            )
+        """
+
+    @staticmethod
+    def migrations_sql() -> List[str]:
+        """Изменения схемы для баз прежних версий (пока нет)."""
+        return []
+
+    @staticmethod
+    def indexes() -> Dict[str, str]:
+        """Вторичные индексы отчёта (выборки по диапазону дат идут по первичному ключу)."""
+        return {}
+
+    @staticmethod
+    def functions_sql() -> List[str]:
+        """
+        SQL инкрементального обновления отчёта. Триггеры уровня оператора на bookings
+        дописывают затронутые даты в журнал occupancy_report_dirty; occupancy_report_refresh()
+        забирает даты из журнала и пересчитывает отчёт только за них. Возвращает число пересчитанных дат.
+        """
+        return [
+            """
+            CREATE OR REPLACE FUNCTION occupancy_report_mark_dirty()
+            RETURNS TRIGGER LANGUAGE plpgsql AS $$
+            BEGIN
+                -- Все даты, которых касается период бронирования (он может переходить через полночь).
+                IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                    INSERT INTO occupancy_report_dirty (report_date)
+                    SELECT DISTINCT generate_series(lower(period)::date, (upper(period) - INTERVAL '1 microsecond')::date,
+                                                    INTERVAL '1 day')::date
+                    FROM new_rows;
+                END IF;
+                IF TG_OP IN ('DELETE', 'UPDATE') THEN
+                    INSERT INTO occupancy_report_dirty (report_date)
+                    SELECT DISTINCT generate_series(lower(period)::date, (upper(period) - INTERVAL '1 microsecond')::date,
+                                                    INTERVAL '1 day')::date
+                    FROM old_rows;
+                END IF;
+                RETURN NULL;
+            END
+            $$
+            """,
+            "DROP TRIGGER IF EXISTS occupancy_report_insert ON bookings",
+            """
+            CREATE TRIGGER occupancy_report_insert AFTER INSERT ON bookings
+            REFERENCING NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION occupancy_report_mark_dirty()
+            """,
+            "DROP TRIGGER IF EXISTS occupancy_report_update ON bookings",
+            """
+            CREATE TRIGGER occupancy_report_update AFTER UPDATE ON bookings
+            REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION occupancy_report_mark_dirty()
+            """,
+            "DROP TRIGGER IF EXISTS occupancy_report_delete ON bookings",
+            """
+            CREATE TRIGGER occupancy_report_delete AFTER DELETE ON bookings
+            REFERENCING OLD TABLE AS old_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION occupancy_report_mark_dirty()
+            """,
+            """
+            CREATE OR REPLACE FUNCTION occupancy_report_truncate()
+            RETURNS TRIGGER LANGUAGE plpgsql AS $$
+            BEGIN
+                -- DELETE, а не TRUNCATE: при TRUNCATE ... CASCADE отчёт очищается тем же оператором.
+                DELETE FROM occupancy_report;
+                DELETE FROM occupancy_report_dirty;
+                RETURN NULL;
+            END
+            $$
+            """,
+            "DROP TRIGGER IF EXISTS occupancy_report_truncate ON bookings",
+            """
+            CREATE TRIGGER occupancy_report_truncate AFTER TRUNCATE ON bookings
+            FOR EACH STATEMENT EXECUTE FUNCTION occupancy_report_truncate()
+            """,
+            """
+            CREATE OR REPLACE FUNCTION occupancy_report_refresh()
+            RETURNS INT LANGUAGE plpgsql AS $$
+            DECLARE
+                v_dates DATE[];
+            BEGIN
+                IF NOT EXISTS (SELECT 1 FROM occupancy_report_dirty) THEN
+                    RETURN 0;
+                END IF;
+                -- Один пересчёт за раз; каждый оператор ниже видит всё, что зафиксировано до него,
+                -- а даты, записанные в журнал позже, дождутся следующего вызова.
+                PERFORM pg_advisory_xact_lock(hashtext('occupancy_report'));
+                WITH taken AS (DELETE FROM occupancy_report_dirty RETURNING report_date)
+                SELECT array_agg(DISTINCT report_date) INTO v_dates FROM taken;
+                IF v_dates IS NULL THEN
+                    RETURN 0;
+                END IF;
+                DELETE FROM occupancy_report WHERE report_date = ANY(v_dates);
+                INSERT INTO occupancy_report (report_date, table_id, hour, guest_minutes, bookings_count)
+                SELECT o.report_date, o.table_id, h.hour,
+                       SUM(o.guests_count * EXTRACT(EPOCH FROM upper(o.period * h.span) - lower(o.period * h.span)) / 60)::int,
+                       COUNT(*)
+                FROM (
+                    SELECT d.report_date, b.table_id, b.guests_count,
+                           b.period * tsrange(d.report_date, d.report_date + 1) AS period
+                    FROM unnest(v_dates) AS d(report_date)
+                    JOIN bookings b ON b.period && tsrange(d.report_date, d.report_date + 1)
+                ) AS o
+                CROSS JOIN LATERAL (
+                    SELECT hr AS hour,
+                           tsrange(o.report_date + make_interval(hours => hr), o.report_date + make_interval(hours => hr + 1)) AS span
+                    FROM generate_series(EXTRACT(HOUR FROM lower(o.period))::int,
+                                         EXTRACT(HOUR FROM upper(o.period) - INTERVAL '1 microsecond')::int) AS hr
+                ) AS h
+                GROUP BY o.report_date, o.table_id, h.hour
+                -- В порядке первичного ключа: строки одной даты лежат рядом, отчёт за диапазон читает мало страниц.
+                ORDER BY o.report_date, o.table_id, h.hour;
+                RETURN cardinality(v_dates);
+            END
+            $$
+            """,
+            # Первое заполнение: на базе с бронированиями и пустым отчётом помечаются все даты.
+            """
+            INSERT INTO occupancy_report_dirty (report_date)
+            SELECT DISTINCT generate_series(lower(period)::date, (upper(period) - INTERVAL '1 microsecond')::date,
+                                            INTERVAL '1 day')::date
+            FROM bookings
+            WHERE NOT EXISTS (SELECT 1 FROM occupancy_report) AND NOT EXISTS (SELECT 1 FROM occupancy_report_dirty)
+            """,
+        ]
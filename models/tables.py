@@ -3,10 +3,12 @@
 Каждый экземпляр описывает один конкретный стол в ресторане.
 """
 from dataclasses import dataclass
-from typing import Optional
+from typing import Dict, List, Optional
 
+from .changes import change_notify_sql
 
-@dataclass
+
+@dataclass(slots=True)
 class RestaurantTable:
     """Стол в ресторане (один конкретный стол для бронирования)."""
 
@@ -24,3 +26,18 @@ class RestaurantTable:
                 capacity     INT NOT NULL CHECK (capacity > 0)
             )
         """
+
+    @staticmethod
+    def migrations_sql() -> List[str]:
+        """Изменения схемы для баз прежних версий (пока нет)."""
+        return []
+
+    @staticmethod
+    def indexes() -> Dict[str, str]:
+        """Вторичные индексы таблицы столов (номер стола уже уникален)."""
+        return {}
+
+    @staticmethod
+    def functions_sql() -> List[str]:
+        """SQL триггеров ленты изменений таблицы столов (models.changes)."""
+        return change_notify_sql("restaurant_tables")
@@ -2,10 +2,21 @@
 Модель пользователя мини-системы бронирования.
 """
 from dataclasses import dataclass
-from typing import Optional
+from typing import Dict, List, Optional
 
+from .changes import change_notify_sql
 
-@dataclass
+# Поля, по началу которых ищет search_users; у каждого — колонка ключа поиска <поле>_key.
+SEARCH_FIELDS = ("email", "first_name", "last_name")
+# Заглавные буквы латиницы, греческого и кириллицы с их строчными по str.lower() — для заполнения ключей
+# поиска в SQL (migrations_sql): lower() базы с LC_CTYPE=C меняет только ASCII.
+_FOLD_UPPER = "".join(
+    c for c in map(chr, range(0xC0, 0x530)) if c.lower() != c and len(c.lower()) == 1
+)
+_FOLD_LOWER = _FOLD_UPPER.lower()
+
+
+@dataclass(slots=True)
 class User:
     """Пользователь системы бронирования."""
 
@@ -14,6 +25,11 @@ class User:
     first_name: str  # имя
     last_name: str   # фамилия
 
+    @staticmethod
+    def search_key(value: str) -> str:
+        """Ключ поиска поля: значение в нижнем регистре (str.lower(), не зависит от локали базы)."""
+        return value.lower()
+
     @staticmethod
     def create_table_sql() -> str:
         """SQL для создания таблицы пользователей."""
@@ -22,6 +38,38 @@ class User:
                 id         SERIAL PRIMARY KEY,
                 email      VARCHAR(255) NOT NULL UNIQUE,
                 first_name VARCHAR(100) NOT NULL,
-                last_name  VARCHAR(100) NOT NULL
+                last_name  VARCHAR(100) NOT NULL,
+                -- ключи поиска (search_key) полей; заполняет приложение
+                email_key      TEXT NOT NULL,
+                first_name_key TEXT NOT NULL,
+                last_name_key  TEXT NOT NULL
             )
         """
+
+    @staticmethod
+    def migrations_sql() -> List[str]:
+        """Изменения схемы для баз прежних версий: колонки ключей поиска, заполненные для имеющихся строк."""
+        fold = "lower(translate({}, '%s', '%s'))" % (_FOLD_UPPER, _FOLD_LOWER)
+        sql = [f"ALTER TABLE users ADD COLUMN IF NOT EXISTS {field}_key TEXT" for field in SEARCH_FIELDS]
+        sql.append(
+            "UPDATE users SET "
+            + ", ".join(f"{field}_key = {fold.format(field)}" for field in SEARCH_FIELDS)
+            + " WHERE email_key IS NULL"
+        )
+        sql += [f"ALTER TABLE users ALTER COLUMN {field}_key SET NOT NULL" for field in SEARCH_FIELDS]
+        # Прежние индексы поиска по lower(поле): lower() базы с LC_CTYPE=C не меняет кириллицу.
+        sql += [f"DROP INDEX IF EXISTS users_{field}_prefix_idx" for field in SEARCH_FIELDS]
+        return sql
+
+    @staticmethod
+    def indexes() -> Dict[str, str]:
+        """Вторичные индексы таблицы пользователей: имя -> определение (часть после ON)."""
+        # Поиск по началу ключа поиска (search_users): text_pattern_ops сравнивает побайтово,
+        # поэтому индекс подходит для префиксных диапазонов при любой сортировке базы
+        # (уникальный индекс email с сортировкой базы для них не годится).
+        return {f"users_{field}_key_idx": f"users ({field}_key text_pattern_ops)" for field in SEARCH_FIELDS}
+
+    @staticmethod
+    def functions_sql() -> List[str]:
+        """SQL триггеров ленты изменений таблицы пользователей (models.changes)."""
+        return change_notify_sql("users")
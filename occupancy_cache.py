@@ -0,0 +1,104 @@
+"""
+Кэш занятости слотов в памяти процесса (LRU + TTL).
+Запись — слот (дата, время): {table_id: (table_number, capacity, occupied)} по всем столам,
+occupied — занятость стола за период длительности по умолчанию, начинающийся в это время.
+Используется бэкендом только для чтения занятости и доступности; проверка вместимости
+при записи всегда идёт в БД под блокировкой стола и даты.
+"""
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, time as dt_time
+from typing import Dict, Optional, Tuple
+
+Slot = Tuple[str, str]
+SlotTables = Dict[int, Tuple[int, int, int]]
+
+
+def slot_key(booking_date, booking_time) -> Slot:
+    """Нормализованный ключ слота: ('YYYY-MM-DD', 'HH:MM:SS') из строк или date/time."""
+    return (
+        date.fromisoformat(str(booking_date).strip()).isoformat(),
+        dt_time.fromisoformat(str(booking_time).strip()).isoformat(),
+    )
+
+
+class OccupancyCache:
+    """Потокобезопасный LRU-кэш занятости слотов с TTL и счётчиками попаданий."""
+
+    def __init__(self, max_slots: int = 1024, ttl: float = 30.0, clock=time.monotonic):
+        self.max_slots = max_slots
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Slot, Tuple[float, SlotTables]]" = OrderedDict()
+        # Растёт при каждой записи: загрузка, начатая до записи, не кладётся в кэш.
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, slot: Slot) -> Optional[SlotTables]:
+        """Копия записи слота или None (промах или истёк TTL)."""
+        with self._lock:
+            entry = self._entries.get(slot)
+            if entry is not None and self._clock() - entry[0] <= self.ttl:
+                self._entries.move_to_end(slot)
+                self.hits += 1
+                return dict(entry[1])
+            if entry is not None:
+                del self._entries[slot]
+            self.misses += 1
+            return None
+
+    def put(self, slot: Slot, tables: SlotTables, generation: int) -> None:
+        """Кладёт загруженный из БД слот, если с начала загрузки (generation) не было записей."""
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._entries[slot] = (self._clock(), dict(tables))
+            self._entries.move_to_end(slot)
+            while len(self._entries) > self.max_slots:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, slot: Slot) -> None:
+        """Удаляет слот из кэша."""
+        with self._lock:
+            self.generation += 1
+            self._entries.pop(slot, None)
+
+    def invalidate_date(self, booking_date) -> None:
+        """Удаляет все слоты даты (бронирование меняет занятость всех слотов, пересекающих его период)."""
+        day = date.fromisoformat(str(booking_date).strip()).isoformat()
+        with self._lock:
+            self.generation += 1
+            for slot in [s for s in self._entries if s[0] == day]:
+                del self._entries[slot]
+
+    def drop_table(self, table_id: int) -> None:
+        """Убирает удалённый стол из всех слотов."""
+        with self._lock:
+            self.generation += 1
+            for _, tables in self._entries.values():
+                tables.pop(table_id, None)
+
+    def clear(self) -> None:
+        """Очищает кэш (например, после изменения столов или массовых операций)."""
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Счётчики для подбора размера кэша."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_slots": self.max_slots,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / total if total else 0.0,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,240 @@
+"""
+Список в ttk.Treeview с постраничной подгрузкой (keyset-страницы бэкенда) по мере прокрутки.
+Строки вставляются порциями через after(), обновление списка — по разнице:
+меняются только добавленные, удалённые и изменившиеся строки. События ленты изменений
+(apply_changes) применяются к уже загруженному диапазону без перечитывания списка.
+"""
+import bisect
+from collections import deque
+from tkinter import ttk
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+from task_runner import BusyIndicator, TaskRunner
+
+Values = Tuple[str, ...]
+
+
+def _fetch_through(fetch_page: Callable, last_id: int, page_size: int) -> Tuple[List[dict], bool]:
+    """
+    Перечитывает страницы с начала до строки last_id включительно (минимум одну страницу).
+    Возвращает (строки, достигнут ли конец таблицы). Выполняется в рабочем потоке.
+    """
+    rows: List[dict] = []
+    after_id = 0
+    while True:
+        page = fetch_page(after_id, page_size)
+        rows.extend(page)
+        if len(page) < page_size:
+            return rows, True
+        after_id = page[-1]["id"]
+        if after_id >= last_id:
+            return rows, False
+
+
+class PagedTree:
+    """
+    Связывает Treeview и функцию страницы бэкенда get_*_page(after_id, limit).
+    Идентификатор элемента дерева — id строки; строки отсортированы по id.
+    fetch_rows(ids) — строки по списку id (get_*_by_ids), нужна для apply_changes.
+    """
+
+    def __init__(
+        self,
+        tree: ttk.Treeview,
+        scrollbar: ttk.Scrollbar,
+        runner: TaskRunner,
+        fetch_page: Callable[[int, int], List[dict]],
+        to_values: Callable[[dict], tuple],
+        key: str,
+        on_error: Optional[Callable[[Exception], None]] = None,
+        indicator: Optional[BusyIndicator] = None,
+        page_size: int = 200,
+        chunk_size: int = 100,
+        fetch_rows: Optional[Callable[[List[int]], List[dict]]] = None,
+    ):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.runner = runner
+        self.fetch_page = fetch_page
+        self.to_values = to_values
+        self.key = key
+        self.on_error = on_error
+        self.indicator = indicator
+        self.page_size = page_size
+        self.chunk_size = chunk_size
+        self.fetch_rows = fetch_rows
+        self._values: Dict[str, Values] = {}
+        self._last_id = 0
+        self._exhausted = False
+        self._loading = False
+        # Подгрузка при прокрутке включается после первого refresh() (кнопка «Обновить список»).
+        self._started = False
+        self._pending: Deque[tuple] = deque()
+        self._applying = False
+        # id из событий изменений, ждущие перечитывания; перечитывается одна пачка за раз.
+        self._changed: Set[int] = set()
+        self._fetching_changes = False
+        tree.configure(yscrollcommand=self._on_yscroll)
+
+    def refresh(self) -> None:
+        """Перечитывает уже загруженный диапазон и применяет разницу (первый вызов — первая страница)."""
+        self._started = True
+        self._loading = True
+        self.runner.submit(
+            _fetch_through, self.fetch_page, self._last_id, self.page_size,
+            key=self.key, on_success=self._refreshed, on_error=self._failed, indicator=self.indicator,
+        )
+
+    def reload(self) -> None:
+        """Читает список заново с первой страницы (после смены условий выборки в fetch_page)."""
+        self._last_id = 0
+        self._exhausted = False
+        self._changed.clear()
+        self.refresh()
+
+    def load_more(self) -> None:
+        """Подгружает следующую страницу, если она есть и сейчас ничего не загружается."""
+        if not self._started or self._loading or self._exhausted or self._pending:
+            return
+        self._loading = True
+        self.runner.submit(
+            self.fetch_page, self._last_id, self.page_size,
+            key=self.key, on_success=self._page_loaded, on_error=self._failed, indicator=self.indicator,
+        )
+
+    def apply_changes(self, events: Iterable) -> None:
+        """
+        Применяет события ленты изменений таблицы (backend.listen_changes): изменённые строки
+        загруженного диапазона перечитываются пачкой через fetch_rows и вставляются, обновляются
+        или удаляются по месту. TRUNCATE и RESET перечитывают весь диапазон (refresh).
+        До первого refresh() события не нужны: список ещё не загружен.
+        """
+        if not self._started or self.fetch_rows is None:
+            return
+        for event in events:
+            if event.row_id is None:
+                self._changed.clear()
+                self.refresh()
+                return
+            # Строки за концом загруженного диапазона придут со следующей страницей.
+            if self._exhausted or event.row_id <= self._last_id:
+                self._changed.add(event.row_id)
+        self._fetch_changes()
+
+    def _fetch_changes(self) -> None:
+        if self._fetching_changes or not self._changed:
+            return
+        ids = sorted(self._changed)
+        self._changed.clear()
+        self._fetching_changes = True
+        self.runner.submit(
+            self.fetch_rows, ids,
+            on_success=lambda rows: self._changes_loaded(ids, rows),
+            on_error=lambda ex: self._changes_failed(ids, ex),
+        )
+
+    def _changes_loaded(self, ids: List[int], rows: List[dict]) -> None:
+        self._fetching_changes = False
+        found = {row["id"]: row for row in rows}
+        for row_id in ids:
+            row = found.get(row_id)
+            if row is None:
+                self._pending.append(("remove", str(row_id), None, None))
+            else:
+                iid, values = self._row(row)
+                self._pending.append(("upsert", iid, values, None))
+        self._schedule()
+        self._fetch_changes()
+
+    def _changes_failed(self, ids: List[int], ex: Exception) -> None:
+        # Без окна об ошибке: id перечитаются со следующим событием или по «Обновить список».
+        self._fetching_changes = False
+        self._changed.update(ids)
+
+    def _insert_index(self, row_id: int):
+        """Позиция новой строки в отсортированном по id дереве."""
+        children = self.tree.get_children()
+        if not children or int(children[-1]) < row_id:
+            return "end"
+        return bisect.bisect_left(children, row_id, key=int)
+
+    def _on_yscroll(self, first, last) -> None:
+        self.scrollbar.set(first, last)
+        if float(last) >= 0.9:
+            self.load_more()
+
+    def _failed(self, ex: Exception) -> None:
+        self._loading = False
+        if self.on_error is not None:
+            self.on_error(ex)
+
+    def _row(self, row: dict) -> Tuple[str, Values]:
+        return str(row["id"]), tuple("" if v is None else str(v) for v in self.to_values(row))
+
+    def _page_loaded(self, rows: List[dict]) -> None:
+        self._loading = False
+        self._exhausted = len(rows) < self.page_size
+        if rows:
+            self._last_id = rows[-1]["id"]
+        for row in rows:
+            iid, values = self._row(row)
+            if iid not in self._values:
+                self._pending.append(("insert", iid, values, "end"))
+        self._schedule()
+
+    def _refreshed(self, result: Tuple[List[dict], bool]) -> None:
+        rows, self._exhausted = result
+        self._loading = False
+        self._last_id = rows[-1]["id"] if rows else 0
+        # Дерево в любой момент отсортировано по id, поэтому разницу можно считать
+        # от текущего состояния, отбросив ещё не применённые операции.
+        self._pending.clear()
+        fresh = [self._row(row) for row in rows]
+        fresh_ids = {iid for iid, _ in fresh}
+        ops: List[tuple] = [("delete", iid, None, None) for iid in self._values if iid not in fresh_ids]
+        for index, (iid, values) in enumerate(fresh):
+            current = self._values.get(iid)
+            if current is None:
+                ops.append(("insert", iid, values, index))
+            elif current != values:
+                ops.append(("update", iid, values, None))
+        self._pending.extend(ops)
+        self._schedule()
+
+    def _schedule(self) -> None:
+        if self._pending and not self._applying:
+            self._applying = True
+            self.tree.after_idle(self._apply_chunk)
+
+    def _apply_chunk(self) -> None:
+        """Применяет не более chunk_size операций и уступает цикл событий Tk до следующей порции."""
+        for _ in range(min(self.chunk_size, len(self._pending))):
+            op, iid, values, index = self._pending.popleft()
+            if op == "delete":
+                self.tree.delete(iid)
+                del self._values[iid]
+            elif op == "remove":
+                if iid in self._values:
+                    self.tree.delete(iid)
+                    del self._values[iid]
+            elif op == "upsert":
+                if iid in self._values:
+                    if self._values[iid] != values:
+                        self.tree.item(iid, values=values)
+                        self._values[iid] = values
+                elif self._exhausted or int(iid) <= self._last_id:
+                    self.tree.insert("", self._insert_index(int(iid)), iid=iid, values=values)
+                    self._values[iid] = values
+                    self._last_id = max(self._last_id, int(iid))
+            elif op == "update":
+                self.tree.item(iid, values=values)
+                self._values[iid] = values
+            else:
+                self.tree.insert("", index, iid=iid, values=values)
+                self._values[iid] = values
+        if self._pending:
+            self.tree.after(1, self._apply_chunk)
+        else:
+            self._applying = False
+            if self.tree.yview()[1] >= 0.9:
+                self.load_more()
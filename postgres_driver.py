@@ -1,10 +1,16 @@
 """
 Драйвер для работы с PostgreSQL базой данных.
 """
+import asyncio
+import atexit
+import itertools
 import os
 import sys
-from typing import Optional, List, Tuple, Type
-from contextlib import contextmanager
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, List, Sequence, Tuple, Type
+from contextlib import asynccontextmanager, contextmanager
 from dotenv import load_dotenv
 
 if sys.platform == "win32":
@@ -27,6 +33,250 @@ if sys.platform == "win32":
 
 import psycopg
 from psycopg import errors
+from psycopg.conninfo import conninfo_to_dict, make_conninfo
+from psycopg.pq import TransactionStatus
+from psycopg_pool import AsyncConnectionPool, ConnectionPool, PoolTimeout
+
+import query_metrics
+
+
+# Пулы подключений общие на весь процесс: ключ — строка подключения.
+_pools: Dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+# Асинхронные пулы привязаны к циклу событий, в котором открыты: ключ — (id цикла, строка подключения),
+# в значении хранится и сам цикл, чтобы отбрасывать пулы закрытых циклов (id может повториться).
+_async_pools: Dict[Tuple[int, str], Tuple[asyncio.AbstractEventLoop, AsyncConnectionPool]] = {}
+
+# Реплики для чтения (PostgresDriver.get_read_connection): состояние общее на процесс,
+# ключ — строка подключения реплики.
+REPLICA_POLICIES = ("round_robin", "least_loaded")
+# Сколько секунд не обращаться к реплике после ошибки подключения.
+REPLICA_RETRY_SECONDS = 30.0
+_replicas: Dict[str, "_ReplicaState"] = {}
+_replicas_lock = threading.Lock()
+_round_robin = itertools.count()
+# LSN последней записи на основной сервер (ключ — строка подключения основного сервера).
+# Реплика читается, только если воспроизвела WAL не меньше него: так процесс (сеанс)
+# всегда видит свои записи.
+_write_lsns: Dict[str, int] = {}
+
+# Писала ли текущая транзакция: номер транзакции выделяется только при первой записи.
+_TRANSACTION_WROTE_SQL = "SELECT pg_current_xact_id_if_assigned() IS NOT NULL"
+
+_REPLICA_CHECK_SQL = """
+    SELECT pg_is_in_recovery(), pg_last_wal_replay_lsn()::text,
+           CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+                ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+           END"""
+
+
+def _env_number(name: str, default, cast=int):
+    """Читает числовой параметр из окружения (пустое значение — default)."""
+    value = os.getenv(name, "").strip()
+    return cast(value) if value else default
+
+
+@dataclass(frozen=True)
+class DriverConfig:
+    """Параметры подключения и пула из окружения и .env (см. env.example)."""
+
+    db_host: str
+    db_port: str
+    db_name: str
+    db_user: str
+    db_password: str
+    pool_min_size: int
+    pool_max_size: int
+    pool_timeout: float
+    pool_max_idle: float
+    pool_max_lifetime: float
+    replicas: Tuple[str, ...]
+    replica_policy: str
+    replica_max_lag: float
+    replica_check_interval: float
+    replica_timeout: float
+
+    @classmethod
+    def from_env(cls) -> "DriverConfig":
+        """Читает .env (без перезаписи уже заданных переменных) и окружение."""
+        load_dotenv()
+        return cls(
+            db_host=os.getenv('DB_HOST', 'localhost'),
+            db_port=os.getenv('DB_PORT', '5432'),
+            db_name=os.getenv('DB_NAME', 'test'),
+            db_user=os.getenv('DB_USER', 'postgres'),
+            db_password=os.getenv('DB_PASSWORD', ''),
+            pool_min_size=_env_number('DB_POOL_MIN_SIZE', 1),
+            pool_max_size=_env_number('DB_POOL_MAX_SIZE', 10),
+            pool_timeout=_env_number('DB_POOL_TIMEOUT', 30.0, float),
+            pool_max_idle=_env_number('DB_POOL_MAX_IDLE', 600.0, float),
+            pool_max_lifetime=_env_number('DB_POOL_MAX_LIFETIME', 3600.0, float),
+            replicas=tuple(dsn for dsn in os.getenv('DB_REPLICAS', '').split(';') if dsn.strip()),
+            replica_policy=os.getenv('DB_REPLICA_POLICY', '').strip() or "round_robin",
+            replica_max_lag=_env_number('DB_REPLICA_MAX_LAG', 5.0, float),
+            replica_check_interval=_env_number('DB_REPLICA_CHECK_INTERVAL', 1.0, float),
+            replica_timeout=_env_number('DB_REPLICA_TIMEOUT', 0.5, float),
+        )
+
+
+# Конфигурация и драйверы по умолчанию общие на процесс: .env читается с диска один раз,
+# строки подключения собираются один раз на базу (см. get_config, get_driver).
+_config: Optional[DriverConfig] = None
+_drivers: Dict[str, "PostgresDriver"] = {}
+_config_lock = threading.Lock()
+
+
+def get_config() -> DriverConfig:
+    """Конфигурация процесса (читается при первом вызове)."""
+    global _config
+    config = _config
+    if config is None:
+        with _config_lock:
+            if _config is None:
+                _config = DriverConfig.from_env()
+            config = _config
+    return config
+
+
+def reload_config() -> DriverConfig:
+    """Перечитывает .env и окружение; драйверы get_driver() создаются заново (пулы не закрываются)."""
+    global _config
+    with _config_lock:
+        _config = DriverConfig.from_env()
+        _drivers.clear()
+        return _config
+
+
+def get_driver(db_name: Optional[str] = None) -> "PostgresDriver":
+    """Драйвер базы db_name с параметрами get_config(), общий на процесс (создаётся один раз)."""
+    key = db_name or ""
+    driver = _drivers.get(key)
+    if driver is None:
+        get_config()
+        with _config_lock:
+            driver = _drivers.get(key)
+            if driver is None:
+                driver = _drivers[key] = PostgresDriver(db_name=db_name)
+    return driver
+
+
+def close_pools() -> None:
+    """Закрывает все пулы подключений процесса (включая пулы реплик)."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+        with _replicas_lock:
+            pools.extend(r.pool for r in _replicas.values() if r.pool is not None)
+            _replicas.clear()
+            _write_lsns.clear()
+    for pool in pools:
+        pool.close()
+
+
+atexit.register(close_pools)
+
+
+async def close_async_pools() -> None:
+    """Закрывает асинхронные пулы текущего цикла событий (вызывать до его завершения)."""
+    loop = asyncio.get_running_loop()
+    keys = [key for key, (pool_loop, _pool) in _async_pools.items() if pool_loop is loop]
+    for key in keys:
+        _loop, pool = _async_pools.pop(key)
+        await pool.close()
+
+
+def _caller_name(depth: int) -> str:
+    """Имя функции на depth кадров выше вызывающей — метка запросов по умолчанию."""
+    try:
+        return sys._getframe(depth + 1).f_code.co_name
+    except ValueError:
+        return "unknown"
+
+
+def _parse_lsn(value: Optional[str]) -> int:
+    """pg_lsn в текстовом виде ('16/B374D848') — число для сравнения."""
+    if not value:
+        return 0
+    high, low = value.split("/")
+    return (int(high, 16) << 32) + int(low, 16)
+
+
+def _new_pool(conninfo: str, name: str, driver: "PostgresDriver", timeout: float) -> ConnectionPool:
+    return ConnectionPool(
+        conninfo,
+        min_size=driver.pool_min_size,
+        max_size=driver.pool_max_size,
+        timeout=timeout,
+        max_idle=driver.pool_max_idle,
+        max_lifetime=driver.pool_max_lifetime,
+        # Кодировка задаётся параметром подключения, без отдельного SET.
+        kwargs={
+            "client_encoding": "UTF8",
+            "cursor_factory": query_metrics.InstrumentedCursor,
+        },
+        # Проверка живости подключения при выдаче из пула.
+        check=ConnectionPool.check_connection,
+        name=name,
+        open=True,
+    )
+
+
+class _ReplicaState:
+    """Реплика: пул, последняя проверка (воспроизведённый LSN, отставание) и число выданных подключений."""
+
+    __slots__ = ("conninfo", "name", "pool", "down_until", "replay_lsn", "lag", "checked_at", "in_flight")
+
+    def __init__(self, conninfo: str, name: str):
+        self.conninfo = conninfo
+        self.name = name
+        self.pool: Optional[ConnectionPool] = None
+        self.down_until = 0.0
+        self.replay_lsn = 0
+        self.lag = 0.0
+        self.checked_at = 0.0
+        self.in_flight = 0
+
+    def mark_down(self) -> None:
+        self.down_until = time.monotonic() + REPLICA_RETRY_SECONDS
+        self.checked_at = 0.0
+
+    def usable(self, connection, required_lsn: int, max_lag: float, check_interval: float) -> bool:
+        """
+        Годится ли реплика для чтения: проверка на выданном подключении, если прошлая
+        устарела или реплика ещё не дошла до required_lsn. Сервер не в режиме
+        восстановления (повышенная реплика) считается недоступным.
+        """
+        now = time.monotonic()
+        if now - self.checked_at > check_interval or self.replay_lsn < required_lsn:
+            in_recovery, replay_lsn, lag = connection.execute(_REPLICA_CHECK_SQL).fetchone()
+            if not in_recovery:
+                raise psycopg.OperationalError(f"{self.name}: сервер не является репликой")
+            self.replay_lsn = _parse_lsn(replay_lsn)
+            self.lag = float(lag)
+            self.checked_at = now
+        return self.replay_lsn >= required_lsn and self.lag <= max_lag
+
+
+def replica_stats() -> List[dict]:
+    """Состояние реплик процесса: name, available, replay_lsn, lag_seconds, in_flight."""
+    now = time.monotonic()
+    with _replicas_lock:
+        return [
+            {
+                "name": r.name,
+                "available": r.down_until <= now,
+                "replay_lsn": r.replay_lsn,
+                "lag_seconds": r.lag,
+                "in_flight": r.in_flight,
+            }
+            for r in _replicas.values()
+        ]
+
+
+def create_index_sql(name: str, definition: str, concurrently: bool = False) -> str:
+    """SQL идемпотентного создания индекса name ON definition."""
+    mode = "CONCURRENTLY " if concurrently else ""
+    return f"CREATE INDEX {mode}IF NOT EXISTS {name} ON {definition}"
 
 
 class PostgresDriver:
@@ -37,14 +287,22 @@ class PostgresDriver:
                  db_port: Optional[str] = None,
                  db_name: Optional[str] = None,
                  db_user: Optional[str] = None,
-                 db_password: Optional[str] = None):
-        load_dotenv()
-        
-        self.db_host = db_host or os.getenv('DB_HOST', 'localhost')
-        self.db_port = db_port or os.getenv('DB_PORT', '5432')
-        self.db_name = db_name or os.getenv('DB_NAME', 'test')
-        self.db_user = db_user or os.getenv('DB_USER', 'postgres')
-        self.db_password = db_password or os.getenv('DB_PASSWORD', '')
+                 db_password: Optional[str] = None,
+                 pool_min_size: Optional[int] = None,
+                 pool_max_size: Optional[int] = None,
+                 pool_timeout: Optional[float] = None,
+                 pool_max_idle: Optional[float] = None,
+                 pool_max_lifetime: Optional[float] = None,
+                 replicas: Optional[Sequence[str]] = None,
+                 replica_policy: Optional[str] = None,
+                 replica_max_lag: Optional[float] = None):
+        config = get_config()
+
+        self.db_host = db_host or config.db_host
+        self.db_port = db_port or config.db_port
+        self.db_name = db_name or config.db_name
+        self.db_user = db_user or config.db_user
+        self.db_password = db_password or config.db_password
         
         self.connection_string = (
             f"host={self.db_host} "
@@ -54,29 +312,244 @@ class PostgresDriver:
             f"password={self.db_password}"
         )
 
+        # Параметры пула: размер, ожидание свободного подключения (сек),
+        # закрытие простаивающих и пересоздание старых подключений (сек).
+        self.pool_min_size = pool_min_size if pool_min_size is not None else config.pool_min_size
+        self.pool_max_size = pool_max_size if pool_max_size is not None else config.pool_max_size
+        self.pool_timeout = pool_timeout if pool_timeout is not None else config.pool_timeout
+        self.pool_max_idle = pool_max_idle if pool_max_idle is not None else config.pool_max_idle
+        self.pool_max_lifetime = pool_max_lifetime if pool_max_lifetime is not None else config.pool_max_lifetime
+
+        # Реплики для чтения: строки подключения (в DB_REPLICAS — через «;»); база, пользователь
+        # и пароль по умолчанию те же, что у основного сервера.
+        if replicas is None:
+            replicas = config.replicas
+        self.replicas = [self._replica_conninfo(dsn) for dsn in replicas]
+        self.replica_policy = replica_policy or config.replica_policy
+        if self.replica_policy not in REPLICA_POLICIES:
+            raise ValueError(f"replica_policy: ожидается одно из {', '.join(REPLICA_POLICIES)}")
+        # Допустимое отставание реплики (сек), интервал её проверки (сек) и ожидание подключения к ней (сек).
+        self.replica_max_lag = replica_max_lag if replica_max_lag is not None else config.replica_max_lag
+        self.replica_check_interval = config.replica_check_interval
+        self.replica_timeout = config.replica_timeout
+
+    def _replica_conninfo(self, dsn: str) -> str:
+        params = conninfo_to_dict(dsn)
+        params.setdefault("user", self.db_user)
+        params.setdefault("password", self.db_password)
+        params.setdefault("connect_timeout", 2)
+        params["dbname"] = self.db_name
+        return make_conninfo(**params)
+
     def __enter__(self):
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         return None
 
+    @property
+    def pool(self) -> ConnectionPool:
+        """Общий для процесса пул подключений к этой базе (создаётся при первом обращении)."""
+        with _pools_lock:
+            pool = _pools.get(self.connection_string)
+            if pool is None:
+                pool = _new_pool(
+                    self.connection_string, f"{self.db_host}:{self.db_port}/{self.db_name}", self, self.pool_timeout
+                )
+                _pools[self.connection_string] = pool
+            return pool
+
     @contextmanager
-    def get_connection(self):
-        """Контекстный менеджер для получения подключения к базе данных."""
-        connection = None
-        try:
-            connection = psycopg.connect(self.connection_string)
-            with connection.cursor() as cur:
-                cur.execute("SET client_encoding TO 'UTF8'")
+    def get_connection(self, label: Optional[str] = None):
+        """Контекстный менеджер для получения подключения из пула основного сервера.
+        При успешном выходе транзакция фиксируется, при исключении — откатывается,
+        после чего подключение возвращается в пул.
+        label — метка в query_metrics для запросов, ожидания подключения и фиксации
+        (по умолчанию — имя вызывающей функции).
+        Если заданы реплики, после фиксации пишущей транзакции запоминается LSN записи
+        (см. get_read_connection); транзакции только на чтение его не запрашивают.
+        """
+        label = label or _caller_name(2)
+        with self._use_connection(self.pool, label, note_writes=bool(self.replicas)) as connection:
             yield connection
-            connection.commit()
-        except Exception as e:
-            if connection:
+
+    @contextmanager
+    def get_read_connection(self, label: Optional[str] = None):
+        """Подключение для запросов только на чтение: к реплике, если они заданы.
+        Реплика выбирается по replica_policy (round_robin — по кругу, least_loaded — с наименьшим
+        числом выданных подключений) среди тех, что доступны, отстают не больше replica_max_lag
+        и уже воспроизвели последнюю запись процесса. Иначе — основной сервер.
+        Ошибка уже начатого запроса на реплике не повторяется на основном сервере.
+        """
+        label = label or _caller_name(2)
+        replica, connection = self._acquire_replica(label)
+        if replica is None:
+            with self._use_connection(self.pool, label) as connection:
+                yield connection
+            return
+        try:
+            with self._use_connection(replica.pool, label, acquired=connection) as connection:
+                yield connection
+        finally:
+            with _replicas_lock:
+                replica.in_flight -= 1
+
+    @contextmanager
+    def _use_connection(self, pool: ConnectionPool, label: str, acquired=None, note_writes: bool = False):
+        """
+        Подключение из pool (или уже выданное acquired) с метрикой, фиксацией и возвратом в пул.
+        note_writes=True — после фиксации пишущей транзакции запоминается LSN основного сервера.
+        """
+        token = query_metrics.current_label.set(label)
+        try:
+            connection = acquired
+            if connection is None:
+                started = time.perf_counter()
+                connection = pool.getconn()
+                query_metrics.observe(query_metrics.ACQUIRE, label, time.perf_counter() - started)
+            try:
+                with connection:
+                    yield connection
+                    commit_started = time.perf_counter()
+                    wrote = note_writes and self._commit_noting_write(connection)
+                query_metrics.observe(query_metrics.COMMIT, label, time.perf_counter() - commit_started)
+                if wrote:
+                    self._note_write_lsn(connection)
+            finally:
+                pool.putconn(connection)
+        finally:
+            query_metrics.current_label.reset(token)
+
+    @staticmethod
+    def _commit_noting_write(connection) -> bool:
+        """
+        Фиксирует транзакцию и возвращает, писала ли она. Проверка и COMMIT уходят на сервер
+        одним обменом (конвейер psycopg), так что транзакция только на чтение лишнего запроса не делает.
+        """
+        if connection.info.transaction_status != TransactionStatus.INTRANS:
+            return False
+        # COMMIT — оператором, а не connection.commit(): тот синхронизирует конвейер отдельно от выхода из него.
+        with connection.pipeline():
+            cursor = connection.execute(_TRANSACTION_WROTE_SQL)
+            connection.execute("COMMIT")
+        return cursor.fetchone()[0]
+
+    def _note_write_lsn(self, connection) -> None:
+        """Запоминает текущий LSN основного сервера (после фиксации он не меньше LSN записи)."""
+        connection.autocommit = True
+        try:
+            lsn = _parse_lsn(connection.execute("SELECT pg_current_wal_lsn()::text").fetchone()[0])
+        finally:
+            connection.autocommit = False
+        with _replicas_lock:
+            if lsn > _write_lsns.get(self.connection_string, 0):
+                _write_lsns[self.connection_string] = lsn
+
+    def _replica_candidates(self) -> List[_ReplicaState]:
+        """Доступные реплики в порядке перебора по replica_policy."""
+        now = time.monotonic()
+        with _replicas_lock:
+            states = []
+            for conninfo in self.replicas:
+                state = _replicas.get(conninfo)
+                if state is None:
+                    params = conninfo_to_dict(conninfo)
+                    state = _replicas[conninfo] = _ReplicaState(
+                        conninfo, f"{params.get('host', '')}:{params.get('port', '5432')}/{self.db_name}"
+                    )
+                if state.down_until <= now:
+                    states.append(state)
+            if not states:
+                return []
+            # Сдвиг по кругу; least_loaded затем сортирует устойчиво, так что равные чередуются.
+            shift = next(_round_robin) % len(states)
+            states = states[shift:] + states[:shift]
+            if self.replica_policy == "least_loaded":
+                states.sort(key=lambda r: r.in_flight)
+            return states
+
+    def _acquire_replica(self, label: str) -> Tuple[Optional[_ReplicaState], Optional[psycopg.Connection]]:
+        """Подключение к первой годной реплике (и учёт его в in_flight) или (None, None)."""
+        if not self.replicas:
+            return None, None
+        with _replicas_lock:
+            required_lsn = _write_lsns.get(self.connection_string, 0)
+        for replica in self._replica_candidates():
+            started = time.perf_counter()
+            if replica.pool is None:
+                with _pools_lock:
+                    if replica.pool is None:
+                        replica.pool = _new_pool(
+                            replica.conninfo, f"{replica.name} (replica)", self, self.replica_timeout
+                        )
+            try:
+                connection = replica.pool.getconn()
+            except (PoolTimeout, psycopg.OperationalError):
+                replica.mark_down()
+                continue
+            try:
+                usable = replica.usable(connection, required_lsn, self.replica_max_lag, self.replica_check_interval)
+            except psycopg.Error:
+                replica.pool.putconn(connection)
+                replica.mark_down()
+                continue
+            if not usable:
                 connection.rollback()
-            raise
+                replica.pool.putconn(connection)
+                continue
+            query_metrics.observe(query_metrics.ACQUIRE, label, time.perf_counter() - started)
+            with _replicas_lock:
+                replica.in_flight += 1
+            return replica, connection
+        return None, None
+
+    async def get_async_pool(self) -> AsyncConnectionPool:
+        """Асинхронный пул подключений к этой базе для текущего цикла событий (открывается при первом обращении)."""
+        loop = asyncio.get_running_loop()
+        for stale in [key for key, (pool_loop, _pool) in _async_pools.items() if pool_loop.is_closed()]:
+            del _async_pools[stale]
+        key = (id(loop), self.connection_string)
+        _loop, pool = _async_pools.get(key, (loop, None))
+        if pool is None:
+            pool = AsyncConnectionPool(
+                self.connection_string,
+                min_size=self.pool_min_size,
+                max_size=self.pool_max_size,
+                timeout=self.pool_timeout,
+                max_idle=self.pool_max_idle,
+                max_lifetime=self.pool_max_lifetime,
+                kwargs={
+                    "client_encoding": "UTF8",
+                    "cursor_factory": query_metrics.AsyncInstrumentedCursor,
+                },
+                check=AsyncConnectionPool.check_connection,
+                name=f"{self.db_host}:{self.db_port}/{self.db_name} (async)",
+                open=False,
+            )
+            _async_pools[key] = (loop, pool)
+        # Повторный open() у открытого пула ничего не делает.
+        await pool.open()
+        return pool
+
+    @asynccontextmanager
+    async def get_async_connection(self, label: Optional[str] = None):
+        """Асинхронный аналог get_connection: подключение из AsyncConnectionPool."""
+        label = label or _caller_name(2)
+        token = query_metrics.current_label.set(label)
+        try:
+            pool = await self.get_async_pool()
+            started = time.perf_counter()
+            connection = await pool.getconn()
+            query_metrics.observe(query_metrics.ACQUIRE, label, time.perf_counter() - started)
+            try:
+                async with connection:
+                    yield connection
+                    commit_started = time.perf_counter()
+                query_metrics.observe(query_metrics.COMMIT, label, time.perf_counter() - commit_started)
+            finally:
+                await pool.putconn(connection)
         finally:
-            if connection:
-                connection.close()
+            query_metrics.current_label.reset(token)
 
     def create_table_if_not_exists(self, model: Type) -> None:
         """Создаёт таблицу по модели, если она не существует.
@@ -92,6 +565,51 @@ class PostgresDriver:
         model — класс модели с методом create_table_sql(), возвращающим SQL-строку (например, User).
         """
         self.create_table_if_not_exists(model)
+
+    def migrate_from_model(self, model: Type) -> None:
+        """Применяет изменения схемы модели для баз прежних версий (model.migrations_sql())."""
+        with self.get_connection() as conn:
+            with conn.cursor() as cursor:
+                for sql in model.migrations_sql():
+                    cursor.execute(sql)
+
+    def create_functions_from_model(self, model: Type) -> None:
+        """Создаёт (или заменяет) серверные функции модели (model.functions_sql())."""
+        with self.get_connection() as conn:
+            with conn.cursor() as cursor:
+                for sql in model.functions_sql():
+                    cursor.execute(sql)
+
+    def create_indexes_from_model(self, model: Type, concurrently: bool = False) -> None:
+        """Создаёт вторичные индексы модели (model.indexes()), если их ещё нет.
+        concurrently=True — CREATE INDEX CONCURRENTLY, не блокирует запись в рабочей базе.
+        Такой индекс строится вне транзакции; недостроенный (INVALID) после сбоя пересоздаётся.
+        """
+        indexes = model.indexes()
+        if not indexes:
+            return
+        if not concurrently:
+            with self.get_connection() as conn:
+                with conn.cursor() as cursor:
+                    for name, definition in indexes.items():
+                        cursor.execute(create_index_sql(name, definition))
+            return
+        with self.pool.connection() as conn:
+            conn.autocommit = True
+            try:
+                with conn.cursor() as cursor:
+                    for name, definition in indexes.items():
+                        cursor.execute(
+                            """SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+                               WHERE c.relname = %s AND c.relnamespace = current_schema()::regnamespace
+                                 AND NOT i.indisvalid""",
+                            (name,),
+                        )
+                        if cursor.fetchone():
+                            cursor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+                        cursor.execute(create_index_sql(name, definition, concurrently=True))
+            finally:
+                conn.autocommit = False
     
     def create_tables(self) -> None:
         """Создает таблицы users и orders в базе данных."""
@@ -0,0 +1,457 @@
+"""
+SQL-запросы бэкенда.
+Общие для синхронного (backend.py) и асинхронного (backend_async.py) API,
+чтобы тексты запросов не расходились.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+
+from models.booking import MAX_DURATION_MINUTES
+from models.user import SEARCH_FIELDS, User
+
+# --- Users ---
+
+INSERT_USER = """INSERT INTO users (email, first_name, last_name, email_key, first_name_key, last_name_key)
+                 VALUES (%(email)s, %(first_name)s, %(last_name)s, %(email_key)s, %(first_name_key)s, %(last_name_key)s)
+                 RETURNING id"""
+SELECT_USER = "SELECT id, email, first_name, last_name FROM users WHERE id = %s"
+SELECT_ALL_USERS = "SELECT id, email, first_name, last_name FROM users ORDER BY id"
+SELECT_USERS_PAGE = "SELECT id, email, first_name, last_name FROM users WHERE id > %s ORDER BY id LIMIT %s"
+SELECT_USERS_BY_IDS = "SELECT id, email, first_name, last_name FROM users WHERE id = ANY(%s::int[]) ORDER BY id"
+DELETE_USER = "DELETE FROM users WHERE id = %s"
+DELETE_USERS = "DELETE FROM users WHERE id = ANY(%s::int[])"
+
+# Строк, просматриваемых в диапазоне индекса на одно слово запроса и одно поле: время поиска ограничено
+# и для частых префиксов («ivan» у сотни тысяч пользователей).
+SEARCH_USERS_SCAN = 1000
+# Каждое слово запроса (в нижнем регистре, см. build_search_users) — начало ключа поиска email, имени или фамилии.
+_USER_WORDS_MATCH = """(SELECT bool_and(starts_with(email_key, w) OR starts_with(first_name_key, w)
+                            OR starts_with(last_name_key, w))
+               FROM unnest(%(words)s::text[]) AS w)"""
+
+
+def _users_prefix_scan(field: str) -> str:
+    """
+    Подзапрос для LATERAL по словам p.word: пользователи, у которых ключ поиска поля field начинается с p.word,
+    по индексу users_<field>_key_idx. Границы диапазона ~>=~ / ~<~ (а не LIKE) используют индекс
+    и в общем плане подготовленного оператора; chr(1114111) — наибольший символ, сравнение побайтовое.
+    """
+    return f"""
+        SELECT * FROM (
+            SELECT id, email, first_name, last_name, email_key, first_name_key, last_name_key FROM users
+            WHERE {field}_key ~>=~ p.word AND {field}_key ~<~ (p.word || chr(1114111))
+            ORDER BY {field}_key USING ~<~
+            LIMIT %(scan)s
+        ) AS s
+        WHERE {_USER_WORDS_MATCH}
+        LIMIT %(limit)s"""
+
+
+# Все слова должны совпасть, поэтому кандидатов достаточно искать по началу полей для каждого слова
+# отдельно: редкое слово даёт короткий диапазон индекса. Плюс строка с id, если запрос — число.
+SEARCH_USERS = f"""
+    SELECT id, email, first_name, last_name
+    FROM (
+        SELECT c.* FROM unnest(%(words)s::text[]) AS p(word) CROSS JOIN LATERAL ({_users_prefix_scan("email")}) AS c
+        UNION
+        SELECT c.* FROM unnest(%(words)s::text[]) AS p(word) CROSS JOIN LATERAL ({_users_prefix_scan("first_name")}) AS c
+        UNION
+        SELECT c.* FROM unnest(%(words)s::text[]) AS p(word) CROSS JOIN LATERAL ({_users_prefix_scan("last_name")}) AS c
+        UNION
+        SELECT id, email, first_name, last_name, email_key, first_name_key, last_name_key
+        FROM users WHERE id = %(user_id)s
+    ) AS u
+    ORDER BY u.id = %(user_id)s DESC, u.email_key = %(text)s DESC, u.last_name_key, u.first_name_key, u.id
+    LIMIT %(limit)s"""
+
+# --- Tables (restaurant_tables) ---
+
+INSERT_TABLE = "INSERT INTO restaurant_tables (table_number, capacity) VALUES (%s, %s) RETURNING id"
+SELECT_TABLE = "SELECT id, table_number, capacity FROM restaurant_tables WHERE id = %s"
+SELECT_ALL_TABLES = "SELECT id, table_number, capacity FROM restaurant_tables ORDER BY id"
+SELECT_TABLES_PAGE = "SELECT id, table_number, capacity FROM restaurant_tables WHERE id > %s ORDER BY id LIMIT %s"
+SELECT_TABLES_BY_IDS = "SELECT id, table_number, capacity FROM restaurant_tables WHERE id = ANY(%s::int[]) ORDER BY id"
+DELETE_TABLE = "DELETE FROM restaurant_tables WHERE id = %s"
+DELETE_TABLES = "DELETE FROM restaurant_tables WHERE id = ANY(%s::int[]) RETURNING id"
+
+# --- Bookings ---
+
+# Проверка вместимости, создание и изменение бронирования — серверные функции
+# (Booking.functions_sql): один запрос, пересекающиеся периоды на столе сериализуются advisory-блокировкой.
+# Длительность NULL — по умолчанию (DEFAULT_DURATION_MINUTES) или прежняя при изменении.
+CHECK_TABLE_CAPACITY = "SELECT booking_check_capacity(%s::int, %s::date, %s::time, %s::int, %s::int, %s::int)"
+CREATE_BOOKING = "SELECT booking_create(%s::int, %s::int, %s::date, %s::time, %s::int, %s::int)"
+# Вместе с результатом возвращает прежнюю дату бронирования (для сброса кэша занятости).
+UPDATE_BOOKING = """SELECT booking_update(%(id)s::int, %(user_id)s::int, %(table_id)s::int,
+                              %(date)s::date, %(time)s::time, %(guests)s::int, %(duration)s::int),
+                  b.booking_date
+               FROM (SELECT 1) AS one LEFT JOIN bookings b ON b.id = %(id)s"""
+SELECT_BOOKING = """SELECT id, user_id, table_id, booking_date, booking_time, guests_count, duration_minutes, created_at
+                       FROM bookings WHERE id = %s"""
+SELECT_ALL_BOOKINGS = """SELECT id, user_id, table_id, booking_date, booking_time, guests_count, duration_minutes, created_at
+                       FROM bookings ORDER BY id"""
+SELECT_BOOKINGS_PAGE = """SELECT id, user_id, table_id, booking_date, booking_time, guests_count, duration_minutes, created_at
+                       FROM bookings WHERE id > %s ORDER BY id LIMIT %s"""
+SELECT_BOOKINGS_BY_IDS = """SELECT id, user_id, table_id, booking_date, booking_time, guests_count, duration_minutes, created_at
+                       FROM bookings WHERE id = ANY(%s::int[]) ORDER BY id"""
+DELETE_BOOKING = "DELETE FROM bookings WHERE id = %s RETURNING booking_date"
+# Пакетные операции: один запрос на весь набор id.
+UPDATE_BOOKINGS = """SELECT booking_update_batch(%s::int[], %s::int[], %s::int[], %s::date[], %s::time[], %s::int[],
+                                           %s::int[])"""
+DELETE_BOOKINGS = "DELETE FROM bookings WHERE id = ANY(%s::int[]) RETURNING booking_date"
+
+# --- Availability ---
+
+# Занятость стола за период — наибольшее число одновременно сидящих гостей (booking_table_loads,
+# booking_peak_load); пересечения ищутся по GiST-индексу bookings_period_idx.
+# Свободные столы для компании на период: сначала с наименьшим достаточным числом свободных мест.
+FIND_AVAILABLE_TABLES = """
+    SELECT t.id, t.table_number, t.capacity,
+           COALESCE(l.occupied, 0) AS occupied,
+           t.capacity - COALESCE(l.occupied, 0) AS free
+    FROM restaurant_tables t
+    LEFT JOIN booking_table_loads(booking_period(%(date)s::date, %(time)s::time, %(duration)s::int)) AS l
+      ON l.table_id = t.id
+    WHERE t.capacity - COALESCE(l.occupied, 0) >= %(guests)s
+    ORDER BY free, t.capacity, t.table_number"""
+# Занятость всех столов в слотах даты (для кэша занятости); slot_no — позиция времени во входном массиве.
+SLOTS_OCCUPANCY = """
+    WITH s AS (
+        SELECT slot_time, slot_no FROM unnest(%(times)s::time[]) WITH ORDINALITY AS s(slot_time, slot_no)
+    ),
+    l AS (
+        SELECT s.slot_no, l.table_id, l.occupied
+        FROM s CROSS JOIN LATERAL booking_table_loads(booking_period(%(date)s::date, s.slot_time, %(duration)s::int)) AS l
+    )
+    SELECT s.slot_no, t.id, t.table_number, t.capacity, COALESCE(l.occupied, 0) AS occupied
+    FROM s CROSS JOIN restaurant_tables t
+    LEFT JOIN l ON l.slot_no = s.slot_no AND l.table_id = t.id"""
+SLOT_OCCUPANCY = "SELECT booking_peak_load(%s::int, booking_period(%s::date, %s::time, %s::int))"
+# То же для нескольких слотов за один запрос; slot_no — позиция времени во входном массиве (с 1).
+AVAILABILITY_GRID = """
+    WITH s AS (
+        SELECT slot_time, slot_no FROM unnest(%(times)s::time[]) WITH ORDINALITY AS s(slot_time, slot_no)
+    ),
+    l AS (
+        SELECT s.slot_no, l.table_id, l.occupied
+        FROM s CROSS JOIN LATERAL booking_table_loads(booking_period(%(date)s::date, s.slot_time, %(duration)s::int)) AS l
+    )
+    SELECT s.slot_no, t.id, t.table_number, t.capacity,
+           COALESCE(l.occupied, 0) AS occupied,
+           t.capacity - COALESCE(l.occupied, 0) AS free
+    FROM s CROSS JOIN restaurant_tables t
+    LEFT JOIN l ON l.slot_no = s.slot_no AND l.table_id = t.id
+    WHERE t.capacity - COALESCE(l.occupied, 0) >= %(guests)s
+    ORDER BY s.slot_no, free, t.capacity, t.table_number"""
+
+# --- Occupancy report (reports.py) ---
+
+REFRESH_OCCUPANCY_REPORT = "SELECT occupancy_report_refresh()"
+# Общие условия отчётов: диапазон дат включительно, часы [hour_from, hour_to), необязательный стол.
+_REPORT_FILTER = """r.report_date BETWEEN %(date_from)s::date AND %(date_to)s::date
+      AND r.hour >= %(hour_from)s::int AND r.hour < %(hour_to)s::int
+      AND (%(table_id)s::int IS NULL OR r.table_id = %(table_id)s::int)"""
+# Загрузка = гость-минуты / (вместимость × минуты окна отчёта). Агрегат сворачивается
+# до соединения со столами, по дням — в порядке первичного ключа (без сортировки).
+OCCUPANCY_BY_TABLE = f"""
+    SELECT t.id AS table_id, t.table_number, t.capacity,
+           COALESCE(r.guest_minutes, 0) AS guest_minutes,
+           t.capacity * 60 * (%(hour_to)s::int - %(hour_from)s::int) * (%(date_to)s::date - %(date_from)s::date + 1)
+               AS capacity_minutes
+    FROM restaurant_tables t
+    LEFT JOIN (
+        SELECT r.table_id, SUM(r.guest_minutes)::bigint AS guest_minutes
+        FROM occupancy_report r
+        WHERE {_REPORT_FILTER}
+        GROUP BY r.table_id
+    ) AS r ON r.table_id = t.id
+    WHERE %(table_id)s::int IS NULL OR t.id = %(table_id)s::int
+    ORDER BY t.table_number"""
+OCCUPANCY_BY_DAY = f"""
+    SELECT r.report_date, t.id AS table_id, t.table_number, t.capacity, r.guest_minutes,
+           t.capacity * 60 * (%(hour_to)s::int - %(hour_from)s::int) AS capacity_minutes
+    FROM (
+        SELECT r.report_date, r.table_id, SUM(r.guest_minutes)::bigint AS guest_minutes
+        FROM occupancy_report r
+        WHERE {_REPORT_FILTER}
+        GROUP BY r.report_date, r.table_id
+    ) AS r
+    JOIN restaurant_tables t ON t.id = r.table_id
+    ORDER BY r.report_date, t.table_number"""
+OCCUPANCY_BY_HOUR = f"""
+    SELECT r.report_date, r.hour, t.id AS table_id, t.table_number, t.capacity,
+           r.guest_minutes::bigint AS guest_minutes, r.bookings_count,
+           t.capacity * 60 AS capacity_minutes
+    FROM occupancy_report r
+    JOIN restaurant_tables t ON t.id = r.table_id
+    WHERE {_REPORT_FILTER}
+    ORDER BY r.report_date, r.hour, t.table_number"""
+
+# Горячие запросы: выполняются как именованные подготовленные операторы сервера,
+# подготавливаются один раз на подключение пула (см. backend._prepare).
+PREPARED_QUERIES = frozenset({
+    SELECT_USER,
+    SELECT_USERS_PAGE,
+    SELECT_USERS_BY_IDS,
+    SEARCH_USERS,
+    SELECT_TABLE,
+    SELECT_TABLES_PAGE,
+    SELECT_TABLES_BY_IDS,
+    CHECK_TABLE_CAPACITY,
+    CREATE_BOOKING,
+    UPDATE_BOOKING,
+    SELECT_BOOKING,
+    SELECT_BOOKINGS_PAGE,
+    SELECT_BOOKINGS_BY_IDS,
+    DELETE_BOOKING,
+    FIND_AVAILABLE_TABLES,
+    SLOTS_OCCUPANCY,
+    SLOT_OCCUPANCY,
+    AVAILABILITY_GRID,
+    REFRESH_OCCUPANCY_REPORT,
+    OCCUPANCY_BY_TABLE,
+    OCCUPANCY_BY_DAY,
+    OCCUPANCY_BY_HOUR,
+})
+
+
+def build_update(table: str, key_id: int, values: Dict[str, Any]) -> Optional[Tuple[str, List[Any]]]:
+    """
+    Собирает UPDATE ... WHERE id = %s только по переданным (не None) полям.
+    Возвращает (sql, args) или None, если обновлять нечего.
+    """
+    updates = []
+    args = []
+    for column, value in values.items():
+        if value is not None:
+            updates.append(f"{column} = %s")
+            args.append(value)
+    if not updates:
+        return None
+    args.append(key_id)
+    return f"UPDATE {table} SET {', '.join(updates)} WHERE id = %s", args
+
+
+def user_values(
+    email: Optional[str], first_name: Optional[str], last_name: Optional[str]
+) -> Dict[str, Optional[str]]:
+    """Значения колонок users для INSERT_USER и build_update: поля и их ключи поиска (None — поле не меняется)."""
+    values = {"email": email, "first_name": first_name, "last_name": last_name}
+    for field in SEARCH_FIELDS:
+        values[f"{field}_key"] = User.search_key(values[field]) if values[field] is not None else None
+    return values
+
+
+# --- Search users ---
+
+
+def build_search_users(text: str, limit: int) -> Optional[Dict[str, Any]]:
+    """Параметры SEARCH_USERS для строки поиска text; None — в строке нет слов. Слова — ключи поиска (User.search_key)."""
+    words = User.search_key(text).split()
+    if not words:
+        return None
+    number = int(words[0]) if len(words) == 1 and words[0].isascii() and words[0].isdigit() else None
+    return {
+        "text": " ".join(words),
+        "words": words,
+        "scan": max(SEARCH_USERS_SCAN, limit),
+        # id вне диапазона INT не ищется (иначе ошибка приведения типа).
+        "user_id": number if number is not None and number < 2**31 else None,
+        "limit": limit,
+    }
+
+
+# --- Search bookings ---
+
+# Условия поиска бронирований: параметр search_bookings -> условие (в запрос попадают только заданные).
+# Диапазоны дат и времени — включительно.
+SEARCH_BOOKINGS_FILTERS = {
+    "date_from": "b.booking_date >= %s",
+    "date_to": "b.booking_date <= %s",
+    "time_from": "b.booking_time >= %s",
+    "time_to": "b.booking_time <= %s",
+    "user_id": "b.user_id = %s",
+    "table_id": "b.table_id = %s",
+    "min_guests": "b.guests_count >= %s",
+    "booking_ids": "b.id = ANY(%s::int[])",
+    "after_id": "b.id > %s",
+}
+SEARCH_BOOKINGS_ORDER = {
+    "date": "b.booking_date, b.booking_time, b.id",
+    "-date": "b.booking_date DESC, b.booking_time DESC, b.id DESC",
+    "id": "b.id",
+    "-id": "b.id DESC",
+}
+_SEARCH_BOOKINGS_FROM = (
+    "SELECT b.id, b.user_id, b.table_id, b.booking_date, b.booking_time, b.guests_count, b.duration_minutes, "
+    "b.created_at FROM bookings b"
+)
+# То же с пользователем и столом (get_bookings_detailed): соединения по первичным ключам, по строке на бронирование.
+_SEARCH_BOOKINGS_DETAILED_FROM = (
+    "SELECT b.id, b.user_id, b.table_id, b.booking_date, b.booking_time, b.guests_count, b.duration_minutes, "
+    "b.created_at, u.email AS user_email, u.first_name AS user_first_name, u.last_name AS user_last_name, "
+    "t.table_number, t.capacity AS table_capacity "
+    "FROM bookings b JOIN users u ON u.id = b.user_id JOIN restaurant_tables t ON t.id = b.table_id"
+)
+
+
+def build_search_bookings(
+    filters: Dict[str, Any], order_by: str, limit: Optional[int], detailed: bool = False
+) -> Tuple[str, List[Any]]:
+    """
+    Собирает SELECT бронирований с условиями только по заданным (не None) фильтрам
+    (SEARCH_BOOKINGS_FILTERS), сортировкой SEARCH_BOOKINGS_ORDER[order_by] и LIMIT (None — без него);
+    detailed=True — с колонками пользователя и стола. Возвращает (sql, args).
+    Под сочетания фильтров подобраны индексы Booking.indexes().
+    """
+    conditions = []
+    args: List[Any] = []
+    for name, value in filters.items():
+        if value is not None:
+            conditions.append(SEARCH_BOOKINGS_FILTERS[name])
+            args.append(value)
+    sql = _SEARCH_BOOKINGS_DETAILED_FROM if detailed else _SEARCH_BOOKINGS_FROM
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    sql += f" ORDER BY {SEARCH_BOOKINGS_ORDER[order_by]}"
+    if limit is not None:
+        sql += " LIMIT %s"
+        args.append(limit)
+    return sql, args
+
+
+# --- Bulk import bookings ---
+
+CREATE_BOOKINGS_IMPORT = """CREATE TEMP TABLE bookings_import (
+                   row_no           INT PRIMARY KEY,
+                   user_id          INT NOT NULL,
+                   table_id         INT NOT NULL,
+                   booking_date     DATE NOT NULL,
+                   booking_time     TIME NOT NULL,
+                   guests_count     INT NOT NULL,
+                   duration_minutes INT NOT NULL
+               ) ON COMMIT DROP"""
+COPY_BOOKINGS_IMPORT = """COPY bookings_import (row_no, user_id, table_id, booking_date, booking_time, guests_count,
+                                   duration_minutes)
+               FROM STDIN"""
+# Блокирует конкурентные вставки бронирований до конца транзакции импорта.
+LOCK_BOOKINGS_FOR_IMPORT = "LOCK TABLE bookings IN SHARE ROW EXCLUSIVE MODE"
+# Одна проверка вместимости для всей пачки: корректные строки каждого стола делятся на группы
+# пересекающихся периодов (острова по нарастающему максимуму конца периода); внутри группы строки
+# перебираются в порядке row_no, строка принимается, если помещается вместе с уже занятыми местами
+# и ранее принятыми строками группы (рекурсия идёт по всем группам сразу, глубина — число строк в группе).
+# Принятые строки вставляются тем же запросом одним INSERT, поэтому триггеры bookings (лента изменений,
+# журнал отчёта о загрузке) срабатывают один раз на импорт; id выделяются заранее в порядке row_no.
+VALIDATE_AND_INSERT_IMPORT = f"""
+    WITH RECURSIVE checked AS MATERIALIZED (
+        SELECT c.*,
+               CASE WHEN c.reason IS NULL
+                    THEN booking_period(c.booking_date, c.booking_time, c.duration_minutes)
+               END AS period
+        FROM (
+            SELECT i.*, t.capacity,
+                   CASE
+                       WHEN t.id IS NULL THEN 'no_table'
+                       WHEN u.id IS NULL THEN 'no_user'
+                       WHEN i.guests_count <= 0 THEN 'bad_guests'
+                       WHEN i.duration_minutes NOT BETWEEN 1 AND {MAX_DURATION_MINUTES} THEN 'bad_duration'
+                   END AS reason
+            FROM bookings_import i
+            LEFT JOIN restaurant_tables t ON t.id = i.table_id
+            LEFT JOIN users u ON u.id = i.user_id
+        ) AS c
+    ),
+    starts AS (
+        SELECT c.row_no, c.table_id, c.period,
+               lower(c.period) >= MAX(upper(c.period)) OVER (
+                   PARTITION BY c.table_id ORDER BY lower(c.period), c.row_no
+                   ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+               ) AS new_group
+        FROM checked c WHERE c.reason IS NULL
+    ),
+    ordered AS MATERIALIZED (
+        SELECT g.row_no, g.table_id, g.grp, c.period, c.guests_count, c.capacity,
+               row_number() OVER (PARTITION BY g.table_id, g.grp ORDER BY g.row_no) AS rn
+        FROM (
+            SELECT s.row_no, s.table_id,
+                   COUNT(*) FILTER (WHERE s.new_group IS NOT FALSE)
+                       OVER (PARTITION BY s.table_id ORDER BY lower(s.period), s.row_no) AS grp
+            FROM starts s
+        ) AS g
+        JOIN checked c USING (row_no)
+    ),
+    -- Уже записанные бронирования, пересекающие период группы, — одним проходом по bookings_period_idx.
+    existing AS (
+        SELECT g.table_id, g.grp,
+               COALESCE(array_agg(b.period) FILTER (WHERE b.id IS NOT NULL), '{{}}') AS periods,
+               COALESCE(array_agg(b.guests_count) FILTER (WHERE b.id IS NOT NULL), '{{}}') AS guests
+        FROM (
+            SELECT table_id, grp, tsrange(MIN(lower(period)), MAX(upper(period))) AS span
+            FROM ordered GROUP BY table_id, grp
+        ) AS g
+        LEFT JOIN bookings b
+          ON b.period && g.span AND int4range(b.table_id, b.table_id, '[]') @> g.table_id
+        GROUP BY g.table_id, g.grp
+    ),
+    -- Состояние группы — периоды и гости занятых мест: записанных и принятых строк импорта.
+    -- Загрузка за период строки — как в booking_peak_load, по событиям начала и конца.
+    greedy AS (
+        SELECT e.table_id, e.grp, 0::bigint AS rn, NULL::int AS row_no, NULL::int AS taken, NULL::boolean AS fits,
+               e.periods, e.guests
+        FROM existing e
+        UNION ALL
+        SELECT o.table_id, o.grp, o.rn, o.row_no, l.taken,
+               l.taken + o.guests_count <= o.capacity,
+               CASE WHEN l.taken + o.guests_count <= o.capacity THEN g.periods || o.period ELSE g.periods END,
+               CASE WHEN l.taken + o.guests_count <= o.capacity THEN g.guests || o.guests_count ELSE g.guests END
+        FROM greedy g
+        JOIN ordered o ON o.table_id = g.table_id AND o.grp = g.grp AND o.rn = g.rn + 1
+        CROSS JOIN LATERAL (
+            SELECT COALESCE(MAX(s.load), 0)::int AS taken
+            FROM (
+                SELECT SUM(ev.d) OVER (ORDER BY ev.t, ev.d ROWS UNBOUNDED PRECEDING) AS load
+                FROM unnest(g.periods, g.guests) AS x(period, guests_count)
+                CROSS JOIN LATERAL (
+                    VALUES (GREATEST(lower(x.period), lower(o.period)), x.guests_count),
+                           (CASE WHEN upper(x.period) < upper(o.period) THEN upper(x.period) END, -x.guests_count)
+                ) AS ev(t, d)
+                WHERE x.period && o.period AND ev.t IS NOT NULL
+            ) AS s
+        ) AS l
+    ),
+    numbered AS MATERIALIZED (
+        SELECT r.*, CASE WHEN r.reason IS NULL THEN nextval(pg_get_serial_sequence('bookings', 'id')) END AS new_id
+        FROM (
+            SELECT c.row_no, c.user_id, c.table_id, c.booking_date, c.booking_time, c.guests_count,
+                   c.duration_minutes, c.capacity, g.taken,
+                   COALESCE(c.reason, CASE WHEN NOT g.fits THEN 'capacity' END) AS reason
+            FROM checked c
+            LEFT JOIN greedy g ON g.row_no = c.row_no AND g.rn > 0
+            ORDER BY c.row_no
+        ) AS r
+    ),
+    inserted AS (
+        INSERT INTO bookings (id, user_id, table_id, booking_date, booking_time, guests_count, duration_minutes)
+        SELECT new_id, user_id, table_id, booking_date, booking_time, guests_count, duration_minutes
+        FROM numbered WHERE new_id IS NOT NULL
+    )
+    SELECT row_no, new_id, reason, capacity, taken, guests_count
+    FROM numbered ORDER BY row_no"""
+
+
+# --- Export bookings ---
+
+# Бронирования с email пользователя и номером стола за даты [%(date_from)s, %(date_to)s]
+# (NULL — без границы), по дате и времени (индекс bookings_booking_date_idx).
+_EXPORT_BOOKINGS_SELECT = """SELECT b.id, b.booking_date, b.booking_time, b.duration_minutes, b.guests_count,
+                       b.user_id, u.email, b.table_id, t.table_number, b.created_at
+                FROM bookings b
+                JOIN users u ON u.id = b.user_id
+                JOIN restaurant_tables t ON t.id = b.table_id
+                WHERE b.booking_date >= COALESCE(%(date_from)s::date, '-infinity')
+                  AND b.booking_date <= COALESCE(%(date_to)s::date, 'infinity')
+                ORDER BY b.booking_date, b.booking_time, b.id"""
+EXPORT_BOOKINGS_CSV = f"COPY ({_EXPORT_BOOKINGS_SELECT}) TO STDOUT WITH (FORMAT csv, HEADER true)"
+# JSON по строке на бронирование. Формат csv с кавычкой и разделителем, которых не бывает
+# в тексте JSON (управляющие символы в нём экранированы), — строки выходят как есть, без экранирования COPY.
+EXPORT_BOOKINGS_JSONL = f"""COPY (SELECT row_to_json(e) FROM ({_EXPORT_BOOKINGS_SELECT}) AS e)
+               TO STDOUT WITH (FORMAT csv, QUOTE E'\\x01', DELIMITER E'\\x02')"""
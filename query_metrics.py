@@ -0,0 +1,196 @@
+"""
+Метрики запросов к БД в памяти процесса: гистограммы длительности выполнения запросов,
+получения подключения из пула и фиксации транзакции, число возвращённых строк,
+журнал медленных запросов. Метка — имя вызывающей функции бэкенда (см. PostgresDriver.get_connection).
+
+Снимок — snapshot(), текст для Prometheus — prometheus_text().
+"""
+import bisect
+import contextvars
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import psycopg
+
+logger = logging.getLogger(__name__)
+
+# Границы корзин гистограмм, секунды (как у клиентов Prometheus по умолчанию, плюс 0.5 мс).
+BUCKETS: Tuple[float, ...] = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+STATEMENT = "statement"
+ACQUIRE = "acquire"
+COMMIT = "commit"
+
+_PROMETHEUS_NAMES = {
+    STATEMENT: ("booking_db_statement_duration_seconds", "Время выполнения запроса"),
+    ACQUIRE: ("booking_db_connection_acquire_seconds", "Время получения подключения из пула"),
+    COMMIT: ("booking_db_commit_seconds", "Время фиксации транзакции"),
+}
+
+# Метка запросов текущего потока/задачи asyncio; выставляется на время get_connection().
+current_label: contextvars.ContextVar[str] = contextvars.ContextVar("query_label", default="unlabeled")
+
+enabled = True
+# Порог журнала медленных запросов, секунды (None — не писать).
+slow_query_seconds: Optional[float] = (
+    float(os.getenv("DB_SLOW_QUERY_MS")) / 1000 if os.getenv("DB_SLOW_QUERY_MS", "").strip() else 0.5
+)
+
+
+class Histogram:
+    """Гистограмма длительностей с фиксированными корзинами BUCKETS."""
+
+    __slots__ = ("counts", "count", "sum", "max", "rows")
+
+    def __init__(self):
+        self.counts: List[int] = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self.rows = 0
+
+    def observe(self, seconds: float, rows: int = 0) -> None:
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+        self.rows += rows
+
+    def quantile(self, q: float) -> float:
+        """Оценка квантиля (верхняя граница корзины), секунды."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(BUCKETS, self.counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return self.max
+
+
+_lock = threading.Lock()
+_histograms: Dict[Tuple[str, str], Histogram] = {}
+
+
+def configure(enable: bool = True, slow_query_ms: Optional[float] = 500.0) -> None:
+    """Включает/выключает сбор метрик и задаёт порог медленных запросов (None — без журнала)."""
+    global enabled, slow_query_seconds
+    enabled = enable
+    slow_query_seconds = slow_query_ms / 1000 if slow_query_ms is not None else None
+
+
+def observe(kind: str, label: str, seconds: float, rows: int = 0) -> None:
+    """Учитывает одно измерение вида kind (STATEMENT, ACQUIRE, COMMIT) с меткой label."""
+    if not enabled:
+        return
+    with _lock:
+        hist = _histograms.get((kind, label))
+        if hist is None:
+            hist = _histograms[(kind, label)] = Histogram()
+        hist.observe(seconds, rows)
+
+
+def _observe_statement(query, seconds: float, rows: int) -> None:
+    if not query:
+        # Пустой запрос — проверка подключения пулом при выдаче (check_connection).
+        return
+    label = current_label.get()
+    observe(STATEMENT, label, seconds, rows)
+    if slow_query_seconds is not None and seconds >= slow_query_seconds:
+        sql = query.decode() if isinstance(query, bytes) else str(query)
+        logger.warning("Медленный запрос [%s] %.1f мс, строк %d: %s", label, seconds * 1000, rows, " ".join(sql.split())[:500])
+
+
+def reset() -> None:
+    """Сбрасывает накопленные метрики."""
+    with _lock:
+        _histograms.clear()
+
+
+def snapshot() -> Dict[str, Dict[str, dict]]:
+    """{вид: {метка: {count, sum_ms, mean_ms, max_ms, p50_ms, p95_ms, p99_ms, rows, buckets}}}."""
+    with _lock:
+        items = [(kind, label, h, list(h.counts)) for (kind, label), h in _histograms.items()]
+    result: Dict[str, Dict[str, dict]] = {STATEMENT: {}, ACQUIRE: {}, COMMIT: {}}
+    for kind, label, h, counts in items:
+        result[kind][label] = {
+            "count": h.count,
+            "sum_ms": h.sum * 1000,
+            "mean_ms": h.sum / h.count * 1000 if h.count else 0.0,
+            "max_ms": h.max * 1000,
+            "p50_ms": h.quantile(0.5) * 1000,
+            "p95_ms": h.quantile(0.95) * 1000,
+            "p99_ms": h.quantile(0.99) * 1000,
+            "rows": h.rows,
+            "buckets": dict(zip([str(b) for b in BUCKETS] + ["+Inf"], counts)),
+        }
+    return result
+
+
+def prometheus_text() -> str:
+    """Метрики в текстовом формате экспозиции Prometheus."""
+    with _lock:
+        items = sorted(((kind, label), h) for (kind, label), h in _histograms.items())
+        lines: List[str] = []
+        for kind, (name, help_text) in _PROMETHEUS_NAMES.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for (k, label), h in items:
+                if k != kind:
+                    continue
+                cumulative = 0
+                for bound, n in zip([str(b) for b in BUCKETS] + ["+Inf"], h.counts):
+                    cumulative += n
+                    lines.append(f'{name}_bucket{{label="{label}",le="{bound}"}} {cumulative}')
+                lines.append(f'{name}_sum{{label="{label}"}} {h.sum}')
+                lines.append(f'{name}_count{{label="{label}"}} {h.count}')
+        lines.append("# HELP booking_db_statement_rows_total Строк возвращено запросами")
+        lines.append("# TYPE booking_db_statement_rows_total counter")
+        for (k, label), h in items:
+            if k == STATEMENT:
+                lines.append(f'booking_db_statement_rows_total{{label="{label}"}} {h.rows}')
+    return "\n".join(lines) + "\n"
+
+
+def _rows(cursor) -> int:
+    return max(cursor.rowcount, 0)
+
+
+class InstrumentedCursor(psycopg.Cursor):
+    """Курсор, замеряющий каждый execute/executemany (cursor_factory подключений пула)."""
+
+    def execute(self, query, params=None, **kwargs):
+        started = time.perf_counter()
+        try:
+            return super().execute(query, params, **kwargs)
+        finally:
+            _observe_statement(query, time.perf_counter() - started, _rows(self))
+
+    def executemany(self, query, params_seq, **kwargs):
+        started = time.perf_counter()
+        try:
+            return super().executemany(query, params_seq, **kwargs)
+        finally:
+            _observe_statement(query, time.perf_counter() - started, _rows(self))
+
+
+class AsyncInstrumentedCursor(psycopg.AsyncCursor):
+    """Асинхронный аналог InstrumentedCursor."""
+
+    async def execute(self, query, params=None, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await super().execute(query, params, **kwargs)
+        finally:
+            _observe_statement(query, time.perf_counter() - started, _rows(self))
+
+    async def executemany(self, query, params_seq, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await super().executemany(query, params_seq, **kwargs)
+        finally:
+            _observe_statement(query, time.perf_counter() - started, _rows(self))
@@ -0,0 +1,72 @@
+"""
+Отчёт о загрузке столов: гости за столом относительно restaurant_tables.capacity
+по столам, дням и часам.
+
+Отчёт читается из материализованного агрегата occupancy_report (models.OccupancyReport).
+Записи в bookings помечают затронутые даты триггером; перед выдачей отчёта
+пересчитываются только эти даты, а не вся история.
+"""
+from typing import List, Optional
+
+from psycopg.rows import dict_row
+
+from postgres_driver import get_driver
+import backend
+import queries
+
+_GROUPINGS = {
+    "table": queries.OCCUPANCY_BY_TABLE,
+    "day": queries.OCCUPANCY_BY_DAY,
+    "hour": queries.OCCUPANCY_BY_HOUR,
+}
+
+
+def refresh_occupancy_report() -> int:
+    """Пересчитывает отчёт за даты, изменённые с прошлого пересчёта. Возвращает число дат."""
+    with get_driver(backend.DB_NAME) as db:
+        with db.get_connection() as conn:
+            with conn.cursor() as cur:
+                backend.execute(cur, queries.REFRESH_OCCUPANCY_REPORT)
+                return cur.fetchone()[0]
+
+
+def get_occupancy_report(
+    date_from: str,
+    date_to: str,
+    group_by: str = "day",
+    table_id: Optional[int] = None,
+    hour_from: int = 0,
+    hour_to: int = 24,
+) -> List[dict]:
+    """
+    Загрузка столов за даты date_from..date_to (включительно, YYYY-MM-DD) в часы [hour_from, hour_to)
+    (например, часы работы ресторана). group_by:
+      "table" — по столу за весь диапазон (все столы, в том числе без бронирований);
+      "day"   — по столу и дате; "hour" — по столу, дате и часу (только с бронированиями).
+    Строки: table_id, table_number, capacity, guest_minutes (гостей × минут), capacity_minutes,
+    utilization (доля 0..1), для "day"/"hour" — report_date, для "hour" — hour и bookings_count.
+    table_id — только один стол. Перед чтением пересчитываются изменённые даты.
+    """
+    sql = _GROUPINGS.get(group_by)
+    if sql is None:
+        raise ValueError(f"group_by: ожидается одно из {', '.join(_GROUPINGS)}, получено {group_by!r}.")
+    if not 0 <= hour_from < hour_to <= 24:
+        raise ValueError("Часы отчёта: 0 <= hour_from < hour_to <= 24.")
+    with get_driver(backend.DB_NAME) as db:
+        with db.get_connection() as conn:
+            with conn.cursor(row_factory=dict_row) as cur:
+                backend.execute(cur, queries.REFRESH_OCCUPANCY_REPORT)
+                backend.execute(
+                    cur, sql,
+                    {
+                        "date_from": date_from,
+                        "date_to": date_to,
+                        "hour_from": hour_from,
+                        "hour_to": hour_to,
+                        "table_id": table_id,
+                    },
+                )
+                rows = cur.fetchall()
+    for row in rows:
+        row["utilization"] = row["guest_minutes"] / row["capacity_minutes"] if row["capacity_minutes"] else 0.0
+    return rows
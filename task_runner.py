@@ -0,0 +1,183 @@
+"""
+Выполнение вызовов бэкенда вне главного потока tkinter.
+Задачи идут в пуле потоков, результаты возвращаются в поток Tk через очередь,
+которую опрашивает root.after(). Так же доставляются события ленты изменений БД (ChangeFeed).
+"""
+import logging
+import queue
+import threading
+import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
+from tkinter import ttk
+from typing import Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class BusyIndicator(ttk.Frame):
+    """Индикатор выполняющихся запросов вкладки: надпись и бегущая полоса, пока есть задачи."""
+
+    def __init__(self, parent, text: str = "Выполняется запрос…"):
+        super().__init__(parent)
+        self._text = text
+        self._count = 0
+        self._label = ttk.Label(self, text="")
+        self._label.pack(side=tk.LEFT, padx=(0, 5))
+        self._bar = ttk.Progressbar(self, mode="indeterminate", length=80)
+
+    def start(self) -> None:
+        self._count += 1
+        if self._count == 1:
+            self._label.config(text=self._text)
+            self._bar.pack(side=tk.LEFT)
+            self._bar.start(15)
+
+    def stop(self) -> None:
+        self._count = max(0, self._count - 1)
+        if self._count == 0:
+            self._bar.stop()
+            self._bar.pack_forget()
+            self._label.config(text="")
+
+
+class TaskRunner:
+    """
+    Пул потоков для вызовов бэкенда с доставкой результатов в поток Tk.
+    Задачи с одинаковым key вытесняют друг друга: результат задачи, после которой
+    запущена более новая с тем же key, отбрасывается (например, повторное «Обновить список»).
+    """
+
+    def __init__(self, root: tk.Misc, max_workers: int = 4, poll_ms: int = 30):
+        self._root = root
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="backend")
+        self._results: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._latest: Dict[str, int] = {}
+        self._next_id = 0
+        self._in_flight = 0
+        self._poll_ms = poll_ms
+        self._polling = False
+
+    def submit(
+        self,
+        fn: Callable,
+        *args,
+        key: Optional[str] = None,
+        on_success: Optional[Callable] = None,
+        on_error: Optional[Callable[[Exception], None]] = None,
+        indicator: Optional[BusyIndicator] = None,
+        **kwargs,
+    ) -> None:
+        """Запускает fn(*args, **kwargs) в рабочем потоке; колбэки вызываются в потоке Tk."""
+        self._next_id += 1
+        task_id = self._next_id
+        if key is not None:
+            self._latest[key] = task_id
+        if indicator is not None:
+            indicator.start()
+        self._in_flight += 1
+
+        def run():
+            try:
+                result, error = fn(*args, **kwargs), None
+            except Exception as ex:
+                result, error = None, ex
+            self._results.put((task_id, key, result, error, on_success, on_error, indicator))
+
+        self._executor.submit(run)
+        if not self._polling:
+            self._polling = True
+            self._root.after(self._poll_ms, self._poll)
+
+    def _poll(self) -> None:
+        while True:
+            try:
+                task_id, key, result, error, on_success, on_error, indicator = self._results.get_nowait()
+            except queue.Empty:
+                break
+            self._in_flight -= 1
+            if indicator is not None:
+                indicator.stop()
+            if key is not None and self._latest.get(key) != task_id:
+                continue
+            if key is not None:
+                del self._latest[key]
+            try:
+                if error is not None:
+                    if on_error is not None:
+                        on_error(error)
+                    else:
+                        logger.error("Ошибка фоновой задачи", exc_info=error)
+                elif on_success is not None:
+                    on_success(result)
+            except Exception:
+                logger.exception("Ошибка в обработчике результата")
+        if self._in_flight:
+            self._root.after(self._poll_ms, self._poll)
+        else:
+            self._polling = False
+
+    def shutdown(self) -> None:
+        """Останавливает пул, не дожидаясь выполняющихся запросов."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class ChangeFeed:
+    """
+    Лента изменений БД для GUI: фоновый поток читает события из listen(stop) (backend.listen_changes),
+    раз в poll_ms накопленные события передаются в потоке Tk подписчикам их таблиц одной пачкой.
+    Событие с table == "*" (переподключение) получают все подписчики. Если listen() завершается ошибкой,
+    подписчикам уходит такое же событие RESET (списки перечитываются целиком), и опрос прекращается.
+    """
+
+    def __init__(self, root: tk.Misc, listen: Callable[[threading.Event], Iterable], poll_ms: int = 200):
+        self._root = root
+        self._listen = listen
+        self._poll_ms = poll_ms
+        self._events: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._stop = threading.Event()
+        # Фоновый поток завершился ошибкой: событий больше не будет.
+        self._failed = threading.Event()
+        self._subscribers: Dict[str, List[Callable[[list], None]]] = {}
+
+    def subscribe(self, table: str, callback: Callable[[list], None]) -> None:
+        """callback(events) — события таблицы table за очередной опрос."""
+        self._subscribers.setdefault(table, []).append(callback)
+
+    def start(self) -> None:
+        threading.Thread(target=self._run, name="change-feed", daemon=True).start()
+        self._root.after(self._poll_ms, self._poll)
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        try:
+            for event in self._listen(self._stop):
+                self._events.put(event)
+        except Exception:
+            logger.exception("Лента изменений остановлена")
+            # Импорт здесь: models не нужны GUI при запуске (см. app._LazyModule).
+            from models.changes import RESET, ChangeEvent
+
+            self._events.put(ChangeEvent("*", RESET, None))
+            self._failed.set()
+
+    def _poll(self) -> None:
+        # Флаг читается до очереди: RESET упавшего потока уже в ней и будет доставлен.
+        failed = self._failed.is_set()
+        batches: Dict[str, list] = {}
+        while True:
+            try:
+                event = self._events.get_nowait()
+            except queue.Empty:
+                break
+            for table in (self._subscribers if event.table == "*" else (event.table,)):
+                batches.setdefault(table, []).append(event)
+        for table, events in batches.items():
+            for callback in self._subscribers.get(table, ()):
+                try:
+                    callback(events)
+                except Exception:
+                    logger.exception("Ошибка в обработчике изменений")
+        if not self._stop.is_set() and not failed:
+            self._root.after(self._poll_ms, self._poll)